@@ -29,6 +29,13 @@ else:
 echo "Initializing test data..."
 python init_data.py
 
-# Start the Django development server
+# Rebuild rankings (also shifts the rolling 90-day window)
+echo "Refreshing rankings..."
+python manage.py refresh_rankings
+python manage.py refresh_standings
+python manage.py recompute_elo
+
+# Start the pre-forking application server (workers, recycling and shutdown
+# timeout come from RACING_SERVE_* variables; exec so SIGTERM reaches it)
 echo "Starting Django server..."
-exec python manage.py runserver 0.0.0.0:8000
+exec python manage.py serve 0.0.0.0:8000
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from .forms import ResultForm
 from .models import UserProfile, Hippodrome, Owner, Jockey, Horse, Competition, Result
 
 
@@ -74,6 +75,8 @@ class CompetitionAdmin(admin.ModelAdmin):
 
 @admin.register(Result)
 class ResultAdmin(admin.ModelAdmin):
+    # Те же правила проверки, что и на странице добавления результата
+    form = ResultForm
     list_display = ('competition', 'horse', 'jockey', 'position', 'time_result')
     search_fields = ('horse__name', 'jockey__name', 'competition__name')
     list_filter = ('competition', 'position')
@@ -0,0 +1,183 @@
+"""
+JSON API только для чтения.
+
+Ответы строятся из проекций values(): объекты моделей не создаются,
+шаблоны не отрисовываются. Поддерживаются выбор полей (fields),
+курсорная пагинация (after) и фильтры по ипподрому, датам, лошади и жокею.
+"""
+from datetime import timedelta
+
+from django.db.models import Exists, OuterRef
+
+from .export import start_of_day
+from .models import Competition, Horse, Jockey, Result, format_duration
+from .pagination import KeysetPaginator
+
+
+# Размер страницы по умолчанию и максимальный
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 200
+
+
+class ApiError(ValueError):
+    """Некорректные параметры запроса к API"""
+
+
+class Resource:
+    """
+    Описание ресурса API.
+
+    fields - публичное имя поля -> путь в values() (без параметра fields
+    отдаются все); ordering - ключ курсорной пагинации
+    (пути values(), последним идет уникальный); filters - имя фильтра ->
+    функция (queryset, значение) -> queryset.
+    """
+
+    def __init__(self, model, fields, ordering, filters, formatters=None):
+        self.model = model
+        self.fields = fields
+        self.ordering = ordering
+        self.filters = filters
+        self.formatters = formatters or {}
+
+    def select_fields(self, requested):
+        """Проверяет список запрошенных полей"""
+        if not requested:
+            return list(self.fields)
+        unknown = [name for name in requested if name not in self.fields]
+        if unknown:
+            raise ApiError(f'Неизвестные поля: {", ".join(unknown)}')
+        return list(dict.fromkeys(requested))
+
+    def page(self, params, requested_fields=None, after=None, limit=API_PAGE_SIZE):
+        """Страница ресурса: (список словарей, курсор следующей страницы)"""
+        selected = self.select_fields(requested_fields)
+        queryset = self.model.objects.all()
+        for name, value in params.items():
+            if value is None:
+                continue
+            if name not in self.filters:
+                raise ApiError(f'Фильтр {name} не поддерживается')
+            queryset = self.filters[name](queryset, value)
+
+        paths = [self.fields[name] for name in selected]
+        keys = [name.lstrip('-') for name in self.ordering]
+        paginator = KeysetPaginator(
+            queryset.values(*dict.fromkeys(paths + keys)),
+            ordering=self.ordering,
+            page_size=limit,
+        )
+        page = paginator.page(after=after)
+        rows = []
+        for row in page:
+            item = {}
+            for name, path in zip(selected, paths):
+                value = row[path]
+                formatter = self.formatters.get(name)
+                item[name] = formatter(value) if formatter and value is not None else value
+            rows.append(item)
+        return rows, page.next_cursor
+
+
+def _participated(field, model=Result):
+    """Фильтр «участвовал вместе с лошадью/жокеем» через EXISTS без дублей строк"""
+    def apply(queryset, value):
+        related = queryset.model._meta.model_name
+        return queryset.filter(Exists(
+            model.objects.filter(**{related: OuterRef('pk'), field: value})
+        ))
+    return apply
+
+
+RESOURCES = {
+    'competitions': Resource(
+        Competition,
+        fields={
+            'id': 'id',
+            'name': 'name',
+            'date': 'date',
+            'time': 'time',
+            'hippodrome_id': 'hippodrome_id',
+            'hippodrome': 'hippodrome__name',
+            'updated_at': 'updated_at',
+        },
+        ordering=('-date', '-time', '-id'),
+        filters={
+            'hippodrome': lambda qs, value: qs.filter(hippodrome_id=value),
+            'date_from': lambda qs, value: qs.filter(date__gte=value),
+            'date_to': lambda qs, value: qs.filter(date__lte=value),
+            'horse': _participated('horse'),
+            'jockey': _participated('jockey'),
+        },
+    ),
+    'results': Resource(
+        Result,
+        fields={
+            'id': 'id',
+            'competition_id': 'competition_id',
+            'competition': 'competition__name',
+            'start': 'competition_start',
+            'hippodrome_id': 'competition__hippodrome_id',
+            'hippodrome': 'competition__hippodrome__name',
+            'position': 'position',
+            'horse_id': 'horse_id',
+            'horse': 'horse__name',
+            'jockey_id': 'jockey_id',
+            'jockey': 'jockey__name',
+            'time_result': 'time_result',
+            'updated_at': 'updated_at',
+        },
+        # Совпадает с индексами истории лошади и жокея
+        ordering=('-competition_start', '-id'),
+        filters={
+            'hippodrome': lambda qs, value: qs.filter(competition__hippodrome_id=value),
+            'date_from': lambda qs, value: qs.filter(competition_start__gte=start_of_day(value)),
+            'date_to': lambda qs, value: qs.filter(competition_start__lt=start_of_day(value + timedelta(days=1))),
+            'horse': lambda qs, value: qs.filter(horse_id=value),
+            'jockey': lambda qs, value: qs.filter(jockey_id=value),
+        },
+        formatters={'time_result': format_duration},
+    ),
+    'horses': Resource(
+        Horse,
+        fields={
+            'id': 'id',
+            'name': 'name',
+            'gender': 'gender',
+            'age': 'age',
+            'owner_id': 'owner_id',
+            'owner': 'owner__name',
+            'starts': 'stats__starts',
+            'wins': 'stats__wins',
+            'podiums': 'stats__podiums',
+            'best_time': 'stats__best_time',
+            'elo': 'stats__elo',
+            'updated_at': 'updated_at',
+        },
+        ordering=('id',),
+        filters={
+            'jockey': _participated('jockey'),
+        },
+        formatters={'best_time': format_duration},
+    ),
+    'jockeys': Resource(
+        Jockey,
+        fields={
+            'id': 'id',
+            'name': 'name',
+            'age': 'age',
+            'rating': 'rating',
+            'starts': 'stats__starts',
+            'wins': 'stats__wins',
+            'podiums': 'stats__podiums',
+            'best_time': 'stats__best_time',
+            'elo': 'stats__elo',
+            'updated_at': 'updated_at',
+        },
+        ordering=('name', 'id'),
+        filters={
+            'horse': _participated('horse'),
+        },
+        formatters={'best_time': format_duration},
+    ),
+}
@@ -0,0 +1,72 @@
+"""
+Источники данных для полей с автодополнением.
+
+Каждый источник отдает страницу проекций values() по префиксу имени,
+используя индекс по LOWER(name) (у состязаний - по началу подписи), поэтому стоимость запроса не зависит
+от размера таблицы.
+"""
+from django.db.models.functions import Lower
+
+from .models import COMPETITION_TITLE, Competition, Horse, Owner
+from .pagination import KeysetPaginator
+from .validation import eligible_jockeys
+
+
+# Сколько вариантов отдавать за один запрос
+AUTOCOMPLETE_PAGE_SIZE = 20
+
+
+def prefix_filter(queryset, prefix, expression=None):
+    """Диапазон по LOWER(name) вместо LIKE: использует индекс на любой СУБД"""
+    queryset = queryset.annotate(lname=expression if expression is not None else Lower('name'))
+    if prefix:
+        prefix = prefix.lower()
+        queryset = queryset.filter(lname__gte=prefix, lname__lt=prefix + '\uffff')
+    return queryset
+
+
+def _competition_label(row):
+    title = row['name'] or 'Состязание'
+    return f"{title} - {row['hippodrome__name']} ({row['date']})"
+
+
+class AutocompleteSource:
+    """Описание источника: базовая выборка, сортировка и подпись варианта"""
+
+    def __init__(self, get_queryset, ordering, fields, label=None, expression=None):
+        self.get_queryset = get_queryset
+        self.ordering = ordering
+        self.fields = fields
+        self.label = label or (lambda row: row['name'])
+        self.expression = expression
+
+    def page(self, prefix='', after=None):
+        """Страница вариантов: (список {'id', 'text'}, курсор следующей страницы)"""
+        queryset = prefix_filter(self.get_queryset(), prefix.strip(), self.expression)
+        paginator = KeysetPaginator(
+            queryset.values(*self.fields),
+            ordering=self.ordering,
+            page_size=AUTOCOMPLETE_PAGE_SIZE,
+        )
+        page = paginator.page(after=after)
+        results = [{'id': row['id'], 'text': self.label(row)} for row in page]
+        return results, page.next_cursor
+
+
+SOURCES = {
+    'horse': AutocompleteSource(
+        Horse.objects.all, ('lname', 'id'), ('id', 'name', 'lname'),
+    ),
+    'jockey': AutocompleteSource(
+        eligible_jockeys, ('lname', 'id'), ('id', 'name', 'lname'),
+    ),
+    'owner': AutocompleteSource(
+        Owner.objects.all, ('lname', 'id'), ('id', 'name', 'lname'),
+    ),
+    # Состязания показываем от новых к старым, как в списке состязаний
+    'competition': AutocompleteSource(
+        Competition.objects.all, ('-date', '-time', '-id'),
+        ('id', 'name', 'date', 'time', 'hippodrome__name'),
+        label=_competition_label, expression=COMPETITION_TITLE,
+    ),
+}
@@ -0,0 +1,19 @@
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth import get_user_model
+
+
+class ProfileModelBackend(ModelBackend):
+    """
+    Стандартная аутентификация по модели, которая при загрузке пользователя
+    из сессии сразу подтягивает профиль и связанного жокея одним запросом
+    """
+    
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        user = (
+            UserModel._default_manager
+            .select_related('userprofile__jockey')
+            .filter(pk=user_id)
+            .first()
+        )
+        return user if user is not None and self.user_can_authenticate(user) else None
@@ -0,0 +1,226 @@
+"""
+Кэш страниц для просмотра с версионированием по моделям.
+
+У каждой модели есть счетчик версии в кэше. Ключ страницы включает версии
+моделей, от которых она зависит, и роль пользователя, поэтому изменение
+любой из моделей делает старые записи недостижимыми без перебора ключей.
+Имя пользователя в навигации не кэшируется: блок между маркерами user-nav
+отрисовывается заново при каждом попадании в кэш.
+У асинхронных представлений кэш читается асинхронными методами (aget_many и др.).
+"""
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+from .middleware import aget_user_profile, get_user_profile
+from .models import Competition, Hippodrome, Horse, Jockey, Owner, Result, UserProfile
+
+
+# Время жизни страницы; устаревшие версии вытесняются кэшем сами
+VIEW_CACHE_TIMEOUT = getattr(settings, 'RACING_VIEW_CACHE_TIMEOUT', 60 * 60)
+
+# Маркеры блока навигации, зависящего от конкретного пользователя
+USER_NAV_START = '<!-- user-nav -->'
+USER_NAV_END = '<!-- /user-nav -->'
+USER_NAV_TEMPLATE = 'racing/includes/user_nav.html'
+
+
+def _version_key(model):
+    return f'racing:version:{model._meta.label_lower}'
+
+
+def _initial_version():
+    # Не начинаем с 1: после вытеснения счетчика старые страницы не должны ожить
+    return time.time_ns()
+
+
+def get_versions(models):
+    """Текущие версии моделей одним обращением к кэшу"""
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    missing = {key: _initial_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+async def aget_versions(models):
+    """Асинхронный get_versions"""
+    keys = [_version_key(model) for model in models]
+    versions = await cache.aget_many(keys)
+    missing = {key: _initial_version() for key in keys if key not in versions}
+    if missing:
+        await cache.aset_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump_version(model):
+    """Увеличивает версию модели: все зависящие от нее страницы устаревают"""
+    key = _version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), None)
+
+
+def bump_version_on_commit(model):
+    """Увеличивает версию после фиксации транзакции, чтобы не закэшировать старые данные"""
+    transaction.on_commit(lambda: bump_version(model))
+
+
+def request_role(request):
+    """Роль, по которой различаются закэшированные страницы"""
+    if not request.user.is_authenticated:
+        return 'anonymous'
+    user_profile = get_user_profile(request)
+    return user_profile.role if user_profile is not None else 'user'
+
+
+def view_cache_key(request, name, models, per_day=False, versions=None):
+    if versions is None:
+        versions = get_versions(models)
+    versions = '.'.join(str(version) for version in versions)
+    if per_day:
+        versions += f':{timezone.localdate().isoformat()}'
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'racing:view:{name}:{request_role(request)}:{versions}:{path}'
+
+
+def _split_user_nav(content):
+    """Делит страницу на части до и после блока навигации пользователя"""
+    start = content.find(USER_NAV_START)
+    end = content.find(USER_NAV_END, start)
+    if start < 0 or end < 0:
+        return None
+    return content[:start + len(USER_NAV_START)], content[end:]
+
+
+def cache_view(*models, timeout=None, per_day=False):
+    """
+    Кэширует GET-ответ представления с учетом роли пользователя и версий
+    перечисленных моделей. Не кэширует ответы с сообщениями пользователю,
+    с CSRF-токеном и с кодом, отличным от 200. per_day - страница зависит
+    от текущей даты (например, «дней с последнего старта») и кэшируется на день.
+    Асинхронные представления оборачиваются асинхронно.
+    """
+    def decorator(view_func):
+        name = view_func.__name__
+
+        def cached_parts(response, request):
+            """Части ответа для кэша или None, если ответ кэшировать нельзя"""
+            cacheable = (
+                response.status_code == 200
+                and not response.streaming
+                and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+            )
+            if cacheable:
+                return _split_user_nav(response.content.decode(response.charset))
+            return None
+
+        def hit(parts, request):
+            user_nav = render_to_string(USER_NAV_TEMPLATE, request=request)
+            return HttpResponse(parts[0] + user_nav + parts[1])
+
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                # Сессия и пользователь нужны для сообщений и роли в ключе
+                await aget_user_profile(request)
+                if request.method != 'GET' or len(messages.get_messages(request)):
+                    return await view_func(request, *args, **kwargs)
+
+                versions = await aget_versions(models)
+                key = view_cache_key(request, name, models, per_day, versions=versions)
+                parts = await cache.aget(key)
+                if parts is not None:
+                    return hit(parts, request)
+
+                response = await view_func(request, *args, **kwargs)
+                parts = cached_parts(response, request)
+                if parts is not None:
+                    await cache.aset(key, parts, VIEW_CACHE_TIMEOUT if timeout is None else timeout)
+                return response
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or len(messages.get_messages(request)):
+                return view_func(request, *args, **kwargs)
+
+            key = view_cache_key(request, name, models, per_day)
+            parts = cache.get(key)
+            if parts is not None:
+                return hit(parts, request)
+
+            response = view_func(request, *args, **kwargs)
+            parts = cached_parts(response, request)
+            if parts is not None:
+                cache.set(key, parts, VIEW_CACHE_TIMEOUT if timeout is None else timeout)
+            return response
+        return wrapper
+    return decorator
+
+
+# Карточки списков: вид -> (шаблон, имя объекта в шаблоне, модели, от которых зависит)
+CARD_TEMPLATES = {
+    'competition': ('racing/includes/competition_card.html', 'competition', (Competition, Hippodrome)),
+    'horse': ('racing/includes/horse_card.html', 'horse', (Horse, Owner, Result)),
+    'jockey': ('racing/includes/jockey_card.html', 'jockey', (Jockey, UserProfile, Result)),
+}
+
+
+def _card_keys(kind, objects, versions):
+    versions = '.'.join(str(version) for version in versions)
+    return [f'racing:card:{kind}:{obj.pk}:{versions}' for obj in objects]
+
+
+def _render_missing_cards(kind, objects, keys, fragments):
+    """Дорисовывает в fragments недостающие карточки; возвращает только новые"""
+    template_name, name, _ = CARD_TEMPLATES[kind]
+    missing = {}
+    for key, obj in zip(keys, objects):
+        if key not in fragments:
+            fragments[key] = missing[key] = render_to_string(template_name, {name: obj})
+    return missing
+
+
+def render_cached_cards(objects, kind):
+    """
+    Отрисовывает карточки списка. Каждая карточка кэшируется отдельно по pk
+    и версиям моделей, поэтому повторная отрисовка - одно чтение get_many
+    и склейка строк; шаблон рендерится только для устаревших карточек.
+    Карточки не зависят от пользователя и общие для всех ролей.
+    """
+    objects = list(objects)
+    keys = _card_keys(kind, objects, get_versions(CARD_TEMPLATES[kind][2]))
+    fragments = cache.get_many(keys)
+    missing = _render_missing_cards(kind, objects, keys, fragments)
+    if missing:
+        cache.set_many(missing, VIEW_CACHE_TIMEOUT)
+    return mark_safe(''.join(fragments[key] for key in keys))
+
+
+async def arender_cached_cards(objects, kind):
+    """
+    Асинхронный render_cached_cards для асинхронных представлений: обращения
+    к кэшу (файлы, memcached) не блокируют цикл событий
+    """
+    objects = list(objects)
+    keys = _card_keys(kind, objects, await aget_versions(CARD_TEMPLATES[kind][2]))
+    fragments = await cache.aget_many(keys)
+    missing = _render_missing_cards(kind, objects, keys, fragments)
+    if missing:
+        await cache.aset_many(missing, VIEW_CACHE_TIMEOUT)
+    return mark_safe(''.join(fragments[key] for key in keys))
@@ -0,0 +1,192 @@
+"""
+Условные GET-запросы (ETag / Last-Modified) для страниц просмотра.
+
+Валидатор страницы - максимальное updated_at и число строк, из которых она
+построена; он считается одним агрегатным запросом. Для списков целых таблиц
+к числу строк добавляются версии моделей из кэша: MAX(updated_at) не
+замечает удаления и массовые пересчеты, а версии увеличиваются при любых
+изменениях. Если клиент прислал совпадающий валидатор, ответ 304 отдается
+без отрисовки шаблона.
+"""
+import datetime
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib import messages
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import condition
+
+from .caching import get_versions
+from .counters import get_counts
+from .export import start_of_day
+from .middleware import get_user_profile
+from .models import Competition, Hippodrome, Horse, Jockey, Owner, Result
+
+
+def _latest(*values):
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+def competition_state(request, competition_id):
+    """Состязание, его ипподром, результаты и их участники"""
+    rows = (
+        Competition.objects.filter(pk=competition_id)
+        .values('updated_at', 'hippodrome__updated_at')
+        .annotate(
+            rows=Count('result'),
+            results=Max('result__updated_at'),
+            horses=Max('result__horse__updated_at'),
+            jockeys=Max('result__jockey__updated_at'),
+        )
+        .order_by()[:1]
+    )
+    row = next(iter(rows), None)
+    if row is None:
+        return None
+    keys = ('updated_at', 'hippodrome__updated_at', 'results', 'horses', 'jockeys')
+    return _latest(*(row[key] for key in keys)), row['rows']
+
+
+def _participant_state(model, participant_id, other):
+    """
+    Лошадь или жокей и все его выступления (состязания, ипподромы, партнеры).
+    Рейтинг Эло из статистики входит в отпечаток: пересчет рейтингов
+    переписывает его, не трогая updated_at.
+    """
+    rows = (
+        model.objects.filter(pk=participant_id)
+        .values('updated_at', 'stats__elo')
+        .annotate(
+            rows=Count('result'),
+            results=Max('result__updated_at'),
+            competitions=Max('result__competition__updated_at'),
+            hippodromes=Max('result__competition__hippodrome__updated_at'),
+            others=Max(f'result__{other}__updated_at'),
+        )
+        .order_by()[:1]
+    )
+    row = next(iter(rows), None)
+    if row is None:
+        return None
+    keys = ('updated_at', 'results', 'competitions', 'hippodromes', 'others')
+    return _latest(*(row[key] for key in keys)), f"{row['rows']}:{row['stats__elo']}"
+
+
+def horse_state(request, horse_id):
+    state = _participant_state(Horse, horse_id, 'jockey')
+    if state is None or state[0] is None:
+        return state
+    # Форма лошади показывает дни с последнего старта: страница меняется каждый день
+    latest, rows = state
+    today = start_of_day(timezone.localdate())
+    return max(latest, today), rows
+
+
+def jockey_state(request, jockey_id):
+    return _participant_state(Jockey, jockey_id, 'horse')
+
+
+def _tables_state(models, counts):
+    """
+    Состояние целых таблиц для списков: MAX(updated_at) по индексу,
+    размеры таблиц из счетчиков главной страницы вместо COUNT(*)
+    и версии моделей, которые меняются и при удалении строк
+    """
+    latest = _latest(*(
+        model.objects.aggregate(latest=Max('updated_at'))['latest'] for model in models
+    ))
+    versions = '.'.join(str(version) for version in get_versions(models))
+    return latest, f"{'.'.join(str(count) for count in counts)}:{versions}"
+
+
+def competition_list_state(request):
+    counts = get_counts()
+    return _tables_state((Competition, Hippodrome), (counts['competitions'], Hippodrome.objects.count()))
+
+
+def horse_list_state(request):
+    # Карточки лошадей показывают владельца и статистику по результатам
+    counts = get_counts()
+    return _tables_state((Horse, Owner, Result), (counts['horses'], counts['results']))
+
+
+def jockey_list_state(request):
+    counts = get_counts()
+    return _tables_state((Jockey, Result), (counts['jockeys'], counts['results']))
+
+
+def hippodrome_list_state(request):
+    return _tables_state((Hippodrome,), (Hippodrome.objects.count(),))
+
+
+def conditional_page(state_func):
+    """
+    Отвечает 304 Not Modified, если страница не менялась.
+    state_func(request, *args, **kwargs) -> (max updated_at, число строк или
+    другой отпечаток содержимого) или None;
+    вызывается один раз за запрос. ETag включает пользователя и его роль,
+    потому что навигация и кнопки на странице зависят от них.
+    Для асинхронного представления валидатор считается одним переходом
+    в поток, а страница отрисовывается асинхронно только без совпадения.
+    """
+    def get_state(request, *args, **kwargs):
+        if not hasattr(request, '_page_state'):
+            request._page_state = None
+            # Непоказанные сообщения должны попасть в полный ответ
+            if not len(messages.get_messages(request)):
+                request._page_state = state_func(request, *args, **kwargs)
+        return request._page_state
+
+    def etag(request, *args, **kwargs):
+        state = get_state(request, *args, **kwargs)
+        if state is None or state[0] is None:
+            return None
+        latest, rows = state
+        user_profile = get_user_profile(request)
+        parts = (
+            request.user.pk,
+            user_profile.role if user_profile is not None else '',
+            rows,
+            latest.isoformat(),
+        )
+        return hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        state = get_state(request, *args, **kwargs)
+        return state[0] if state is not None else None
+
+    def validators(request, *args, **kwargs):
+        """ETag в кавычках и Last-Modified в секундах, как у condition()"""
+        res_etag = etag(request, *args, **kwargs)
+        latest = last_modified(request, *args, **kwargs)
+        if latest is not None and not timezone.is_aware(latest):
+            latest = timezone.make_aware(latest, datetime.timezone.utc)
+        return (
+            quote_etag(res_etag) if res_etag is not None else None,
+            int(latest.timestamp()) if latest is not None else None,
+        )
+
+    def decorator(view_func):
+        if not iscoroutinefunction(view_func):
+            return condition(etag_func=etag, last_modified_func=last_modified)(view_func)
+
+        @wraps(view_func)
+        async def inner(request, *args, **kwargs):
+            res_etag, res_last_modified = await sync_to_async(validators)(request, *args, **kwargs)
+            response = get_conditional_response(request, etag=res_etag, last_modified=res_last_modified)
+            if response is None:
+                response = await view_func(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD'):
+                if res_last_modified and not response.has_header('Last-Modified'):
+                    response.headers['Last-Modified'] = http_date(res_last_modified)
+                if res_etag:
+                    response.headers.setdefault('ETag', res_etag)
+            return response
+        return inner
+
+    return decorator
@@ -0,0 +1,83 @@
+"""
+Счетчики записей для главной страницы.
+
+Значения хранятся в SiteCounter и поддерживаются сигналами post_save/post_delete,
+поэтому главная страница читает их одним запросом вместо COUNT(*) по таблицам.
+Массовые вставки (bulk_create) сигналы не вызывают: такой код сам вызывает
+increment(модель, число строк) в той же транзакции. Остальные расхождения,
+например после loaddata, исправляет команда reconcile_counters.
+"""
+from django.db.models import F
+
+from .models import Competition, Horse, Jockey, Result, SiteCounter
+
+
+# Название счетчика -> модель, записи которой он считает
+COUNTED_MODELS = {
+    'horses': Horse,
+    'jockeys': Jockey,
+    'competitions': Competition,
+    'results': Result,
+}
+
+
+def counter_name(model):
+    """Название счетчика для модели или None, если модель не считается"""
+    for name, counted_model in COUNTED_MODELS.items():
+        if counted_model is model:
+            return name
+    return None
+
+
+def increment(name, delta=1):
+    """
+    Изменяет счетчик на delta в текущей транзакции; name - название счетчика
+    или модель (для несчитаемой модели ничего не делает).
+    Используется сигналами и кодом массовой вставки/удаления, который сигналы не вызывает.
+    """
+    if not isinstance(name, str):
+        name = counter_name(name)
+        if name is None:
+            return
+    updated = SiteCounter.objects.filter(pk=name).update(value=F('value') + delta)
+    if not updated:
+        # Счетчика еще нет: инициализируем его точным значением
+        reconcile([name])
+
+
+def get_counts():
+    """Значения всех счетчиков одним запросом; отсутствующие считаются по таблице"""
+    counts = dict(SiteCounter.objects.filter(pk__in=COUNTED_MODELS).values_list('name', 'value'))
+    for name, model in COUNTED_MODELS.items():
+        if name not in counts:
+            counts[name] = model.objects.count()
+    return counts
+
+
+async def aget_counts():
+    """Асинхронный get_counts"""
+    counts = {
+        name: value
+        async for name, value in SiteCounter.objects.filter(pk__in=COUNTED_MODELS).values_list('name', 'value')
+    }
+    for name, model in COUNTED_MODELS.items():
+        if name not in counts:
+            counts[name] = await model.objects.acount()
+    return counts
+
+
+def reconcile(names=None):
+    """
+    Пересчитывает счетчики по таблицам и исправляет расхождения.
+    Возвращает словарь название -> (было, стало) для исправленных счетчиков.
+    """
+    fixed = {}
+    for name in names or COUNTED_MODELS:
+        actual = COUNTED_MODELS[name].objects.count()
+        counter, created = SiteCounter.objects.get_or_create(name=name, defaults={'value': actual})
+        if created:
+            fixed[name] = (None, actual)
+        elif counter.value != actual:
+            fixed[name] = (counter.value, actual)
+            SiteCounter.objects.filter(pk=name).update(value=actual)
+    return fixed
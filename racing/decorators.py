@@ -1,36 +1,57 @@
 from functools import wraps
+from asgiref.sync import iscoroutinefunction
 from django.shortcuts import redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
+from .middleware import get_user_profile, aget_user_profile
 from .models import UserProfile
 
 
+def _check_role(request, user_profile, allowed_roles):
+    """Ответ с перенаправлением, если роли недостаточно, иначе None"""
+    if user_profile is None:
+        # Профиль еще не создан: для просмотра считаем роль по умолчанию,
+        # в базу ничего не пишем
+        if allowed_roles == ['user', 'jockey', 'admin']:  # Только для @user_required
+            user_profile = UserProfile(user=request.user, role='user')
+        else:
+            # Для других ролей показываем ошибку
+            messages.error(request, 'Профиль пользователя не найден. Обратитесь к администратору.')
+            return redirect('index')
+    
+    if user_profile.role not in allowed_roles:
+        messages.error(request, f'У вас нет прав для доступа к этой странице. Требуется роль: {", ".join(allowed_roles)}, у вас: {user_profile.get_role_display()}')
+        return redirect('index')
+    return None
+
+
 def role_required(allowed_roles):
     """
     Декоратор для проверки роли пользователя
     allowed_roles: список разрешенных ролей ['admin', 'jockey', 'user']
+    Поддерживает и асинхронные представления.
     """
     def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                # Загружает пользователя и профиль, не блокируя цикл событий
+                user_profile = await aget_user_profile(request)
+                if not request.user.is_authenticated:
+                    return redirect_to_login(request.get_full_path())
+                denied = _check_role(request, user_profile, allowed_roles)
+                if denied is not None:
+                    return denied
+                return await view_func(request, *args, **kwargs)
+            return async_wrapper
+
         @wraps(view_func)
         @login_required
         def wrapper(request, *args, **kwargs):
-            try:
-                user_profile = request.user.userprofile
-            except UserProfile.DoesNotExist:
-                # Создаем профиль пользователя с ролью по умолчанию только для просмотра
-                if allowed_roles == ['user', 'jockey', 'admin']:  # Только для @user_required
-                    user_profile = UserProfile.objects.create(
-                        user=request.user,
-                        role='user'
-                    )
-                else:
-                    # Для других ролей показываем ошибку
-                    messages.error(request, 'Профиль пользователя не найден. Обратитесь к администратору.')
-                    return redirect('index')
-            
-            if user_profile.role not in allowed_roles:
-                messages.error(request, f'У вас нет прав для доступа к этой странице. Требуется роль: {", ".join(allowed_roles)}, у вас: {user_profile.get_role_display()}')
-                return redirect('index')
+            denied = _check_role(request, get_user_profile(request), allowed_roles)
+            if denied is not None:
+                return denied
             return view_func(request, *args, **kwargs)
         return wrapper
     return decorator
@@ -48,4 +69,4 @@ def jockey_or_admin_required(view_func):
 
 def user_required(view_func):
     """Декоратор для проверки прав пользователя (все роли)"""
-    return role_required(['user', 'jockey', 'admin'])(view_func)
\ No newline at end of file
+    return role_required(['user', 'jockey', 'admin'])(view_func)
@@ -0,0 +1,176 @@
+"""
+Рейтинги Эло лошадей и жокеев по порядку финиша.
+
+Состязание - набор попарных встреч: участник, финишировавший выше,
+выигрывает у каждого, кто финишировал ниже. Изменение рейтинга
+ΔR_i = ELO_K * Σ_j (S_ij - E_ij), где E_ij = 1 / (1 + 10^((R_j - R_i) / ELO_SCALE)).
+Рейтинг хранится в поле elo статистики карьеры (HorseStats, JockeyStats).
+
+Полный пересчет читает Result потоком в хронологическом порядке, переводит
+id в плотные индексы массивов и обновляет каждое состязание матрично через
+NumPy. Без NumPy выполняется тот же расчет на чистом Python.
+
+Новые результаты учитываются инкрементально за O(размер поля): считаются
+только пары, в которых есть новый результат. Правка или удаление старого
+результата меняет всю последующую историю - ее исправляет команда recompute_elo.
+"""
+from django.db import transaction
+
+from .caching import bump_version_on_commit
+from .models import Horse, Jockey, Result
+from .stats import STATS_TARGETS
+
+try:
+    import numpy as np
+except ImportError:  # NumPy необязателен: пересчет медленнее, результат тот же
+    np = None
+
+
+ELO_INITIAL = 1500.0
+
+# Вес одной попарной встречи и масштаб разницы рейтингов
+ELO_K = 4.0
+ELO_SCALE = 400.0
+
+# Размер пачки при чтении результатов и записи рейтингов
+RECOMPUTE_CHUNK_SIZE = 10000
+
+
+def _deltas_numpy(ratings, positions, new):
+    ratings = np.asarray(ratings, dtype=float)
+    positions = np.asarray(positions)
+    expected = 1.0 / (1.0 + 10.0 ** ((ratings[None, :] - ratings[:, None]) / ELO_SCALE))
+    score = (positions[:, None] < positions[None, :]) + 0.5 * (positions[:, None] == positions[None, :])
+    pairs = score - expected
+    if new is not None:
+        new = np.asarray(new, dtype=bool)
+        pairs = pairs * (new[:, None] | new[None, :])
+    return ELO_K * pairs.sum(axis=1)
+
+
+def _deltas_python(ratings, positions, new):
+    deltas = []
+    for i, (rating, position) in enumerate(zip(ratings, positions)):
+        total = 0.0
+        for j, (other_rating, other_position) in enumerate(zip(ratings, positions)):
+            if i == j or (new is not None and not (new[i] or new[j])):
+                continue
+            score = 1.0 if position < other_position else 0.5 if position == other_position else 0.0
+            total += score - 1.0 / (1.0 + 10.0 ** ((other_rating - rating) / ELO_SCALE))
+        deltas.append(ELO_K * total)
+    return deltas
+
+
+def race_deltas(ratings, positions, new=None):
+    """
+    Изменения рейтингов участников одного состязания.
+    new - отметки новых результатов: учитываются только пары с новым
+    результатом (None - все пары).
+    """
+    if np is not None:
+        return _deltas_numpy(ratings, positions, new)
+    return _deltas_python(ratings, positions, new)
+
+
+def apply_results(competition_id, result_ids):
+    """
+    Учитывает новые результаты состязания: попарно друг с другом и
+    с ранее записанными результатами. Два чтения и две записи на таблицу.
+    """
+    result_ids = set(result_ids)
+    field = list(
+        Result.objects.filter(competition_id=competition_id)
+        .values_list('pk', 'horse_id', 'jockey_id', 'position')
+    )
+    if len(field) < 2:
+        return
+    new = [pk in result_ids for pk, *_ in field]
+    positions = [position for *_, position in field]
+    with transaction.atomic():
+        for column, (stats_model, name) in enumerate(STATS_TARGETS, start=1):
+            owner_ids = [row[column] for row in field]
+            ratings = dict(stats_model.objects.filter(pk__in=owner_ids).values_list('pk', 'elo'))
+            current = [ratings.get(owner_id, ELO_INITIAL) for owner_id in owner_ids]
+            deltas = race_deltas(current, positions, new)
+            stats_model.objects.bulk_update(
+                [
+                    stats_model(**{f'{name}_id': owner_id}, elo=rating + float(delta))
+                    for owner_id, rating, delta in zip(owner_ids, current, deltas)
+                ],
+                ['elo'],
+            )
+
+
+def _load_history():
+    """
+    Результаты в хронологическом порядке: границы состязаний, позиции
+    и плотные индексы лошадей и жокеев вместе с их id.
+    """
+    competitions = []
+    positions = []
+    indexes = ([], [])
+    owner_ids = ({}, {})
+    rows = (
+        Result.objects.order_by('competition_start', 'competition_id', 'position', 'id')
+        .values_list('competition_id', 'horse_id', 'jockey_id', 'position')
+        .iterator(chunk_size=RECOMPUTE_CHUNK_SIZE)
+    )
+    for competition_id, horse_id, jockey_id, position in rows:
+        competitions.append(competition_id)
+        positions.append(position)
+        for owner_id, dense, target in zip((horse_id, jockey_id), owner_ids, indexes):
+            target.append(dense.setdefault(owner_id, len(dense)))
+    bounds = [0] + [i for i in range(1, len(competitions)) if competitions[i] != competitions[i - 1]]
+    bounds.append(len(competitions))
+    return bounds, positions, indexes, owner_ids
+
+
+def _replay(bounds, positions, indexes, sizes):
+    """Применяет состязания по порядку; возвращает массивы рейтингов по таблицам"""
+    if np is not None:
+        positions = np.asarray(positions)
+        indexes = [np.asarray(index, dtype=np.int64) for index in indexes]
+        ratings = [np.full(size, ELO_INITIAL) for size in sizes]
+    else:
+        ratings = [[ELO_INITIAL] * size for size in sizes]
+    for start, end in zip(bounds, bounds[1:]):
+        if end - start < 2:
+            continue
+        race_positions = positions[start:end]
+        for index, values in zip(indexes, ratings):
+            race = index[start:end]
+            if np is not None:
+                values[race] += race_deltas(values[race], race_positions)
+            else:
+                deltas = race_deltas([values[i] for i in race], race_positions)
+                for i, delta in zip(race, deltas):
+                    values[i] += delta
+    return ratings
+
+
+def recompute_ratings():
+    """
+    Пересчитывает рейтинги Эло всех лошадей и жокеев по всей истории.
+    Возвращает число обновленных строк по таблицам.
+    """
+    bounds, positions, indexes, owner_ids = _load_history()
+    ratings = _replay(bounds, positions, indexes, [len(ids) for ids in owner_ids])
+    updated = {}
+    with transaction.atomic():
+        for (stats_model, name), ids, values in zip(STATS_TARGETS, owner_ids, ratings):
+            stats_model.objects.exclude(elo=ELO_INITIAL).update(elo=ELO_INITIAL)
+            stats_model.objects.bulk_create(
+                [
+                    stats_model(**{f'{name}_id': owner_id}, elo=float(values[index]))
+                    for owner_id, index in ids.items()
+                ],
+                batch_size=RECOMPUTE_CHUNK_SIZE,
+                update_conflicts=True,
+                unique_fields=[name],
+                update_fields=['elo'],
+            )
+            updated[stats_model._meta.model_name] = len(ids)
+        # Рейтинг показывается в карточках и на страницах лошадей и жокеев
+        bump_version_on_commit(Horse)
+        bump_version_on_commit(Jockey)
+    return updated
@@ -0,0 +1,128 @@
+"""
+Потоковая выгрузка результатов в CSV и NDJSON с постоянным расходом памяти.
+
+iter_export - синхронный генератор для WSGI и команды выгрузки,
+aiter_export - асинхронный для ASGI: синхронный генератор ASGI-обработчик
+Django сначала собирает в список целиком.
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import Result, format_duration
+
+
+# Сколько строк забирать с сервера БД за одно обращение к курсору
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+# Колонки выгрузки: (имя в файле, путь в values())
+EXPORT_COLUMNS = (
+    ('competition_id', 'competition_id'),
+    ('competition', 'competition__name'),
+    ('start', 'competition_start'),
+    ('hippodrome', 'competition__hippodrome__name'),
+    ('position', 'position'),
+    ('horse', 'horse__name'),
+    ('jockey', 'jockey__name'),
+    ('time_result', 'time_result'),
+)
+
+
+def start_of_day(value):
+    """Начало дня value с учетом часового пояса (для фильтров по competition_start)"""
+    start = datetime.combine(value, time.min)
+    return timezone.make_aware(start) if timezone.is_naive(start) else start
+
+
+def export_queryset(date_from=None, date_to=None, hippodrome=None):
+    """
+    Проекция результатов с названиями связанных объектов.
+    Модели не создаются: строки приходят словарями из values().
+    """
+    queryset = Result.objects.all()
+    if date_from:
+        queryset = queryset.filter(competition_start__gte=start_of_day(date_from))
+    if date_to:
+        queryset = queryset.filter(competition_start__lt=start_of_day(date_to + timedelta(days=1)))
+    if hippodrome:
+        queryset = queryset.filter(competition__hippodrome=hippodrome)
+    return (
+        queryset
+        .order_by('competition_start', 'competition_id', 'position')
+        .values(*(path for _, path in EXPORT_COLUMNS))
+    )
+
+
+def _format_row(row):
+    return {
+        name: format_duration(row[path]) if name == 'time_result' else row[path]
+        for name, path in EXPORT_COLUMNS
+    }
+
+
+def iter_rows(queryset):
+    """Построчно читает выгрузку через серверный курсор"""
+    for row in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield _format_row(row)
+
+
+async def aiter_rows(queryset):
+    """Асинхронный iter_rows: в поток уходит только выборка очередной пачки"""
+    async for row in queryset.aiterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield _format_row(row)
+
+
+class _Echo:
+    """Псевдобуфер для csv.writer: возвращает записанную строку вместо хранения"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_format():
+    writer = csv.writer(_Echo())
+
+    def render(row):
+        return writer.writerow([
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in row.values()
+        ])
+    return writer.writerow([name for name, _ in EXPORT_COLUMNS]), render
+
+
+def _ndjson_format():
+    # По одному объекту JSON в строке, без заголовка
+    return None, lambda row: json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+# Формат -> функция, возвращающая (заголовок или None, функция строки -> текст)
+EXPORT_WRITERS = {
+    'csv': _csv_format,
+    'ndjson': _ndjson_format,
+}
+
+
+def iter_export(queryset, export_format):
+    """Генератор выгрузки в выбранном формате"""
+    header, render = EXPORT_WRITERS[export_format]()
+    if header is not None:
+        yield header
+    for row in iter_rows(queryset):
+        yield render(row)
+
+
+async def aiter_export(queryset, export_format):
+    """Асинхронный генератор выгрузки в выбранном формате"""
+    header, render = EXPORT_WRITERS[export_format]()
+    if header is not None:
+        yield header
+    async for row in aiter_rows(queryset):
+        yield render(row)
@@ -0,0 +1,158 @@
+"""
+Форма лошади: последние старты со скользящими показателями и статистика
+по ипподромам.
+
+Все считается одним запросом с оконными функциями по индексу истории
+лошади (horse, -competition_start, -id): скользящие среднее и лучшее время,
+среднее место, интервал между стартами (LAG) и итоги по каждому ипподрому.
+В Python попадают только последние FORM_GUIDE_RUNS стартов и по одной
+строке на ипподром, сколько бы стартов ни было у лошади.
+Результат кэшируется по лошади и сбрасывается при записи ее результатов.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Case, Count, F, IntegerField, Min, Q, RowRange, Sum, Value, When, Window
+from django.db.models.functions import Lag, RowNumber
+from django.utils import timezone
+
+from .caching import aget_versions, get_versions
+from .models import Hippodrome, Result
+from .stats import PODIUM_POSITIONS
+
+
+# Сколько последних стартов показывать
+FORM_GUIDE_RUNS = 6
+
+# По скольким стартам (включая текущий) считаются скользящие показатели
+ROLLING_RUNS = 5
+
+FORM_GUIDE_CACHE_TIMEOUT = getattr(settings, 'RACING_FORM_GUIDE_CACHE_TIMEOUT', 60 * 60 * 24)
+
+CHRONOLOGICAL = [F('competition_start').asc(), F('id').asc()]
+NEWEST_FIRST = [F('competition_start').desc(), F('id').desc()]
+
+
+def form_guide_cache_key(horse_id, version=None):
+    # Названия ипподромов входят в запись: их версия - часть ключа
+    if version is None:
+        version, = get_versions((Hippodrome,))
+    return f'racing:form_guide:{horse_id}:{version}'
+
+
+def _count_if(condition):
+    return Sum(Case(When(condition, then=Value(1)), default=Value(0), output_field=IntegerField()))
+
+
+def _form_guide_rows(horse_id):
+    rolling = RowRange(start=-(ROLLING_RUNS - 1), end=0)
+    course = [F('competition__hippodrome_id')]
+    return (
+        Result.objects.filter(horse_id=horse_id)
+        .annotate(
+            recent=Window(RowNumber(), order_by=NEWEST_FIRST),
+            course_row=Window(RowNumber(), partition_by=course, order_by=NEWEST_FIRST),
+            rolling_time=Window(Avg('time_result'), order_by=CHRONOLOGICAL, frame=rolling),
+            rolling_best_time=Window(Min('time_result'), order_by=CHRONOLOGICAL, frame=rolling),
+            rolling_position=Window(Avg('position'), order_by=CHRONOLOGICAL, frame=rolling),
+            previous_start=Window(Lag('competition_start'), order_by=CHRONOLOGICAL),
+            course_starts=Window(Count('id'), partition_by=course),
+            course_wins=Window(_count_if(Q(position=1)), partition_by=course),
+            course_podiums=Window(_count_if(Q(position__lte=PODIUM_POSITIONS)), partition_by=course),
+            course_best_time=Window(Min('time_result'), partition_by=course),
+        )
+        .filter(Q(recent__lte=FORM_GUIDE_RUNS) | Q(course_row=1))
+        .values(
+            'competition_id', 'competition__name', 'competition__date',
+            'competition__hippodrome_id', 'competition__hippodrome__name',
+            'competition_start', 'position', 'time_result',
+            'recent', 'course_row', 'rolling_time', 'rolling_best_time', 'rolling_position',
+            'previous_start', 'course_starts', 'course_wins', 'course_podiums', 'course_best_time',
+        )
+    )
+
+
+def _collect(rows):
+    runs = []
+    courses = []
+    for row in rows:
+        if row['recent'] <= FORM_GUIDE_RUNS:
+            previous = row['previous_start']
+            runs.append({
+                'competition_id': row['competition_id'],
+                'competition': row['competition__name'],
+                'date': row['competition__date'],
+                'hippodrome': row['competition__hippodrome__name'],
+                'start': row['competition_start'],
+                'position': row['position'],
+                'time_result': row['time_result'],
+                'rolling_time': row['rolling_time'],
+                'rolling_best_time': row['rolling_best_time'],
+                'rolling_position': row['rolling_position'],
+                'days_since_previous': (row['competition_start'] - previous).days if previous else None,
+            })
+        if row['course_row'] == 1:
+            courses.append({
+                'hippodrome_id': row['competition__hippodrome_id'],
+                'hippodrome': row['competition__hippodrome__name'],
+                'starts': row['course_starts'],
+                'wins': row['course_wins'],
+                'podiums': row['course_podiums'],
+                'best_time': row['course_best_time'],
+            })
+    runs.sort(key=lambda run: (run['start'], run['competition_id']), reverse=True)
+    courses.sort(key=lambda item: (-item['starts'], item['hippodrome']))
+    return {'runs': runs, 'courses': courses}
+
+
+def build_form_guide(horse_id):
+    """Считает форму лошади одним запросом"""
+    return _collect(_form_guide_rows(horse_id))
+
+
+async def abuild_form_guide(horse_id):
+    """Асинхронный build_form_guide"""
+    return _collect([row async for row in _form_guide_rows(horse_id)])
+
+
+def get_form_guide(horse_id):
+    """
+    Форма лошади из кэша. Число дней с последнего старта считается при
+    каждом обращении, поэтому не устаревает вместе с записью кэша.
+    """
+    key = form_guide_cache_key(horse_id)
+    guide = cache.get(key)
+    if guide is None:
+        guide = build_form_guide(horse_id)
+        cache.set(key, guide, FORM_GUIDE_CACHE_TIMEOUT)
+    return _with_days_since_last_run(guide)
+
+
+async def aget_form_guide(horse_id):
+    """Асинхронный get_form_guide"""
+    version, = await aget_versions((Hippodrome,))
+    key = form_guide_cache_key(horse_id, version)
+    guide = await cache.aget(key)
+    if guide is None:
+        guide = await abuild_form_guide(horse_id)
+        await cache.aset(key, guide, FORM_GUIDE_CACHE_TIMEOUT)
+    return _with_days_since_last_run(guide)
+
+
+def _with_days_since_last_run(guide):
+    runs = guide['runs']
+    days = (timezone.localdate() - timezone.localtime(runs[0]['start']).date()).days if runs else None
+    return dict(guide, days_since_last_run=days)
+
+
+def invalidate_form_guides(horse_ids):
+    """Удаляет из кэша форму указанных лошадей"""
+    keys = [form_guide_cache_key(horse_id) for horse_id in set(horse_ids)]
+    if keys:
+        cache.delete_many(keys)
+
+
+def invalidate_form_guides_on_commit(horse_ids):
+    """Сбрасывает кэш после фиксации транзакции, чтобы не закэшировать старые данные"""
+    horse_ids = list(horse_ids)
+    transaction.on_commit(lambda: invalidate_form_guides(horse_ids))
@@ -1,8 +1,40 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
-from django.db import models
+from django.urls import reverse
+from .api import API_MAX_PAGE_SIZE, API_PAGE_SIZE
+from .head_to_head import HEAD_TO_HEAD_SUBJECTS
 from .models import Hippodrome, Owner, Jockey, Horse, Competition, Result, UserProfile
+from .validation import CompetitionResults, eligible_jockeys, validate_competition_window
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    Выпадающий список, который не загружает всю таблицу: в HTML попадает
+    только выбранный вариант, остальные подгружаются с JSON-эндпоинта
+    racing:autocomplete по мере ввода.
+    """
+    
+    class Media:
+        js = ('racing/autocomplete.js',)
+    
+    def __init__(self, source, attrs=None):
+        self.source = source
+        super().__init__(attrs)
+    
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-autocomplete-url'] = reverse('autocomplete', args=[self.source])
+        return context
+    
+    def optgroups(self, name, value, attrs=None):
+        selected = [v for v in value if v not in (None, '')]
+        options = [self.create_option(name, '', '---------', not selected, 0)]
+        queryset = getattr(self.choices, 'queryset', None)
+        if selected and queryset is not None:
+            for index, obj in enumerate(queryset.filter(pk__in=selected), start=1):
+                options.append(self.create_option(name, obj.pk, str(obj), True, index))
+        return [(None, options, 0)]
 
 
 class HippodromeForm(forms.ModelForm):
@@ -76,7 +108,7 @@ class HorseForm(forms.ModelForm):
             'name': forms.TextInput(attrs={'class': 'form-control'}),
             'gender': forms.Select(attrs={'class': 'form-control'}),
             'age': forms.NumberInput(attrs={'class': 'form-control'}),
-            'owner': forms.Select(attrs={'class': 'form-control'}),
+            'owner': AutocompleteSelect('owner', attrs={'class': 'form-control'}),
         }
 
 
@@ -126,124 +158,27 @@ class ResultForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         # Показываем только жокеев, которые не связаны с удаленными пользователями
         # или связаны с активными пользователями-жокеями
-        self.fields['jockey'].queryset = Jockey.objects.filter(
-            models.Q(userprofile__isnull=True) | 
-            models.Q(userprofile__isnull=False, userprofile__role='jockey')
-        )
+        self.fields['jockey'].queryset = eligible_jockeys()
+        self.fields['competition'].queryset = Competition.objects.select_related('hippodrome')
     
     def clean(self):
         cleaned_data = super().clean()
         competition = cleaned_data.get('competition')
         horse = cleaned_data.get('horse')
         position = cleaned_data.get('position')
+        time_result = cleaned_data.get('time_result')
         
         if competition:
-            from datetime import datetime
-            from django.utils import timezone
-            
-            # Создаем datetime объект из даты и времени соревнования
-            competition_datetime = datetime.combine(competition.date, competition.time)
-            
-            # Проверяем, что соревнование не в будущем (более чем на 1 год)
-            from datetime import timedelta
-            max_future_date = timezone.now().replace(tzinfo=None) + timedelta(days=365)
-            if competition_datetime > max_future_date:
-                raise forms.ValidationError(
-                    'Нельзя добавлять результаты для соревнований, запланированных более чем на год вперед.'
-                )
-            
-            # Проверяем, что соревнование не слишком далеко в прошлом (более 10 лет)
-            min_past_date = timezone.now().replace(tzinfo=None) - timedelta(days=3650)
-            if competition_datetime < min_past_date:
-                raise forms.ValidationError(
-                    'Нельзя добавлять результаты для соревнований, которые прошли более 10 лет назад.'
-                )
-        
-        # Проверяем дублирование лошади в соревновании
-        if competition and horse:
-            existing_horse_result = Result.objects.filter(
-                competition=competition, 
-                horse=horse
-            ).exclude(pk=self.instance.pk if self.instance else None)
-            
-            if existing_horse_result.exists():
-                raise forms.ValidationError(
-                    f'Лошадь "{horse.name}" уже участвует в этом соревновании.'
-                )
-        
-        # Проверяем дублирование места в соревновании
-        if competition and position:
-            existing_position_result = Result.objects.filter(
-                competition=competition, 
-                position=position
-            ).exclude(pk=self.instance.pk if self.instance else None)
+            validate_competition_window(competition)
             
-            if existing_position_result.exists():
-                raise forms.ValidationError(
-                    f'Место {position} уже занято в этом соревновании.'
-                )
-        
-        # Общая логическая проверка: время для позиции должно согласовываться с соседями
-        time_result = cleaned_data.get('time_result')
-        if competition and position and time_result is not None:
-            # Есть ли вообще другие результаты? Если нет — проверку не выполняем
-            any_other = Result.objects.filter(competition=competition).exclude(
-                pk=self.instance.pk if self.instance else None
-            ).exists()
-            if any_other:
-                # Унифицированно преобразуем введённое значение к timedelta
-                from datetime import timedelta
-                from django.utils.dateparse import parse_duration
-                import re
-
-                def to_timedelta(value):
-                    if isinstance(value, timedelta):
-                        return value
-                    if isinstance(value, str):
-                        std = parse_duration(value)
-                        if std is not None:
-                            return std
-                        m = re.match(r'^(?:(?P<h>\d{1,2}):)?(?P<m>\d{1,2}):(?P<s>\d{1,2})(?:[\.,](?P<ms>\d{1,6}))?$', value.strip())
-                        if not m:
-                            return None
-                        hours = int(m.group('h') or 0)
-                        minutes = int(m.group('m'))
-                        seconds = int(m.group('s'))
-                        frac = m.group('ms') or '0'
-                        if len(frac) > 6:
-                            frac = frac[:6]
-                        microseconds = int(frac.ljust(6, '0'))
-                        return timedelta(hours=hours, minutes=minutes, seconds=seconds, microseconds=microseconds)
-                    return None
-
-                parsed_time = to_timedelta(time_result)
-                if parsed_time is None:
-                    raise forms.ValidationError('Некорректный формат времени. Используйте MM:SS.mmm')
-                cleaned_data['time_result'] = parsed_time
-
-                # Ищем ближайшего соседа с меньшей позицией
-                lower_neighbor = Result.objects.filter(
-                    competition=competition,
-                    position__lt=position
-                ).order_by('-position').first()
-
-                # Ищем ближайшего соседа с большей позицией
-                upper_neighbor = Result.objects.filter(
-                    competition=competition,
-                    position__gt=position
-                ).order_by('position').first()
-
-                # Проверяем нижнюю границу (не лучше чем сосед с лучшей позицией)
-                if lower_neighbor and parsed_time < lower_neighbor.time_result:
-                    raise forms.ValidationError(
-                        f'Время для места {position} не может быть меньше времени для места {lower_neighbor.position}.'
-                    )
-
-                # Проверяем верхнюю границу (не хуже чем сосед с худшей позицией)
-                if upper_neighbor and parsed_time > upper_neighbor.time_result:
-                    raise forms.ValidationError(
-                        f'Время для места {position} не может быть больше времени для места {upper_neighbor.position}.'
-                    )
+            # Все правила проверяются в памяти по одной выборке результатов состязания
+            existing = CompetitionResults.load(competition)
+            time_result = existing.validate(
+                horse, position, time_result,
+                exclude_pk=self.instance.pk if self.instance else None
+            )
+            if time_result is not None:
+                cleaned_data['time_result'] = time_result
         
         return cleaned_data
     
@@ -251,14 +186,98 @@ class ResultForm(forms.ModelForm):
         model = Result
         fields = ['competition', 'horse', 'jockey', 'position', 'time_result']
         widgets = {
-            'competition': forms.Select(attrs={'class': 'form-control'}),
-            'horse': forms.Select(attrs={'class': 'form-control'}),
-            'jockey': forms.Select(attrs={'class': 'form-control'}),
+            'competition': AutocompleteSelect('competition', attrs={'class': 'form-control'}),
+            'horse': AutocompleteSelect('horse', attrs={'class': 'form-control'}),
+            'jockey': AutocompleteSelect('jockey', attrs={'class': 'form-control'}),
             'position': forms.NumberInput(attrs={'class': 'form-control', 'min': 1}),
             'time_result': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'MM:SS.mmm'}),
         }
 
 
+class ResultImportForm(forms.Form):
+    """Загрузка итогового протокола состязания"""
+    competition = forms.ModelChoiceField(
+        queryset=Competition.objects.select_related('hippodrome'),
+        widget=AutocompleteSelect('competition', attrs={'class': 'form-control'}),
+        label='Состязание'
+    )
+    file = forms.FileField(
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.json'}),
+        label='Файл протокола (CSV или JSON)'
+    )
+
+
+class ResultExportForm(forms.Form):
+    """Параметры выгрузки результатов"""
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('ndjson', 'NDJSON'),
+    ]
+    
+    format = forms.ChoiceField(choices=FORMAT_CHOICES, required=False)
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+    hippodrome = forms.ModelChoiceField(queryset=Hippodrome.objects.all(), required=False)
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from = cleaned_data.get('date_from')
+        date_to = cleaned_data.get('date_to')
+        if date_from and date_to and date_from > date_to:
+            raise forms.ValidationError('Начало периода не может быть позже его окончания.')
+        if not cleaned_data.get('format'):
+            cleaned_data['format'] = 'csv'
+        return cleaned_data
+
+
+class ApiQueryForm(forms.Form):
+    """Параметры запроса к JSON API"""
+    FILTERS = ('hippodrome', 'date_from', 'date_to', 'horse', 'jockey')
+    
+    after = forms.CharField(required=False)
+    limit = forms.IntegerField(required=False, min_value=1, max_value=API_MAX_PAGE_SIZE)
+    hippodrome = forms.IntegerField(required=False, min_value=1)
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+    horse = forms.IntegerField(required=False, min_value=1)
+    jockey = forms.IntegerField(required=False, min_value=1)
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from = cleaned_data.get('date_from')
+        date_to = cleaned_data.get('date_to')
+        if date_from and date_to and date_from > date_to:
+            raise forms.ValidationError('Начало периода не может быть позже его окончания.')
+        if not cleaned_data.get('limit'):
+            cleaned_data['limit'] = API_PAGE_SIZE
+        return cleaned_data
+    
+    def filters(self):
+        """Значения фильтров (None - фильтр не задан)"""
+        return {name: self.cleaned_data.get(name) for name in self.FILTERS}
+
+
+class HeadToHeadForm(forms.Form):
+    """Выбор двух лошадей или двух жокеев для сравнения личных встреч"""
+    
+    def __init__(self, subject, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        queryset = HEAD_TO_HEAD_SUBJECTS[subject].objects.all()
+        for name in ('first', 'second'):
+            self.fields[name] = forms.ModelChoiceField(
+                queryset=queryset,
+                widget=AutocompleteSelect(subject, attrs={'class': 'form-control'}),
+            )
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        first = cleaned_data.get('first')
+        second = cleaned_data.get('second')
+        if first and second and first.pk == second.pk:
+            raise forms.ValidationError('Выберите двух разных участников.')
+        return cleaned_data
+
+
 class UserRegistrationForm(UserCreationForm):
     email = forms.EmailField(required=True, widget=forms.EmailInput(attrs={'class': 'form-control'}))
     first_name = forms.CharField(max_length=30, required=True, widget=forms.TextInput(attrs={'class': 'form-control'}))
@@ -303,11 +322,14 @@ class UserRegistrationForm(UserCreationForm):
         user.last_name = self.cleaned_data['last_name']
         if commit:
             user.save()
-            # Все новые пользователи автоматически получают роль "Пользователь"
-            user_profile = UserProfile.objects.create(
+            # Все новые пользователи автоматически получают роль "Пользователь".
+            # Сигнал post_save у User создаст профиль только если его нет здесь
+            UserProfile.objects.update_or_create(
                 user=user,
-                role='user',  # Фиксированная роль "Пользователь"
-                phone=self.cleaned_data['phone'],
-                address=self.cleaned_data['address']
+                defaults={
+                    'role': 'user',  # Фиксированная роль "Пользователь"
+                    'phone': self.cleaned_data['phone'],
+                    'address': self.cleaned_data['address'],
+                }
             )
         return user
@@ -0,0 +1,98 @@
+"""
+Личные встречи двух лошадей или двух жокеев.
+
+Общие состязания находятся самосоединением Result по competition_id:
+строки первого участника берутся по индексу истории (horse|jockey,
+-competition_start, -id), строка соперника в каждом состязании - по
+индексу (competition, horse|jockey).
+Ответ кэшируется по паре участников и версиям моделей, поэтому
+популярные пары не пересчитываются до следующей записи результатов.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import F, FilteredRelation, Q
+
+from .caching import VIEW_CACHE_TIMEOUT, get_versions
+from .models import Competition, Hippodrome, Horse, Jockey, Result
+
+
+# Раздел -> модель участника
+HEAD_TO_HEAD_SUBJECTS = {
+    'horse': Horse,
+    'jockey': Jockey,
+}
+
+
+def _versions(subject):
+    models = (Result, Competition, Hippodrome, HEAD_TO_HEAD_SUBJECTS[subject])
+    return '.'.join(str(version) for version in get_versions(models))
+
+
+def build_head_to_head(subject, first_id, second_id):
+    """Общие состязания пары от новых к старым одним запросом"""
+    rival = f'competition__result__{subject}_id'
+    rows = (
+        Result.objects.filter(**{f'{subject}_id': first_id})
+        .annotate(rival=FilteredRelation('competition__result', condition=Q(**{rival: second_id})))
+        .filter(rival__isnull=False)
+        .annotate(
+            competition_name=F('competition__name'),
+            date=F('competition__date'),
+            hippodrome=F('competition__hippodrome__name'),
+            rival_position=F('rival__position'),
+            rival_time=F('rival__time_result'),
+        )
+        .order_by('-competition_start', '-id')
+        .values(
+            'competition_id', 'competition_name', 'date', 'hippodrome',
+            'position', 'time_result', 'rival_position', 'rival_time',
+        )
+    )
+    return [
+        {
+            'competition_id': row['competition_id'],
+            'competition': row['competition_name'],
+            'date': row['date'],
+            'hippodrome': row['hippodrome'],
+            'first_position': row['position'],
+            'second_position': row['rival_position'],
+            'first_time': row['time_result'],
+            'second_time': row['rival_time'],
+        }
+        for row in rows
+    ]
+
+
+def _swap(race):
+    return dict(
+        race,
+        first_position=race['second_position'], second_position=race['first_position'],
+        first_time=race['second_time'], second_time=race['first_time'],
+    )
+
+
+def get_head_to_head(subject, first_id, second_id):
+    """
+    Личные встречи first против second: {'races', 'meetings', 'first_ahead',
+    'second_ahead', 'average_gap'}. gap - на сколько first быстрее second
+    (отрицательный - медленнее). Пары (a, b) и (b, a) делят одну запись кэша.
+    """
+    low, high = sorted((first_id, second_id))
+    key = f'racing:head_to_head:{subject}:{low}:{high}:{_versions(subject)}'
+    races = cache.get(key)
+    if races is None:
+        races = build_head_to_head(subject, low, high)
+        cache.set(key, races, VIEW_CACHE_TIMEOUT)
+    if first_id != low:
+        races = [_swap(race) for race in races]
+
+    races = [dict(race, gap=race['second_time'] - race['first_time']) for race in races]
+    meetings = len(races)
+    return {
+        'races': races,
+        'meetings': meetings,
+        'first_ahead': sum(race['first_position'] < race['second_position'] for race in races),
+        'second_ahead': sum(race['second_position'] < race['first_position'] for race in races),
+        'average_gap': sum((race['gap'] for race in races), timedelta()) / meetings if races else None,
+    }
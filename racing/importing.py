@@ -0,0 +1,167 @@
+"""
+Массовый импорт итогового протокола состязания (CSV / JSON)
+"""
+import csv
+import io
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+
+from . import counters, elo, rankings, standings, stats
+from .caching import bump_version_on_commit
+from .form_guide import invalidate_form_guides_on_commit
+from .leaderboard import invalidate_leaderboards
+from .models import Competition, Horse, Result
+from .validation import (
+    CompetitionResults, eligible_jockeys, parse_time_result, validate_competition_window
+)
+
+
+# Обязательные колонки протокола
+IMPORT_FIELDS = ('position', 'horse', 'jockey', 'time_result')
+
+
+class ResultImportError(ValueError):
+    """Протокол не прошел проверку; errors - список сообщений по строкам"""
+
+    def __init__(self, errors):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+def parse_rows(content, filename=''):
+    """
+    Разбирает протокол из CSV или JSON (определяется по расширению файла
+    или по первому символу). Возвращает список словарей с колонками IMPORT_FIELDS.
+    """
+    if isinstance(content, bytes):
+        content = content.decode('utf-8-sig')
+    is_json = filename.lower().endswith('.json') or content.lstrip()[:1] in ('[', '{')
+    try:
+        if is_json:
+            data = json.loads(content)
+            rows = data.get('results', []) if isinstance(data, dict) else data
+        else:
+            rows = list(csv.DictReader(io.StringIO(content)))
+    except (ValueError, csv.Error) as exc:
+        raise ResultImportError([f'Не удалось разобрать файл: {exc}'])
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise ResultImportError(['Ожидается список строк протокола.'])
+    if not rows:
+        raise ResultImportError(['Протокол пуст.'])
+    missing = sorted({field for row in rows for field in IMPORT_FIELDS if field not in row})
+    if missing:
+        raise ResultImportError([f'Нет колонок: {", ".join(missing)}'])
+    # В JSON значения могут оказаться списками или объектами: по ним нельзя искать
+    errors = [
+        f'Строка {number}: значение "{field}" должно быть строкой или числом.'
+        for number, row in enumerate(rows, start=1)
+        for field in IMPORT_FIELDS
+        if isinstance(row[field], bool) or not isinstance(row[field], (str, int, float))
+    ]
+    if errors:
+        raise ResultImportError(errors)
+    return rows
+
+
+def _resolve(queryset, references):
+    """
+    Находит объекты по ID или точному имени одним запросом.
+    Возвращает словарь ссылка -> объект (None, если не найден или имя неоднозначно).
+    """
+    ids = {str(ref).strip() for ref in references if str(ref).strip().isdigit()}
+    names = {str(ref).strip() for ref in references} - ids
+    objects = queryset.filter(Q(pk__in=ids) | Q(name__in=names))
+    by_id = {}
+    by_name = {}
+    for obj in objects:
+        by_id[str(obj.pk)] = obj
+        by_name.setdefault(obj.name, []).append(obj)
+    resolved = {}
+    for ref in references:
+        key = str(ref).strip()
+        if key in ids:
+            resolved[ref] = by_id.get(key)
+        else:
+            matches = by_name.get(key, [])
+            resolved[ref] = matches[0] if len(matches) == 1 else None
+    return resolved
+
+
+def import_results(competition, rows):
+    """
+    Проверяет весь протокол в памяти по правилам ResultForm и записывает его
+    одним bulk_create в одной транзакции. При любой ошибке ничего не пишется.
+    Возвращает список созданных результатов.
+    """
+    errors = []
+    try:
+        validate_competition_window(competition)
+    except ValidationError as exc:
+        raise ResultImportError(exc.messages)
+
+    horses = _resolve(Horse.objects.all(), [row['horse'] for row in rows])
+    jockeys = _resolve(eligible_jockeys(), [row['jockey'] for row in rows])
+
+    with transaction.atomic():
+        # Блокируем состязание, чтобы параллельный ввод не нарушил проверки
+        Competition.objects.select_for_update().filter(pk=competition.pk).first()
+        existing = CompetitionResults.load(competition)
+        start = competition.get_start()
+        to_create = []
+
+        for number, row in enumerate(rows, start=1):
+            horse = horses.get(row['horse'])
+            jockey = jockeys.get(row['jockey'])
+            if horse is None:
+                errors.append(f'Строка {number}: лошадь "{row["horse"]}" не найдена или неоднозначна.')
+                continue
+            if jockey is None:
+                errors.append(f'Строка {number}: жокей "{row["jockey"]}" не найден или неоднозначен.')
+                continue
+            try:
+                position = int(row['position'])
+                if position < 1:
+                    raise ValueError(position)
+            except (TypeError, ValueError):
+                errors.append(f'Строка {number}: некорректное место "{row["position"]}".')
+                continue
+            time_result = parse_time_result(row['time_result'])
+            if time_result is None:
+                errors.append(f'Строка {number}: некорректный формат времени. Используйте MM:SS.mmm')
+                continue
+            try:
+                existing.validate(horse, position, time_result)
+            except ValidationError as exc:
+                errors.extend(f'Строка {number}: {message}' for message in exc.messages)
+                continue
+            existing.add(position, horse.pk, time_result)
+            to_create.append(Result(
+                competition=competition,
+                horse=horse,
+                jockey=jockey,
+                position=position,
+                time_result=time_result,
+                competition_start=start,
+            ))
+
+        if errors:
+            raise ResultImportError(errors)
+
+        # bulk_create не вызывает сигналы: статистику и кэш обновляем явно
+        created = Result.objects.bulk_create(to_create)
+        counters.increment(Result, len(created))
+        horse_ids = [result.horse_id for result in created]
+        jockey_ids = [result.jockey_id for result in created]
+        stats.refresh_stats(horse_ids=horse_ids, jockey_ids=jockey_ids)
+        transaction.on_commit(lambda: invalidate_leaderboards([competition.pk]))
+        # Рейтинги пересчитываются после фиксации, не удерживая блокировку состязания
+        transaction.on_commit(lambda: rankings.refresh_rankings(horse_ids, jockey_ids))
+        standings.refresh_standings_on_commit()
+        invalidate_form_guides_on_commit(horse_ids)
+        result_ids = [result.pk for result in created]
+        transaction.on_commit(lambda: elo.apply_results(competition.pk, result_ids))
+        bump_version_on_commit(Result)
+    return created
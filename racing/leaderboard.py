@@ -0,0 +1,88 @@
+"""
+Кэш отрисованных таблиц результатов состязаний
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .models import Competition, Result
+
+
+# Время жизни записи кэша; None - хранить до явной инвалидации
+LEADERBOARD_CACHE_TIMEOUT = getattr(settings, 'RACING_LEADERBOARD_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def leaderboard_cache_key(competition_id):
+    """Ключ кэша таблицы результатов состязания"""
+    return f'racing:leaderboard:{competition_id}'
+
+
+def _results_query(competition_id):
+    return (
+        Result.objects.filter(competition_id=competition_id)
+        .select_related('horse', 'jockey')
+        .order_by('position')
+    )
+
+
+def _leaderboard_entry(competition, results):
+    html = render_to_string('racing/includes/leaderboard.html', {
+        'competition': competition,
+        'results': results,
+    })
+    return {'competition': competition, 'html': html}
+
+
+def build_leaderboard(competition_id):
+    """
+    Строит запись кэша для состязания: объект состязания (с ипподромом)
+    и готовый HTML таблицы результатов. Выполняет два запроса.
+    """
+    competition = get_object_or_404(
+        Competition.objects.select_related('hippodrome'),
+        id=competition_id
+    )
+    return _leaderboard_entry(competition, _results_query(competition_id))
+
+
+async def abuild_leaderboard(competition_id):
+    """Асинхронный build_leaderboard: результаты читаются до отрисовки шаблона"""
+    try:
+        competition = await Competition.objects.select_related('hippodrome').aget(id=competition_id)
+    except Competition.DoesNotExist:
+        raise Http404('Состязание не найдено')
+    results = [result async for result in _results_query(competition_id)]
+    return _leaderboard_entry(competition, results)
+
+
+def get_leaderboard(competition_id):
+    """
+    Возвращает (competition, html) таблицы результатов.
+    При попадании в кэш обращений к базе данных нет.
+    """
+    key = leaderboard_cache_key(competition_id)
+    entry = cache.get(key)
+    if entry is None:
+        entry = build_leaderboard(competition_id)
+        cache.set(key, entry, LEADERBOARD_CACHE_TIMEOUT)
+    return entry['competition'], mark_safe(entry['html'])
+
+
+async def aget_leaderboard(competition_id):
+    """Асинхронный get_leaderboard"""
+    key = leaderboard_cache_key(competition_id)
+    entry = await cache.aget(key)
+    if entry is None:
+        entry = await abuild_leaderboard(competition_id)
+        await cache.aset(key, entry, LEADERBOARD_CACHE_TIMEOUT)
+    return entry['competition'], mark_safe(entry['html'])
+
+
+def invalidate_leaderboards(competition_ids):
+    """Удаляет из кэша таблицы результатов указанных состязаний"""
+    keys = [leaderboard_cache_key(competition_id) for competition_id in set(competition_ids)]
+    if keys:
+        cache.delete_many(keys)
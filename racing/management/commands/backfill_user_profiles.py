@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from racing.profiles import BACKFILL_BATCH_SIZE, backfill_profiles
+
+
+class Command(BaseCommand):
+    help = 'Создает недостающие профили пользователей и профили жокеев'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BACKFILL_BATCH_SIZE,
+            help='Сколько профилей создавать за одну вставку',
+        )
+
+    def handle(self, *args, **options):
+        profiles, jockeys = backfill_profiles(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано профилей: {profiles}, профилей жокеев: {jockeys}'
+        ))
@@ -0,0 +1,66 @@
+import time as timer
+from datetime import date, time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from racing.forms import ResultForm
+from racing.models import Competition, Hippodrome, Horse, Jockey, Owner, Result
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время и число запросов ResultForm.is_valid для разного размера поля. '
+        'Синтетические данные создаются в транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='2,10,40,100', help='Размеры поля через запятую')
+        parser.add_argument('--repeat', type=int, default=50, help='Повторов на каждый размер')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        try:
+            with transaction.atomic():
+                self._run(sizes, options['repeat'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, sizes, repeat):
+        hippodrome = Hippodrome.objects.create(name='Benchmark', address='-')
+        owner = Owner.objects.create(name='Benchmark', address='-', phone='+79990000000')
+        jockey = Jockey.objects.create(name='Benchmark', address='-', age=30, rating=5)
+        horse = Horse.objects.create(name='Benchmark', gender='M', age=5, owner=owner)
+        self.stdout.write('field_size  queries  ms_per_clean')
+        for size in sizes:
+            competition = Competition.objects.create(
+                hippodrome=hippodrome, date=date.today() - timedelta(days=1), time=time(14, 0)
+            )
+            for position in range(1, size + 1):
+                Result.objects.create(
+                    competition=competition,
+                    horse=Horse.objects.create(name=f'Runner {position}', gender='M', age=5, owner=owner),
+                    jockey=jockey,
+                    position=position * 2,
+                    time_result=timedelta(minutes=2, seconds=position),
+                )
+            data = {
+                'competition': competition.id,
+                'horse': horse.id,
+                'jockey': jockey.id,
+                'position': size + 1,
+                'time_result': f'02:{size // 2:02d}.500',
+            }
+            with CaptureQueriesContext(connection) as queries:
+                ResultForm(data=data).is_valid()
+            started = timer.perf_counter()
+            for _ in range(repeat):
+                ResultForm(data=data).is_valid()
+            elapsed = (timer.perf_counter() - started) * 1000 / repeat
+            self.stdout.write(f'{size:>10}  {len(queries.captured_queries):>7}  {elapsed:>12.3f}')
@@ -0,0 +1,130 @@
+import http.client
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from racing.server import INTERFACES
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _request(port, path):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    try:
+        connection.request('GET', path)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+
+def _client(port, path, duration):
+    """Один клиент: запросы подряд до конца замера; (успешные, ошибки, задержки в мс)"""
+    ok = errors = 0
+    latencies = []
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            status = _request(port, path)
+        except OSError:
+            status = None
+        latencies.append((time.perf_counter() - started) * 1000)
+        if status == 200:
+            ok += 1
+        else:
+            errors += 1
+    return ok, errors, latencies
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест serve: для каждого числа рабочих процессов запускает сервер '
+        'на свободном порту и замеряет пропускную способность и задержки страницы'
+    )
+
+    def add_arguments(self, parser):
+        cores = os.cpu_count() or 1
+        default_workers = sorted({1, max(1, cores // 2), cores})
+        parser.add_argument(
+            '--workers', default=','.join(map(str, default_workers)),
+            help='Числа рабочих процессов через запятую (по умолчанию до числа ядер)',
+        )
+        parser.add_argument('--interface', choices=INTERFACES, default='asgi', help='Интерфейс приложения')
+        parser.add_argument('--path', default='/', help='Запрашиваемая страница')
+        parser.add_argument('--clients', type=int, default=cores * 4, help='Одновременных клиентов (процессов)')
+        parser.add_argument('--duration', type=float, default=10.0, help='Длительность замера в секундах')
+        parser.add_argument('--warmup', type=int, default=20, help='Запросов прогрева перед замером')
+
+    def handle(self, *args, **options):
+        try:
+            worker_counts = [int(count) for count in options['workers'].split(',')]
+        except ValueError:
+            raise CommandError('--workers: числа через запятую')
+        self.stdout.write(f'ядер: {os.cpu_count()}, клиентов: {options["clients"]}, страница: {options["path"]}')
+        self.stdout.write('workers     req/s  speedup   p50_ms   p99_ms  errors')
+        baseline = None
+        for workers in worker_counts:
+            ok, errors, latencies = self._measure(workers, options)
+            throughput = ok / options['duration']
+            baseline = baseline or throughput
+            self.stdout.write(
+                f'{workers:>7}  {throughput:>8.1f}  {throughput / baseline if baseline else 0:>7.2f}'
+                f'  {_percentile(latencies, 0.5):>7.1f}  {_percentile(latencies, 0.99):>7.1f}  {errors:>6}'
+            )
+
+    def _measure(self, workers, options):
+        port = _free_port()
+        server = subprocess.Popen(
+            [
+                sys.executable, str(settings.BASE_DIR / 'manage.py'), 'serve', f'127.0.0.1:{port}',
+                '--interface', options['interface'], '--workers', str(workers),
+                '--max-requests', '0', '--nostatic',
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            self._wait_ready(server, port, options['path'])
+            for _ in range(options['warmup']):
+                _request(port, options['path'])
+            with ProcessPoolExecutor(max_workers=options['clients']) as pool:
+                futures = [
+                    pool.submit(_client, port, options['path'], options['duration'])
+                    for _ in range(options['clients'])
+                ]
+                results = [future.result() for future in futures]
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait()
+        latencies = [latency for _, _, client_latencies in results for latency in client_latencies]
+        return sum(ok for ok, _, _ in results), sum(errors for _, errors, _ in results), latencies
+
+    def _wait_ready(self, server, port, path, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'Сервер завершился с кодом {server.returncode}')
+            try:
+                _request(port, path)
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError('Сервер не ответил за отведенное время')
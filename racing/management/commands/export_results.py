@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from racing.export import export_queryset, iter_export
+from racing.forms import ResultExportForm
+
+
+class Command(BaseCommand):
+    help = 'Потоковая выгрузка результатов в CSV или NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', default='csv', help='csv или ndjson')
+        parser.add_argument('--date-from', help='Начало периода, ГГГГ-ММ-ДД')
+        parser.add_argument('--date-to', help='Конец периода включительно, ГГГГ-ММ-ДД')
+        parser.add_argument('--hippodrome', help='ID ипподрома')
+        parser.add_argument('--output', help='Файл для записи (по умолчанию stdout)')
+
+    def handle(self, *args, **options):
+        form = ResultExportForm({
+            'format': options['format'],
+            'date_from': options['date_from'],
+            'date_to': options['date_to'],
+            'hippodrome': options['hippodrome'],
+        })
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+
+        queryset = export_queryset(
+            date_from=form.cleaned_data['date_from'],
+            date_to=form.cleaned_data['date_to'],
+            hippodrome=form.cleaned_data['hippodrome'],
+        )
+        chunks = iter_export(queryset, form.cleaned_data['format'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
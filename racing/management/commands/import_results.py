@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from racing.importing import ResultImportError, import_results, parse_rows
+from racing.models import Competition
+
+
+class Command(BaseCommand):
+    help = 'Импортирует итоговый протокол состязания из CSV или JSON одним пакетом'
+
+    def add_arguments(self, parser):
+        parser.add_argument('competition_id', type=int, help='ID состязания')
+        parser.add_argument('path', help='Путь к файлу протокола')
+
+    def handle(self, *args, **options):
+        try:
+            competition = Competition.objects.get(pk=options['competition_id'])
+        except Competition.DoesNotExist:
+            raise CommandError(f'Состязание {options["competition_id"]} не найдено')
+
+        with open(options['path'], 'rb') as source:
+            content = source.read()
+        try:
+            created = import_results(competition, parse_rows(content, options['path']))
+        except ResultImportError as exc:
+            raise CommandError('\n'.join(exc.errors))
+        self.stdout.write(self.style.SUCCESS(f'Импортировано результатов: {len(created)}'))
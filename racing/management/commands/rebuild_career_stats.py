@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from racing.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает статистику карьеры лошадей и жокеев по таблице результатов'
+
+    def handle(self, *args, **options):
+        created = rebuild_stats()
+        for model_name, count in created.items():
+            self.stdout.write(self.style.SUCCESS(f'{model_name}: {count} записей'))
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from racing.elo import np, recompute_ratings
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинги Эло лошадей и жокеев по всей истории результатов'
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        updated = recompute_ratings()
+        for model_name, count in updated.items():
+            self.stdout.write(self.style.SUCCESS(f'{model_name}: {count} записей'))
+        engine = 'NumPy' if np is not None else 'Python'
+        self.stdout.write(f'Готово за {time.monotonic() - started:.1f} с ({engine})')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from racing.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Сверяет счетчики главной страницы с таблицами и исправляет расхождения'
+
+    def handle(self, *args, **options):
+        fixed = reconcile()
+        if not fixed:
+            self.stdout.write(self.style.SUCCESS('Расхождений нет'))
+            return
+        for name, (old, new) in fixed.items():
+            self.stdout.write(self.style.WARNING(f'{name}: {old} -> {new}'))
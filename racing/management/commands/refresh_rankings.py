@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from racing.rankings import WINDOW_KINDS, rebuild_rankings
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает рейтинги лошадей и жокеев по таблице результатов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window',
+            action='append',
+            choices=list(WINDOW_KINDS),
+            help='Вид окна для пересборки; можно указать несколько раз (по умолчанию все)',
+        )
+
+    def handle(self, *args, **options):
+        created = rebuild_rankings(options['window'])
+        for model_name, count in created.items():
+            self.stdout.write(self.style.SUCCESS(f'{model_name}: {count} записей'))
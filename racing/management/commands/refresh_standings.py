@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from racing.models import Standing
+from racing.standings import refresh_standings
+
+
+class Command(BaseCommand):
+    help = 'Обновляет турнирные таблицы лошадей и жокеев за все время и по сезонам'
+
+    def handle(self, *args, **options):
+        refresh_standings()
+        self.stdout.write(self.style.SUCCESS(f'Строк в турнирных таблицах: {Standing.objects.count()}'))
@@ -0,0 +1,111 @@
+import os
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+
+from racing.server import INTERFACES, PreforkServer
+
+
+def get_application(interface, static):
+    """WSGI- или ASGI-приложение проекта; static - раздавать статику как runserver"""
+    if interface == 'asgi':
+        from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
+        from racing_club.asgi import application
+        return ASGIStaticFilesHandler(application) if static else application
+    from django.contrib.staticfiles.handlers import StaticFilesHandler
+    from racing_club.wsgi import application
+    return StaticFilesHandler(application) if static else application
+
+
+def parse_addrport(addrport):
+    """'host:port', 'port' или '[ipv6]:port' -> (host, port)"""
+    host, _, port = addrport.rpartition(':')
+    if not port.isdigit() or int(port) > 65535:
+        raise CommandError(f'Некорректный адрес: {addrport}')
+    return host.strip('[]') or '127.0.0.1', int(port)
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает приложение (WSGI или ASGI) под предфорковым пулом рабочих процессов: '
+        'без автоперезагрузки, с перезапуском процессов после заданного числа запросов '
+        'и плавной остановкой по SIGTERM'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('addrport', nargs='?', default='127.0.0.1:8000', help='Адрес и порт, например 0.0.0.0:8000')
+        parser.add_argument('--interface', choices=INTERFACES, default='asgi', help='Интерфейс приложения')
+        parser.add_argument(
+            '--workers', type=int, default=getattr(settings, 'RACING_SERVE_WORKERS', os.cpu_count() or 1),
+            help='Число рабочих процессов',
+        )
+        parser.add_argument(
+            '--max-requests', type=int, default=getattr(settings, 'RACING_SERVE_MAX_REQUESTS', 1000),
+            help='Перезапускать рабочий процесс после стольких запросов (0 - никогда)',
+        )
+        parser.add_argument(
+            '--max-requests-jitter', type=int, default=getattr(settings, 'RACING_SERVE_MAX_REQUESTS_JITTER', 100),
+            help='Случайная добавка к max-requests, чтобы процессы не перезапускались одновременно',
+        )
+        parser.add_argument(
+            '--graceful-timeout', type=int, default=getattr(settings, 'RACING_SERVE_GRACEFUL_TIMEOUT', 30),
+            help='Секунд на завершение начатых запросов при остановке',
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=getattr(settings, 'RACING_SERVE_TIMEOUT', 30),
+            help='Секунд на чтение запроса: молчащее соединение закрывается',
+        )
+        parser.add_argument(
+            '--max-body-size', type=int,
+            default=getattr(settings, 'RACING_SERVE_MAX_BODY_SIZE', 10 * 1024 * 1024),
+            help='Наибольший размер тела запроса в байтах; больше - ответ 413 (0 - без ограничения)',
+        )
+        parser.add_argument('--backlog', type=int, default=2048, help='Очередь соединений слушающего сокета')
+        parser.add_argument(
+            '--nostatic', action='store_false', dest='use_static',
+            help='Не раздавать статические файлы (по умолчанию раздаются при DEBUG, как в runserver)',
+        )
+
+    def handle(self, *args, **options):
+        host, port = parse_addrport(options['addrport'])
+        workers = options['workers']
+        if workers < 1:
+            raise CommandError('Нужен хотя бы один рабочий процесс')
+        if options['max_requests'] < 0 or options['max_requests_jitter'] < 0:
+            raise CommandError('max-requests и max-requests-jitter не могут быть отрицательными')
+        if options['timeout'] <= 0 or options['max_body_size'] < 0:
+            raise CommandError('timeout должен быть положительным, max-body-size - неотрицательным')
+        if workers > 1 and isinstance(caches['default'], LocMemCache):
+            # Версии моделей в кэше у каждого процесса свои: запись в одном не сбросит страницы в других
+            self.stderr.write(self.style.WARNING(
+                'Кэш locmem не общий для рабочих процессов: задайте RACING_CACHE_BACKEND=file или memcached'
+            ))
+
+        interface = options['interface']
+        static = options['use_static'] and settings.DEBUG and 'django.contrib.staticfiles' in settings.INSTALLED_APPS
+        server = PreforkServer(
+            get_application(interface, static),
+            interface,
+            host,
+            port,
+            workers,
+            max_requests=options['max_requests'],
+            max_requests_jitter=options['max_requests_jitter'],
+            graceful_timeout=options['graceful_timeout'],
+            backlog=options['backlog'],
+            timeout=options['timeout'],
+            max_body_size=options['max_body_size'] or None,
+        )
+        try:
+            bound_host, bound_port = server.bind()
+        except OSError as exc:
+            raise CommandError(f'Не удалось открыть {host}:{port}: {exc}')
+        self.stdout.write(
+            f'{interface.upper()} на http://{bound_host}:{bound_port}/, рабочих процессов: {workers}, '
+            f'мастер {os.getpid()}'
+        )
+        self.stdout.flush()
+        server.run()
+        self.stdout.write('Сервер остановлен')
@@ -0,0 +1,57 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from .models import UserProfile
+
+
+def get_user_profile(request):
+    """
+    Профиль текущего пользователя или None (анонимный пользователь или
+    профиль не создан). Вычисляется один раз и сохраняется в request.user_profile.
+    """
+    if not hasattr(request, 'user_profile'):
+        user_profile = None
+        if request.user.is_authenticated:
+            try:
+                user_profile = request.user.userprofile
+            except UserProfile.DoesNotExist:
+                pass
+        request.user_profile = user_profile
+    return request.user_profile
+
+
+async def aget_user_profile(request):
+    """
+    Асинхронный get_user_profile. Сессия, пользователь и профиль загружаются
+    одним переходом в поток; после этого request.user и request.user_profile
+    можно читать из асинхронного кода без обращений к базе.
+    """
+    if not hasattr(request, 'user_profile'):
+        await sync_to_async(get_user_profile)(request)
+    return request.user_profile
+
+
+class UserProfileMiddleware:
+    """
+    Определяет профиль пользователя один раз за запрос.
+    Декораторы доступа и контекстный процессор читают его из request.user_profile.
+    Должен стоять после AuthenticationMiddleware.
+    Под ASGI работает асинхронно, чтобы асинхронные представления
+    не переключались в поток на каждом слое middleware.
+    """
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        get_user_profile(request)
+        return self.get_response(request)
+    
+    async def __acall__(self, request):
+        await aget_user_profile(request)
+        return await self.get_response(request)
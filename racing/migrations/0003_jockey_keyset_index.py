@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('racing', '0002_competition_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jockey',
+            index=models.Index(fields=['name', 'id'], name='jockey_keyset_idx'),
+        ),
+    ]
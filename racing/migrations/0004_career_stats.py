@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('racing', '0003_jockey_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HorseStats',
+            fields=[
+                ('starts', models.PositiveIntegerField(default=0, verbose_name='Стартов')),
+                ('wins', models.PositiveIntegerField(default=0, verbose_name='Побед')),
+                ('podiums', models.PositiveIntegerField(default=0, verbose_name='Призовых мест')),
+                ('best_time', models.DurationField(blank=True, null=True, verbose_name='Лучшее время')),
+                ('horse', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='racing.horse', verbose_name='Лошадь')),
+            ],
+            options={
+                'verbose_name': 'Статистика лошади',
+                'verbose_name_plural': 'Статистика лошадей',
+            },
+        ),
+        migrations.CreateModel(
+            name='JockeyStats',
+            fields=[
+                ('starts', models.PositiveIntegerField(default=0, verbose_name='Стартов')),
+                ('wins', models.PositiveIntegerField(default=0, verbose_name='Побед')),
+                ('podiums', models.PositiveIntegerField(default=0, verbose_name='Призовых мест')),
+                ('best_time', models.DurationField(blank=True, null=True, verbose_name='Лучшее время')),
+                ('jockey', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='racing.jockey', verbose_name='Жокей')),
+            ],
+            options={
+                'verbose_name': 'Статистика жокея',
+                'verbose_name_plural': 'Статистика жокеев',
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('racing', '0004_career_stats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='result',
+            name='competition',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='racing.competition', verbose_name='Состязание'),
+        ),
+        migrations.AlterField(
+            model_name='result',
+            name='horse',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='racing.horse', verbose_name='Лошадь'),
+        ),
+        migrations.AlterField(
+            model_name='result',
+            name='jockey',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='racing.jockey', verbose_name='Жокей'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['horse', 'competition'], name='result_horse_comp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['jockey', 'competition'], name='result_jockey_comp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['competition', 'horse'], name='result_comp_horse_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('racing', '0005_result_access_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='result',
+            name='competition_start',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='Начало состязания'),
+        ),
+    ]
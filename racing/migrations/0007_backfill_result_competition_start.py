@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from django.db import migrations, transaction
+from django.utils import timezone
+
+
+# Сколько состязаний обрабатывается в одной транзакции
+BATCH_SIZE = 500
+
+
+def backfill_competition_start(apps, schema_editor):
+    """Заполняет Result.competition_start пачками, каждая пачка в своей транзакции"""
+    Competition = apps.get_model('racing', 'Competition')
+    Result = apps.get_model('racing', 'Result')
+    db_alias = schema_editor.connection.alias
+
+    last_id = 0
+    while True:
+        batch = list(
+            Competition.objects.using(db_alias)
+            .filter(id__gt=last_id)
+            .order_by('id')
+            .values_list('id', 'date', 'time')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        with transaction.atomic(using=db_alias):
+            for competition_id, date, time in batch:
+                start = datetime.combine(date, time)
+                if timezone.is_naive(start):
+                    start = timezone.make_aware(start)
+                Result.objects.using(db_alias).filter(
+                    competition_id=competition_id,
+                    competition_start__isnull=True
+                ).update(competition_start=start)
+        last_id = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    # Пачки фиксируются по отдельности, чтобы не держать блокировки на всей таблице
+    atomic = False
+
+    dependencies = [
+        ('racing', '0006_result_competition_start'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_competition_start, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('racing', '0007_backfill_result_competition_start'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='result',
+            name='result_horse_comp_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='result',
+            name='result_jockey_comp_idx',
+        ),
+        migrations.AlterField(
+            model_name='result',
+            name='competition_start',
+            field=models.DateTimeField(editable=False, verbose_name='Начало состязания'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['horse', '-competition_start', '-id'], name='result_horse_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['jockey', '-competition_start', '-id'], name='result_jockey_start_idx'),
+        ),
+    ]
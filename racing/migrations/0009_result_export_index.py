@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('racing', '0008_result_start_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['competition_start', 'competition', 'position'], name='result_export_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:13
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('racing', '0009_result_export_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='horse',
+            index=models.Index(django.db.models.functions.text.Lower('name'), models.F('id'), name='horse_name_prefix_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jockey',
+            index=models.Index(django.db.models.functions.text.Lower('name'), models.F('id'), name='jockey_name_prefix_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='owner',
+            index=models.Index(django.db.models.functions.text.Lower('name'), models.F('id'), name='owner_name_prefix_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:21
+
+from django.db import migrations, models
+
+
+# Название счетчика -> модель
+COUNTED_MODELS = {
+    'horses': 'Horse',
+    'jockeys': 'Jockey',
+    'competitions': 'Competition',
+}
+
+
+def seed_counters(apps, schema_editor):
+    """Заполняет счетчики текущим числом записей"""
+    SiteCounter = apps.get_model('racing', 'SiteCounter')
+    db_alias = schema_editor.connection.alias
+    SiteCounter.objects.using(db_alias).bulk_create([
+        SiteCounter(name=name, value=apps.get_model('racing', model).objects.using(db_alias).count())
+        for name, model in COUNTED_MODELS.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('racing', '0010_name_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteCounter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='Название')),
+                ('value', models.BigIntegerField(default=0, verbose_name='Значение')),
+            ],
+            options={
+                'verbose_name': 'Счетчик',
+                'verbose_name_plural': 'Счетчики',
+            },
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+from django.db import migrations
+
+
+# Таблица -> номер вида объекта в rowid racing_search (см. racing.search.SEARCH_KINDS)
+SEARCH_TABLES = {
+    'racing_horse': 0,
+    'racing_jockey': 1,
+    'racing_owner': 2,
+    'racing_competition': 3,
+}
+KINDS = len(SEARCH_TABLES)
+
+
+def _sqlite_forward(cursor):
+    cursor.execute("CREATE VIRTUAL TABLE racing_search USING fts5(name, tokenize='trigram')")
+    for table, kind in SEARCH_TABLES.items():
+        rowid = f'{{row}}.id * {KINDS} + {kind}'
+        cursor.execute(
+            f"INSERT INTO racing_search (rowid, name) "
+            f"SELECT {rowid.format(row=table)}, COALESCE(name, '') FROM {table}"
+        )
+        cursor.execute(
+            f'CREATE TRIGGER {table}_search_insert AFTER INSERT ON {table} BEGIN '
+            f"INSERT INTO racing_search (rowid, name) VALUES ({rowid.format(row='new')}, COALESCE(new.name, '')); "
+            f'END'
+        )
+        cursor.execute(
+            f'CREATE TRIGGER {table}_search_update AFTER UPDATE OF name ON {table} BEGIN '
+            f"UPDATE racing_search SET name = COALESCE(new.name, '') WHERE rowid = {rowid.format(row='new')}; "
+            f'END'
+        )
+        cursor.execute(
+            f'CREATE TRIGGER {table}_search_delete AFTER DELETE ON {table} BEGIN '
+            f"DELETE FROM racing_search WHERE rowid = {rowid.format(row='old')}; "
+            f'END'
+        )
+
+
+def _sqlite_backward(cursor):
+    for table in SEARCH_TABLES:
+        for action in ('insert', 'update', 'delete'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {table}_search_{action}')
+    cursor.execute('DROP TABLE IF EXISTS racing_search')
+
+
+def create_search(apps, schema_editor):
+    """
+    Таблица FTS5 с триггерами (SQLite). Триграммные GIN-индексы PostgreSQL
+    описаны в Meta.indexes моделей и создаются миграцией 0019_search_trigram_indexes.
+    """
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            _sqlite_forward(cursor)
+
+
+def drop_search(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            _sqlite_backward(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('racing', '0012_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search, drop_search),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('racing', '0013_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JockeyRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(max_length=32, verbose_name='Окно')),
+                ('starts', models.PositiveIntegerField(default=0, verbose_name='Стартов')),
+                ('wins', models.PositiveIntegerField(default=0, verbose_name='Побед')),
+                ('podiums', models.PositiveIntegerField(default=0, verbose_name='Призовых мест')),
+                ('win_rate', models.FloatField(default=0, verbose_name='Процент побед')),
+                ('average_position', models.FloatField(default=0, verbose_name='Среднее место')),
+                ('rank', models.PositiveIntegerField(default=0, verbose_name='Место в рейтинге')),
+                ('jockey', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='racing.jockey', verbose_name='Жокей')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг жокея',
+                'verbose_name_plural': 'Рейтинги жокеев',
+                'indexes': [models.Index(fields=['window', 'rank', 'id'], name='jockey_ranking_page_idx')],
+                'unique_together': {('jockey', 'window')},
+            },
+        ),
+        migrations.CreateModel(
+            name='HorseRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(max_length=32, verbose_name='Окно')),
+                ('starts', models.PositiveIntegerField(default=0, verbose_name='Стартов')),
+                ('wins', models.PositiveIntegerField(default=0, verbose_name='Побед')),
+                ('podiums', models.PositiveIntegerField(default=0, verbose_name='Призовых мест')),
+                ('win_rate', models.FloatField(default=0, verbose_name='Процент побед')),
+                ('average_position', models.FloatField(default=0, verbose_name='Среднее место')),
+                ('rank', models.PositiveIntegerField(default=0, verbose_name='Место в рейтинге')),
+                ('horse', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='racing.horse', verbose_name='Лошадь')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг лошади',
+                'verbose_name_plural': 'Рейтинги лошадей',
+                'indexes': [models.Index(fields=['window', 'rank', 'id'], name='horse_ranking_page_idx')],
+                'unique_together': {('horse', 'window')},
+            },
+        ),
+    ]
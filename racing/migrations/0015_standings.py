@@ -0,0 +1,124 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:43
+
+from django.db import migrations, models
+
+
+# Места, которые считаются призовыми (racing.stats.PODIUM_POSITIONS)
+PODIUM_POSITIONS = 3
+
+# Год сезона из даты состязания; 0 - строки «за все время»
+SEASON_SQL = {
+    'postgresql': 'CAST(EXTRACT(YEAR FROM c.date) AS integer)',
+    'sqlite': "CAST(strftime('%Y', c.date) AS integer)",
+}
+
+BRANCH_SQL = """
+    SELECT '{subject}' AS subject, p.id AS subject_id, p.name AS name, {season} AS season,
+           r.position AS position, r.time_result AS time_result
+    FROM racing_result r
+    JOIN racing_competition c ON c.id = r.competition_id
+    JOIN racing_{subject} p ON p.id = r.{subject}_id
+"""
+
+STANDING_SQL = """
+SELECT
+    ROW_NUMBER() OVER (ORDER BY s.subject, s.season, s.subject_id) AS id,
+    s.subject, s.subject_id, s.name, s.season,
+    COUNT(*) AS starts,
+    SUM(CASE WHEN s.position = 1 THEN 1 ELSE 0 END) AS wins,
+    SUM(CASE WHEN s.position <= {podium} THEN 1 ELSE 0 END) AS podiums,
+    MIN(s.time_result) AS best_time,
+    RANK() OVER (
+        PARTITION BY s.subject, s.season
+        ORDER BY SUM(CASE WHEN s.position = 1 THEN 1 ELSE 0 END) DESC,
+                 SUM(CASE WHEN s.position <= {podium} THEN 1 ELSE 0 END) DESC,
+                 COUNT(*) DESC
+    ) AS rank
+FROM ({branches}) s
+GROUP BY s.subject, s.subject_id, s.name, s.season
+"""
+
+
+def standing_sql(vendor):
+    """Запрос турнирных таблиц: все время и сезоны для лошадей и жокеев"""
+    branches = ' UNION ALL '.join(
+        BRANCH_SQL.format(subject=subject, season=season)
+        for subject in ('horse', 'jockey')
+        for season in ('0', SEASON_SQL[vendor])
+    )
+    return STANDING_SQL.format(podium=PODIUM_POSITIONS, branches=branches)
+
+
+def create_standings(apps, schema_editor):
+    """
+    PostgreSQL: материализованное представление с уникальным индексом,
+    нужным для REFRESH MATERIALIZED VIEW CONCURRENTLY.
+    SQLite: обычное представление-источник и таблица, которую
+    racing.standings перезаполняет из него в одной транзакции.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor not in SEASON_SQL:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == 'postgresql':
+            cursor.execute(f'CREATE MATERIALIZED VIEW racing_standing AS {standing_sql(vendor)}')
+        else:
+            cursor.execute(f'CREATE VIEW racing_standing_source AS {standing_sql(vendor)}')
+            cursor.execute(
+                'CREATE TABLE racing_standing ('
+                'id integer NOT NULL PRIMARY KEY, '
+                'subject varchar(10) NOT NULL, '
+                'subject_id integer NOT NULL, '
+                'name varchar(100) NOT NULL, '
+                'season integer NOT NULL, '
+                'starts integer NOT NULL, '
+                'wins integer NOT NULL, '
+                'podiums integer NOT NULL, '
+                'best_time bigint NULL, '
+                'rank integer NOT NULL)'
+            )
+            cursor.execute('INSERT INTO racing_standing SELECT * FROM racing_standing_source')
+        cursor.execute('CREATE UNIQUE INDEX racing_standing_key ON racing_standing (subject, season, subject_id)')
+        cursor.execute('CREATE INDEX racing_standing_rank ON racing_standing (subject, season, rank)')
+
+
+def drop_standings(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == 'postgresql':
+            cursor.execute('DROP MATERIALIZED VIEW IF EXISTS racing_standing')
+        elif vendor == 'sqlite':
+            cursor.execute('DROP TABLE IF EXISTS racing_standing')
+            cursor.execute('DROP VIEW IF EXISTS racing_standing_source')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('racing', '0014_rankings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Standing',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('subject', models.CharField(choices=[('horse', 'Лошадь'), ('jockey', 'Жокей')], max_length=10, verbose_name='Участник')),
+                ('subject_id', models.IntegerField(verbose_name='Идентификатор участника')),
+                ('name', models.CharField(max_length=100, verbose_name='Имя')),
+                ('season', models.IntegerField(verbose_name='Сезон')),
+                ('starts', models.IntegerField(verbose_name='Стартов')),
+                ('wins', models.IntegerField(verbose_name='Побед')),
+                ('podiums', models.IntegerField(verbose_name='Призовых мест')),
+                ('best_time', models.DurationField(blank=True, null=True, verbose_name='Лучшее время')),
+                ('rank', models.IntegerField(verbose_name='Место')),
+            ],
+            options={
+                'verbose_name': 'Строка турнирной таблицы',
+                'verbose_name_plural': 'Турнирные таблицы',
+                'db_table': 'racing_standing',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_standings, drop_standings),
+    ]
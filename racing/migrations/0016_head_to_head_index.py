@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('racing', '0015_standings'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['competition', 'jockey'], name='result_comp_jockey_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('racing', '0016_head_to_head_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='horsestats',
+            name='elo',
+            field=models.FloatField(default=1500, verbose_name='Рейтинг Эло'),
+        ),
+        migrations.AddField(
+            model_name='jockeystats',
+            name='elo',
+            field=models.FloatField(default=1500, verbose_name='Рейтинг Эло'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-17 08:24
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('racing', '0017_elo_ratings'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='competition',
+            index=models.Index(django.db.models.functions.comparison.Coalesce(django.db.models.functions.comparison.NullIf(django.db.models.functions.text.Lower('name'), models.Value('')), models.Value('состязание')), models.F('id'), name='competition_title_prefix_idx'),
+        ),
+    ]
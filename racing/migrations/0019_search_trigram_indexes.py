@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-17 08:47
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+import racing.models
+
+
+# Индексы с теми же именами, созданные вручную прежней версией 0013_search
+LEGACY_INDEXES = (
+    'racing_competition_name_trgm',
+    'racing_horse_name_trgm',
+    'racing_jockey_name_trgm',
+    'racing_owner_name_trgm',
+)
+
+
+def drop_legacy_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in LEGACY_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(name)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('racing', '0018_competition_title_prefix_index'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(drop_legacy_indexes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='competition',
+            index=racing.models.TrigramIndex(name='racing_competition_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='horse',
+            index=racing.models.TrigramIndex(name='racing_horse_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='jockey',
+            index=racing.models.TrigramIndex(name='racing_jockey_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='owner',
+            index=racing.models.TrigramIndex(name='racing_owner_name_trgm'),
+        ),
+    ]
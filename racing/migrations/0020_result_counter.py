@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 08:52
+
+from django.db import migrations
+
+
+def seed_result_counter(apps, schema_editor):
+    """Заполняет счетчик результатов текущим числом записей"""
+    SiteCounter = apps.get_model('racing', 'SiteCounter')
+    Result = apps.get_model('racing', 'Result')
+    db_alias = schema_editor.connection.alias
+    SiteCounter.objects.using(db_alias).update_or_create(
+        name='results', defaults={'value': Result.objects.using(db_alias).count()}
+    )
+
+
+def drop_result_counter(apps, schema_editor):
+    SiteCounter = apps.get_model('racing', 'SiteCounter')
+    SiteCounter.objects.using(schema_editor.connection.alias).filter(name='results').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('racing', '0019_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_result_counter, drop_result_counter),
+    ]
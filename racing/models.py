@@ -1,10 +1,49 @@
-from django.db import models
+from datetime import datetime
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce, Lower, NullIf
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
 from django.db.models.signals import post_delete
 from django.dispatch import receiver
 
 
+def format_duration(value):
+    """Возвращает длительность в формате MM:SS.mmm"""
+    if not value:
+        return "00:00.000"
+    
+    total_seconds = int(value.total_seconds())
+    minutes = total_seconds // 60
+    seconds = total_seconds % 60
+    milliseconds = int(value.microseconds / 1000)
+    
+    return f"{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+
+
+class TrigramIndex(GinIndex):
+    """
+    Триграммный GIN-индекс по name для поиска (racing.search) в PostgreSQL.
+    На других СУБД, где поиск идет по таблице FTS5, создается обычный
+    индекс с тем же именем: GIN и gin_trgm_ops там не поддерживаются.
+    """
+
+    def __init__(self, *, name):
+        super().__init__(fields=['name'], name=name, opclasses=['gin_trgm_ops'])
+
+    def deconstruct(self):
+        path, args, kwargs = super().deconstruct()
+        return path, args, {'name': kwargs['name']}
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return models.Index(fields=['name'], name=self.name).create_sql(model, schema_editor, **kwargs)
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+
 class UserProfile(models.Model):
     ROLE_CHOICES = [
         ('user', 'Пользователь'),
@@ -56,6 +95,7 @@ class Hippodrome(models.Model):
     capacity = models.PositiveIntegerField(verbose_name="Вместимость", null=True, blank=True)
     description = models.TextField(verbose_name="Описание", blank=True, null=True)
     is_active = models.BooleanField(default=True, verbose_name="Активен")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Изменен")
 
     class Meta:
         verbose_name = "Ипподром"
@@ -70,10 +110,17 @@ class Owner(models.Model):
     name = models.CharField(max_length=100, verbose_name="Имя")
     address = models.TextField(verbose_name="Адрес")
     phone = models.CharField(max_length=20, verbose_name="Телефон")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Изменен")
 
     class Meta:
         verbose_name = "Владелец"
         verbose_name_plural = "Владельцы"
+        indexes = [
+            # Поиск по префиксу имени для автодополнения
+            models.Index(Lower('name'), 'id', name='owner_name_prefix_idx'),
+            # Поиск по части имени
+            TrigramIndex(name='racing_owner_name_trgm'),
+        ]
 
     def __str__(self):
         return self.name
@@ -87,10 +134,18 @@ class Jockey(models.Model):
         verbose_name="Рейтинг",
         validators=[MinValueValidator(1), MaxValueValidator(10)]
     )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Изменен")
 
     class Meta:
         verbose_name = "Жокей"
         verbose_name_plural = "Жокеи"
+        indexes = [
+            # Ключ курсорной пагинации списка жокеев
+            models.Index(fields=['name', 'id'], name='jockey_keyset_idx'),
+            # Поиск по префиксу имени для автодополнения
+            models.Index(Lower('name'), 'id', name='jockey_name_prefix_idx'),
+            TrigramIndex(name='racing_jockey_name_trgm'),
+        ]
 
     def __str__(self):
         return self.name
@@ -106,58 +161,273 @@ class Horse(models.Model):
     gender = models.CharField(max_length=1, choices=GENDER_CHOICES, verbose_name="Пол")
     age = models.PositiveIntegerField(verbose_name="Возраст")
     owner = models.ForeignKey(Owner, on_delete=models.CASCADE, verbose_name="Владелец")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Изменен")
 
     class Meta:
         verbose_name = "Лошадь"
         verbose_name_plural = "Лошади"
+        indexes = [
+            # Поиск по префиксу имени для автодополнения
+            models.Index(Lower('name'), 'id', name='horse_name_prefix_idx'),
+            TrigramIndex(name='racing_horse_name_trgm'),
+        ]
 
     def __str__(self):
         return self.name
 
 
+# Начало подписи состязания в нижнем регистре: безымянные подписываются
+# как "Состязание", и автодополнение ищет по тому, что видит пользователь
+COMPETITION_TITLE = Coalesce(NullIf(Lower('name'), Value('')), Value('состязание'))
+
+
 class Competition(models.Model):
     date = models.DateField(verbose_name="Дата")
     time = models.TimeField(verbose_name="Время")
     hippodrome = models.ForeignKey(Hippodrome, on_delete=models.CASCADE, verbose_name="Ипподром")
     name = models.CharField(max_length=200, blank=True, null=True, verbose_name="Название состязания")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Изменен")
 
     class Meta:
         verbose_name = "Состязание"
         verbose_name_plural = "Состязания"
         ordering = ['-date', '-time']
+        indexes = [
+            # Ключ курсорной пагинации списка состязаний
+            models.Index(fields=['-date', '-time', '-id'], name='competition_keyset_idx'),
+            # Поиск по префиксу подписи для автодополнения
+            models.Index(COMPETITION_TITLE, 'id', name='competition_title_prefix_idx'),
+            TrigramIndex(name='racing_competition_name_trgm'),
+        ]
 
     def __str__(self):
         if self.name:
             return f"{self.name} - {self.hippodrome.name} ({self.date})"
         return f"Состязание - {self.hippodrome.name} ({self.date})"
 
+    def get_start(self):
+        """Возвращает дату и время начала состязания с учетом часового пояса"""
+        start = datetime.combine(self.date, self.time)
+        if settings.USE_TZ and timezone.is_naive(start):
+            start = timezone.make_aware(start)
+        return start
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if not adding:
+                # При переносе состязания обновляем копию времени начала в результатах
+                start = self.get_start()
+                # update() не заполняет auto_now: время изменения проставляем явно
+                self.result_set.exclude(competition_start=start).update(
+                    competition_start=start, updated_at=timezone.now()
+                )
+
 
 class Result(models.Model):
-    competition = models.ForeignKey(Competition, on_delete=models.CASCADE, verbose_name="Состязание")
-    horse = models.ForeignKey(Horse, on_delete=models.CASCADE, verbose_name="Лошадь")
-    jockey = models.ForeignKey(Jockey, on_delete=models.CASCADE, verbose_name="Жокей")
+    # Отдельные индексы по внешним ключам не нужны: их покрывают составные индексы в Meta
+    competition = models.ForeignKey(Competition, on_delete=models.CASCADE, db_index=False, verbose_name="Состязание")
+    horse = models.ForeignKey(Horse, on_delete=models.CASCADE, db_index=False, verbose_name="Лошадь")
+    jockey = models.ForeignKey(Jockey, on_delete=models.CASCADE, db_index=False, verbose_name="Жокей")
     position = models.PositiveIntegerField(verbose_name="Занятое место")
     time_result = models.DurationField(verbose_name="Показанное время")
+    # Копия даты и времени начала состязания: история сортируется без соединения с Competition
+    competition_start = models.DateTimeField(editable=False, verbose_name="Начало состязания")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Изменен")
 
     class Meta:
         verbose_name = "Результат"
         verbose_name_plural = "Результаты"
         unique_together = ['competition', 'position']  # Одно место в состязании может занять только одна лошадь
+        indexes = [
+            # История выступлений лошади и жокея в порядке от новых к старым
+            models.Index(fields=['horse', '-competition_start', '-id'], name='result_horse_start_idx'),
+            models.Index(fields=['jockey', '-competition_start', '-id'], name='result_jockey_start_idx'),
+            # Потоковая выгрузка результатов в хронологическом порядке
+            models.Index(fields=['competition_start', 'competition', 'position'], name='result_export_idx'),
+            # Проверка участия лошади в состязании (ResultForm.clean) и поиск соперника
+            # в личных встречах лошадей и жокеев (racing.head_to_head)
+            models.Index(fields=['competition', 'horse'], name='result_comp_horse_idx'),
+            models.Index(fields=['competition', 'jockey'], name='result_comp_jockey_idx'),
+        ]
 
     def __str__(self):
         return f"{self.competition} - {self.horse} ({self.position} место)"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Состязание, для которого загружено competition_start
+        instance._loaded_competition_id = instance.__dict__.get('competition_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Время начала берем из состязания только для новой записи или при смене
+        # состязания: перенос состязания обновляет результаты в Competition.save
+        if self.competition_start is None or self.competition_id != getattr(self, '_loaded_competition_id', None):
+            self.competition_start = self.competition.get_start()
+        # Сигналы post_save обновляют статистику; выполняем их в одной транзакции с записью
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        self._loaded_competition_id = self.competition_id
+    
     def get_formatted_time(self):
         """Возвращает время в формате MM:SS.mmm"""
-        if not self.time_result:
-            return "00:00.000"
-        
-        total_seconds = int(self.time_result.total_seconds())
-        minutes = total_seconds // 60
-        seconds = total_seconds % 60
-        milliseconds = int(self.time_result.microseconds / 1000)
-        
-        return f"{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+        return format_duration(self.time_result)
+
+
+class CareerStats(models.Model):
+    """Денормализованная статистика карьеры, обновляется при записи Result"""
+    starts = models.PositiveIntegerField(default=0, verbose_name="Стартов")
+    wins = models.PositiveIntegerField(default=0, verbose_name="Побед")
+    podiums = models.PositiveIntegerField(default=0, verbose_name="Призовых мест")
+    best_time = models.DurationField(blank=True, null=True, verbose_name="Лучшее время")
+    # Рассчитывается модулем elo по порядку финиша, в отличие от Jockey.rating
+    elo = models.FloatField(default=1500, verbose_name="Рейтинг Эло")
+
+    class Meta:
+        abstract = True
+
+    def get_formatted_best_time(self):
+        """Возвращает лучшее время в формате MM:SS.mmm"""
+        if self.best_time is None:
+            return "—"
+        return format_duration(self.best_time)
+
+
+class HorseStats(CareerStats):
+    horse = models.OneToOneField(
+        Horse, on_delete=models.CASCADE, primary_key=True,
+        related_name='stats', verbose_name="Лошадь"
+    )
+
+    class Meta:
+        verbose_name = "Статистика лошади"
+        verbose_name_plural = "Статистика лошадей"
+
+    def __str__(self):
+        return f"{self.horse_id}: {self.wins}/{self.starts}"
+
+
+class JockeyStats(CareerStats):
+    jockey = models.OneToOneField(
+        Jockey, on_delete=models.CASCADE, primary_key=True,
+        related_name='stats', verbose_name="Жокей"
+    )
+
+    class Meta:
+        verbose_name = "Статистика жокея"
+        verbose_name_plural = "Статистика жокеев"
+
+    def __str__(self):
+        return f"{self.jockey_id}: {self.wins}/{self.starts}"
+
+
+class Ranking(models.Model):
+    """
+    Строка рейтинга за окно времени: 'all', 'recent', 'season:<год>' или
+    'hippodrome:<id>'. Пересчитывается модулем rankings по Result.
+    """
+    window = models.CharField(max_length=32, verbose_name="Окно")
+    starts = models.PositiveIntegerField(default=0, verbose_name="Стартов")
+    wins = models.PositiveIntegerField(default=0, verbose_name="Побед")
+    podiums = models.PositiveIntegerField(default=0, verbose_name="Призовых мест")
+    win_rate = models.FloatField(default=0, verbose_name="Процент побед")
+    average_position = models.FloatField(default=0, verbose_name="Среднее место")
+    rank = models.PositiveIntegerField(default=0, verbose_name="Место в рейтинге")
+
+    class Meta:
+        abstract = True
+
+
+class HorseRanking(Ranking):
+    horse = models.ForeignKey(
+        Horse, on_delete=models.CASCADE, db_index=False,
+        related_name='rankings', verbose_name="Лошадь"
+    )
+
+    class Meta:
+        verbose_name = "Рейтинг лошади"
+        verbose_name_plural = "Рейтинги лошадей"
+        # Уникальный индекс начинается с лошади: по нему пересчитываются ее строки
+        unique_together = ['horse', 'window']
+        indexes = [
+            models.Index(fields=['window', 'rank', 'id'], name='horse_ranking_page_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.window}: {self.horse_id} ({self.rank})"
+
+
+class JockeyRanking(Ranking):
+    jockey = models.ForeignKey(
+        Jockey, on_delete=models.CASCADE, db_index=False,
+        related_name='rankings', verbose_name="Жокей"
+    )
+
+    class Meta:
+        verbose_name = "Рейтинг жокея"
+        verbose_name_plural = "Рейтинги жокеев"
+        unique_together = ['jockey', 'window']
+        indexes = [
+            models.Index(fields=['window', 'rank', 'id'], name='jockey_ranking_page_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.window}: {self.jockey_id} ({self.rank})"
+
+
+class Standing(models.Model):
+    """
+    Строка турнирной таблицы за все время (season = ALL_TIME_SEASON) или за сезон.
+    На PostgreSQL - материализованное представление, на SQLite - таблица
+    с тем же составом колонок; обновляется модулем standings.
+    """
+    ALL_TIME_SEASON = 0
+    SUBJECT_CHOICES = [
+        ('horse', 'Лошадь'),
+        ('jockey', 'Жокей'),
+    ]
+
+    id = models.BigIntegerField(primary_key=True)
+    subject = models.CharField(max_length=10, choices=SUBJECT_CHOICES, verbose_name="Участник")
+    subject_id = models.IntegerField(verbose_name="Идентификатор участника")
+    name = models.CharField(max_length=100, verbose_name="Имя")
+    season = models.IntegerField(verbose_name="Сезон")
+    starts = models.IntegerField(verbose_name="Стартов")
+    wins = models.IntegerField(verbose_name="Побед")
+    podiums = models.IntegerField(verbose_name="Призовых мест")
+    best_time = models.DurationField(blank=True, null=True, verbose_name="Лучшее время")
+    rank = models.IntegerField(verbose_name="Место")
+
+    class Meta:
+        managed = False
+        db_table = 'racing_standing'
+        verbose_name = "Строка турнирной таблицы"
+        verbose_name_plural = "Турнирные таблицы"
+
+    def __str__(self):
+        return f"{self.season}: {self.subject} {self.subject_id} ({self.rank})"
+
+    def get_formatted_best_time(self):
+        """Возвращает лучшее время в формате MM:SS.mmm"""
+        if self.best_time is None:
+            return "—"
+        return format_duration(self.best_time)
+
+
+class SiteCounter(models.Model):
+    """Счетчик записей для главной страницы, обновляется сигналами"""
+    name = models.CharField(max_length=50, primary_key=True, verbose_name="Название")
+    value = models.BigIntegerField(default=0, verbose_name="Значение")
+
+    class Meta:
+        verbose_name = "Счетчик"
+        verbose_name_plural = "Счетчики"
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
 
 
 @receiver(post_delete, sender=UserProfile)
@@ -0,0 +1,160 @@
+"""
+Курсорная (keyset) пагинация для списков приложения racing
+"""
+import base64
+import json
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """Курсор не удалось разобрать"""
+
+
+class KeysetPage:
+    """Страница результатов курсорной пагинации"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Пагинатор по ключу сортировки.
+
+    Вместо OFFSET строит условие «строго после/до последней показанной строки»,
+    поэтому стоимость любой страницы одинакова и не зависит от её глубины.
+    ordering — поля модели или аннотации (без NULL) с необязательным «-»;
+    последним должно идти уникальное поле, чтобы порядок был строгим.
+    Строки могут быть как объектами моделей, так и словарями из values().
+    """
+
+    def __init__(self, queryset, ordering, page_size):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.page_size = page_size
+        self._fields = [
+            (name.lstrip('-'), name.startswith('-')) for name in self.ordering
+        ]
+
+    def page(self, after=None, before=None):
+        """Возвращает страницу после курсора after или перед курсором before"""
+        queryset = self._page_queryset(after, before)
+        return self._make_page(list(queryset), after, before)
+
+    async def apage(self, after=None, before=None):
+        """Асинхронный page(): строки читаются через async for"""
+        queryset = self._page_queryset(after, before)
+        return self._make_page([row async for row in queryset], after, before)
+
+    def _page_queryset(self, after, before):
+        """Запрос page_size + 1 строк после after или перед before"""
+        if before:
+            values = self.decode_cursor(before)
+            queryset = self.queryset.filter(self._seek_filter(values, forward=False))
+            return queryset.order_by(*self._reversed_ordering())[:self.page_size + 1]
+
+        queryset = self.queryset
+        if after:
+            values = self.decode_cursor(after)
+            queryset = queryset.filter(self._seek_filter(values, forward=True))
+        return queryset.order_by(*self.ordering)[:self.page_size + 1]
+
+    def _make_page(self, rows, after, before):
+        has_more = len(rows) > self.page_size
+        if before:
+            rows = rows[:self.page_size][::-1]
+            return KeysetPage(
+                rows,
+                next_cursor=self.encode_cursor(rows[-1]) if rows else None,
+                previous_cursor=self.encode_cursor(rows[0]) if rows and has_more else None,
+            )
+
+        rows = rows[:self.page_size]
+        return KeysetPage(
+            rows,
+            next_cursor=self.encode_cursor(rows[-1]) if rows and has_more else None,
+            previous_cursor=self.encode_cursor(rows[0]) if rows and after else None,
+        )
+
+    def encode_cursor(self, obj):
+        """Кодирует значения ключа сортировки объекта в непрозрачную строку"""
+        values = [self._value(obj, name) for name, _ in self._fields]
+        raw = json.dumps([str(value) for value in values]).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Разбирает курсор обратно в значения полей сортировки"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if not isinstance(raw, list) or len(raw) != len(self._fields):
+                raise InvalidCursor(cursor)
+            return [
+                self._field(name).to_python(value)
+                for (name, _), value in zip(self._fields, raw)
+            ]
+        except InvalidCursor:
+            raise
+        except Exception as exc:
+            raise InvalidCursor(cursor) from exc
+
+    def _seek_filter(self, values, forward):
+        """
+        Строит условие (a, b, c) > (x, y, z) с учетом направлений сортировки.
+        Само ИЛИ индексом не ограничивается (SQLite объединяет несколько
+        поисков и сортирует результат), поэтому к нему добавляется
+        нестрогая граница a >= x: она задает диапазон по ведущему полю индекса.
+        """
+        first, descending = self._fields[0]
+        bound = Q(**{f'{first}__{"lte" if descending == forward else "gte"}': values[0]})
+        conditions = []
+        for index, (name, descending) in enumerate(self._fields):
+            lookup = 'lt' if descending == forward else 'gt'
+            condition = {
+                prev_name: prev_value
+                for (prev_name, _), prev_value in zip(self._fields[:index], values)
+            }
+            condition[f'{name}__{lookup}'] = values[index]
+            conditions.append(Q(**condition))
+        return bound & reduce(or_, conditions)
+
+    def _reversed_ordering(self):
+        return [name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering]
+
+    @staticmethod
+    def _value(obj, name):
+        if isinstance(obj, dict):
+            return obj[name]
+        return getattr(obj, name)
+
+    def _field(self, name):
+        """Поле модели или аннотации, по которому идет сортировка"""
+        annotation = self.queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        opts = self.queryset.model._meta
+        if name == 'pk':
+            return opts.pk
+        return opts.get_field(name)
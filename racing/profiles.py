@@ -0,0 +1,67 @@
+"""
+Создание профилей пользователей и связанных жокеев вне запросов на чтение
+"""
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .models import Jockey, UserProfile
+
+
+# Сколько профилей создавать за одну вставку при заполнении пропусков
+BACKFILL_BATCH_SIZE = 500
+
+
+def ensure_profile(user):
+    """Создает профиль с ролью по умолчанию, если его еще нет"""
+    profile, _ = UserProfile.objects.get_or_create(user=user, defaults={'role': 'user'})
+    return profile
+
+
+def provision_jockey(user_profile):
+    """
+    Создает профиль жокея для пользователя-жокея, если он не привязан.
+    Возвращает созданного жокея или None.
+    """
+    if not user_profile.is_jockey() or user_profile.jockey_id:
+        return None
+    user = user_profile.user
+    jockey = Jockey.objects.create(
+        name=f"{user.first_name} {user.last_name}".strip() or user.username,
+        address=user_profile.address or "Не указан",
+        age=25,  # Возраст по умолчанию
+        rating=5  # Рейтинг по умолчанию
+    )
+    # update() вместо save(), чтобы не вызывать post_save повторно
+    UserProfile.objects.filter(pk=user_profile.pk).update(jockey=jockey)
+    user_profile.jockey = jockey
+    return jockey
+
+
+def backfill_profiles(batch_size=BACKFILL_BATCH_SIZE):
+    """
+    Создает недостающие профили пачками и привязывает жокеев к профилям
+    с ролью жокея. Возвращает (создано профилей, создано жокеев).
+    """
+    profiles = 0
+    while True:
+        user_ids = list(
+            User.objects.filter(userprofile__isnull=True)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not user_ids:
+            break
+        with transaction.atomic():
+            created = UserProfile.objects.bulk_create(
+                [UserProfile(user_id=user_id, role='user') for user_id in user_ids],
+                ignore_conflicts=True,
+            )
+        profiles += len(created)
+
+    jockeys = 0
+    pending = UserProfile.objects.filter(role='jockey', jockey__isnull=True).select_related('user')
+    for user_profile in pending.iterator(chunk_size=batch_size):
+        with transaction.atomic():
+            if provision_jockey(user_profile):
+                jockeys += 1
+    return profiles, jockeys
@@ -0,0 +1,238 @@
+"""
+Рейтинги лошадей и жокеев за окна времени.
+
+Окна: за все время ('all'), за последние RECENT_DAYS дней ('recent'),
+по сезонам ('season:<год>') и по ипподромам ('hippodrome:<id>').
+Показатели окна считаются агрегатами по Result, место в рейтинге -
+оконной функцией RANK() по уже посчитанной таблице рейтингов. Страницы
+рейтингов читают только таблицы HorseRanking и JockeyRanking.
+
+Запись результата пересчитывает строки только своих лошади и жокея,
+после чего в затронутых окнах переранжируется только диапазон между
+старыми и новыми показателями этих участников: места выше и ниже него
+не меняются. Окно 'recent' сдвигается со
+временем, поэтому его нужно ежедневно пересобирать командой
+refresh_rankings --window recent.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Avg, Count, F, FloatField, Q, Window
+from django.db.models.functions import Cast, ExtractYear, Rank
+from django.utils import timezone
+
+from .caching import bump_version_on_commit
+from .models import Hippodrome, Result, HorseRanking, JockeyRanking
+from .stats import PODIUM_POSITIONS, REBUILD_BATCH_SIZE
+
+
+# Длина скользящего окна 'recent' в днях
+RECENT_DAYS = 90
+
+# (модель рейтинга, поле связи в Result)
+RANKING_TARGETS = (
+    (HorseRanking, 'horse'),
+    (JockeyRanking, 'jockey'),
+)
+
+# Порядок мест: победы, процент побед, призовые места, среднее место
+RANK_ORDER = (
+    F('wins').desc(),
+    F('win_rate').desc(),
+    F('podiums').desc(),
+    F('average_position').asc(),
+)
+
+# Раздел страницы рейтингов -> модель рейтинга
+RANKING_SUBJECTS = {model_field: model for model, model_field in RANKING_TARGETS}
+
+RANKING_FIELDS = ('starts', 'wins', 'podiums', 'win_rate', 'average_position')
+
+
+def _recent(queryset):
+    return queryset.filter(competition_start__gte=timezone.now() - timedelta(days=RECENT_DAYS))
+
+
+# Вид окна -> (выборка результатов, выражение ключа окна или None для единственного окна)
+WINDOW_KINDS = {
+    'all': (lambda queryset: queryset, None),
+    'recent': (_recent, None),
+    'season': (lambda queryset: queryset, ExtractYear('competition_start')),
+    'hippodrome': (lambda queryset: queryset, F('competition__hippodrome_id')),
+}
+
+
+def _kind_filter(kinds):
+    """Условие на строки рейтинга указанных видов окон"""
+    condition = Q()
+    for kind in kinds:
+        if WINDOW_KINDS[kind][1] is None:
+            condition |= Q(window=kind)
+        else:
+            condition |= Q(window__startswith=f'{kind}:')
+    return condition
+
+
+def _aggregate(field, kind, subject_ids=None):
+    """Показатели окон вида kind по Result одним агрегатным запросом"""
+    select, key = WINDOW_KINDS[kind]
+    queryset = select(Result.objects.all())
+    if subject_ids is not None:
+        queryset = queryset.filter(**{f'{field}_id__in': subject_ids})
+    group_by = [field]
+    if key is not None:
+        queryset = queryset.annotate(window_key=key)
+        group_by.append('window_key')
+    rows = (
+        queryset.values(*group_by)
+        .annotate(
+            starts=Count('id'),
+            wins=Count('id', filter=Q(position=1)),
+            podiums=Count('id', filter=Q(position__lte=PODIUM_POSITIONS)),
+            average_position=Avg('position'),
+        )
+        .annotate(win_rate=Cast(F('wins'), FloatField()) * 100 / F('starts'))
+        .order_by()
+    )
+    for row in rows:
+        row['window'] = kind if key is None else f"{kind}:{row['window_key']}"
+        yield row
+
+
+def _build(model, field, kinds, subject_ids=None):
+    for kind in kinds:
+        for row in _aggregate(field, kind, subject_ids):
+            yield model(
+                window=row['window'],
+                **{f'{field}_id': row[field]},
+                **{name: row[name] for name in RANKING_FIELDS},
+            )
+
+
+def rerank(model, windows=None):
+    """
+    Пересчитывает места в окнах оконной функцией RANK() по таблице рейтинга.
+    Записываются только строки, у которых место изменилось.
+    """
+    queryset = model.objects.all()
+    if windows is not None:
+        queryset = queryset.filter(window__in=windows)
+    changed = (
+        queryset.annotate(new_rank=Window(Rank(), partition_by=[F('window')], order_by=RANK_ORDER))
+        .exclude(rank=F('new_rank'))
+        .values_list('pk', 'new_rank')
+    )
+    updates = [model(pk=pk, rank=new_rank) for pk, new_rank in changed]
+    model.objects.bulk_update(updates, ['rank'], batch_size=REBUILD_BATCH_SIZE)
+    return len(updates)
+
+
+# Поля ключа сортировки мест в порядке RANK_ORDER
+RANK_KEY = tuple(order.expression.name for order in RANK_ORDER)
+
+
+def _sort_key(values):
+    """Ключ, по которому строка с меньшим ключом стоит в рейтинге выше"""
+    return tuple(
+        -value if order.descending else value for order, value in zip(RANK_ORDER, values)
+    )
+
+
+def _beyond(values, better):
+    """Условие на строки строго выше (better) или строго ниже показателей values"""
+    condition = Q()
+    equal = Q()
+    for order, name, value in zip(RANK_ORDER, RANK_KEY, values):
+        lookup = 'gt' if order.descending == better else 'lt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def rerank_range(model, window, top, bottom=None):
+    """
+    Пересчитывает места в окне только для строк с показателями от top до
+    bottom включительно (bottom=None - до конца окна). Строки выше
+    диапазона сохраняют места, и каждая из них выше любой строки в нем,
+    поэтому место = число строк выше диапазона + RANK() внутри диапазона.
+    """
+    rows = model.objects.filter(window=window)
+    offset = rows.filter(_beyond(top, better=True)).count()
+    rows = rows.exclude(_beyond(top, better=True))
+    if bottom is not None:
+        rows = rows.exclude(_beyond(bottom, better=False))
+    changed = [
+        model(pk=pk, rank=offset + new_rank)
+        for pk, rank, new_rank in rows.annotate(
+            new_rank=Window(Rank(), order_by=RANK_ORDER)
+        ).values_list('pk', 'rank', 'new_rank')
+        if offset + new_rank != rank
+    ]
+    model.objects.bulk_update(changed, ['rank'], batch_size=REBUILD_BATCH_SIZE)
+    return len(changed)
+
+
+def refresh_rankings(horse_ids=(), jockey_ids=()):
+    """
+    Пересчитывает рейтинги указанных лошадей и жокеев во всех окнах.
+    В каждом затронутом окне переранжируются только строки между лучшими
+    и худшими старыми и новыми показателями этих участников; если
+    участник вошел в окно или выбыл из него, сдвигается весь хвост окна.
+    """
+    with transaction.atomic():
+        for (model, field), subject_ids in zip(RANKING_TARGETS, (horse_ids, jockey_ids)):
+            subject_ids = set(subject_ids)
+            if not subject_ids:
+                continue
+            existing = model.objects.filter(**{f'{field}_id__in': subject_ids})
+            before = {}
+            for window, subject_id, *values in existing.values_list('window', f'{field}_id', *RANK_KEY):
+                before.setdefault(window, {})[subject_id] = tuple(values)
+            existing.delete()
+            created = model.objects.bulk_create(
+                _build(model, field, WINDOW_KINDS, subject_ids), batch_size=REBUILD_BATCH_SIZE
+            )
+            after = {}
+            for row in created:
+                values = tuple(getattr(row, name) for name in RANK_KEY)
+                after.setdefault(row.window, {})[getattr(row, f'{field}_id')] = values
+            for window in before.keys() | after.keys():
+                old, new = before.get(window, {}), after.get(window, {})
+                keys = sorted([*old.values(), *new.values()], key=_sort_key)
+                rerank_range(model, window, keys[0], keys[-1] if old.keys() == new.keys() else None)
+            bump_version_on_commit(model)
+
+
+def rebuild_rankings(kinds=None):
+    """
+    Пересобирает рейтинги указанных видов окон (по умолчанию всех).
+    Возвращает число созданных строк по таблицам.
+    """
+    kinds = list(kinds or WINDOW_KINDS)
+    created = {}
+    with transaction.atomic():
+        for model, field in RANKING_TARGETS:
+            model.objects.filter(_kind_filter(kinds)).delete()
+            rows = model.objects.bulk_create(_build(model, field, kinds), batch_size=REBUILD_BATCH_SIZE)
+            rerank(model, {row.window for row in rows})
+            created[model._meta.model_name] = len(rows)
+            bump_version_on_commit(model)
+    return created
+
+
+def ranking_windows(model):
+    """
+    Окна для переключателя на странице рейтинга: [(окно, подпись)].
+    Сезоны берутся из таблицы рейтинга по индексу окна, ипподромы - из справочника.
+    """
+    choices = [('all', 'За все время'), ('recent', f'За {RECENT_DAYS} дней')]
+    seasons = (
+        model.objects.filter(window__startswith='season:')
+        .values_list('window', flat=True).distinct().order_by('-window')
+    )
+    choices += [(window, f"Сезон {window.split(':', 1)[1]}") for window in seasons]
+    choices += [
+        (f'hippodrome:{pk}', name)
+        for pk, name in Hippodrome.objects.order_by('name').values_list('pk', 'name')
+    ]
+    return choices
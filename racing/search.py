@@ -0,0 +1,124 @@
+"""
+Поиск по лошадям, жокеям, владельцам и состязаниям.
+
+PostgreSQL: триграммное сходство (pg_trgm) по GIN-индексам на name (TrigramIndex в моделях).
+SQLite: виртуальная таблица FTS5 racing_search с токенизатором trigram,
+которую триггеры синхронизируют с исходными таблицами (миграция 0013).
+Для строки таблицы rowid = id * len(SEARCH_KINDS) + номер вида объекта.
+"""
+from django.db import connection
+from django.urls import reverse
+from django.db.models import Q, Value, CharField
+from django.db.models.functions import Greatest
+
+from .autocomplete import prefix_filter
+from .models import Competition, Horse, Jockey, Owner
+
+
+# Порядок видов задает их номер в rowid таблицы FTS5 - не менять
+SEARCH_KINDS = ('horse', 'jockey', 'owner', 'competition')
+
+SEARCH_MODELS = {
+    'horse': Horse,
+    'jockey': Jockey,
+    'owner': Owner,
+    'competition': Competition,
+}
+
+# Страница объекта в результатах поиска; у владельцев своей страницы нет
+SEARCH_URL_NAMES = {
+    'horse': 'horse_competitions',
+    'jockey': 'jockey_competitions',
+    'competition': 'competition_detail',
+}
+
+SEARCH_LIMIT = 20
+
+# Длина триграммы: более короткие запросы ищутся по префиксу имени
+TRIGRAM = 3
+
+
+def search(query, limit=SEARCH_LIMIT):
+    """
+    Ищет объекты по имени с учетом опечаток.
+    Возвращает до limit словарей {'kind', 'id', 'name', 'rank'}, лучшие первыми.
+    """
+    query = ' '.join(query.split())
+    if not query:
+        return []
+    if len(query) < TRIGRAM:
+        # Триграммный индекс не помогает; ищем по индексу LOWER(name)
+        return _search_prefix(query, limit)
+    if connection.vendor == 'postgresql':
+        return _search_postgres(query, limit)
+    if connection.vendor == 'sqlite':
+        return _search_sqlite(query, limit)
+    return _search_fallback(query, limit)
+
+
+def result_url(result):
+    """Ссылка на страницу найденного объекта или None"""
+    url_name = SEARCH_URL_NAMES.get(result['kind'])
+    return reverse(url_name, args=[result['id']]) if url_name else None
+
+
+def _search_postgres(query, limit):
+    from django.contrib.postgres.search import TrigramSimilarity, TrigramWordSimilarity
+
+    querysets = [
+        model.objects
+        .filter(Q(name__trigram_similar=query) | Q(name__trigram_word_similar=query))
+        .annotate(
+            kind=Value(kind, output_field=CharField()),
+            rank=Greatest(TrigramSimilarity('name', query), TrigramWordSimilarity(query, 'name')),
+        )
+        .values('kind', 'id', 'name', 'rank')
+        .order_by()
+        for kind, model in SEARCH_MODELS.items()
+    ]
+    union = querysets[0].union(*querysets[1:], all=True)
+    return list(union.order_by('-rank')[:limit])
+
+
+def _fts_query(query):
+    """
+    Запрос FTS5: любые триграммы строки поиска через OR.
+    bm25 ставит выше имена, совпавшие по большему числу триграмм,
+    поэтому опечатка в одной букве не исключает совпадение.
+    """
+    text = query.lower()
+    grams = sorted({text[i:i + TRIGRAM] for i in range(len(text) - TRIGRAM + 1)})
+    return ' OR '.join('"{}"'.format(gram.replace('"', '""')) for gram in grams)
+
+
+def _search_sqlite(query, limit):
+    sql = (
+        'SELECT rowid, name, rank FROM racing_search '
+        'WHERE racing_search MATCH %s ORDER BY rank LIMIT %s'
+    )
+    params = [_fts_query(query), limit]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    size = len(SEARCH_KINDS)
+    return [
+        # rank в FTS5 отрицательный: чем меньше, тем лучше совпадение
+        {'kind': SEARCH_KINDS[rowid % size], 'id': rowid // size, 'name': name, 'rank': -rank}
+        for rowid, name, rank in rows
+    ]
+
+
+def _search_prefix(query, limit):
+    results = []
+    for kind, model in SEARCH_MODELS.items():
+        rows = prefix_filter(model.objects.all(), query).order_by('lname', 'id').values('id', 'name')[:limit]
+        results.extend({'kind': kind, 'id': row['id'], 'name': row['name'], 'rank': 0} for row in rows)
+    return results[:limit]
+
+
+def _search_fallback(query, limit):
+    results = []
+    for kind, model in SEARCH_MODELS.items():
+        rows = model.objects.filter(name__icontains=query).order_by('name').values('id', 'name')[:limit]
+        results.extend({'kind': kind, 'id': row['id'], 'name': row['name'], 'rank': 0} for row in rows)
+    return results[:limit]
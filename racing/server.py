@@ -0,0 +1,563 @@
+"""
+Предфорковый сервер приложения для команды serve.
+
+Мастер-процесс загружает WSGI- или ASGI-приложение и открывает слушающий
+сокет до fork, поэтому рабочие процессы получают готовое приложение
+(импортированные модули, URLConf, загрузчики шаблонов) и делят его память
+с мастером по copy-on-write. Рабочие процессы принимают соединения из
+общего сокета: WSGI - по одному запросу за раз, ASGI - много соединений
+в цикле событий.
+
+Рабочий процесс завершается после max_requests запросов (плюс случайный
+сдвиг до max_requests_jitter, чтобы процессы не перезапускались разом),
+и мастер сразу запускает замену - так не накапливается память.
+SIGTERM и SIGINT останавливают сервер плавно: мастер перестает запускать
+процессы и передает SIGTERM рабочим, те перестают принимать соединения,
+дообслуживают начатые запросы и выходят. Кто не уложился в
+graceful_timeout, получает SIGKILL.
+WSGI-процесс закрывает соединение после каждого ответа (Connection: close),
+ASGI-процесс держит его открытым для следующих запросов (keep-alive).
+Медленный клиент не занимает процесс дольше timeout секунд на чтение
+запроса, а тело больше max_body_size отклоняется ответом 413 до чтения.
+"""
+import asyncio
+import logging
+import os
+import random
+import select
+import signal
+import socket
+import sys
+import time
+from http import HTTPStatus
+from urllib.parse import unquote
+
+from django.core.cache import close_caches
+from django.core.servers.basehttp import WSGIRequestHandler, WSGIServer
+from django.db import connections
+
+
+logger = logging.getLogger('racing.server')
+access_logger = logging.getLogger('django.server')
+
+INTERFACES = ('wsgi', 'asgi')
+
+# Как часто процессы проверяют флаг остановки, пока ждут соединений
+POLL_INTERVAL = 1.0
+REAP_INTERVAL = 0.1
+
+# Ограничения заголовков запроса в ASGI-процессе
+MAX_LINE = 8190
+MAX_HEADERS = 100
+
+# Ответ на тело запроса больше допустимого
+TOO_LARGE = HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+
+
+class BadRequest(Exception):
+    """Запрос не удалось разобрать"""
+
+    def __init__(self, status=HTTPStatus.BAD_REQUEST):
+        super().__init__(status.phrase)
+        self.status = status
+
+
+class PreforkServer:
+    """Мастер-процесс: держит слушающий сокет и пул рабочих процессов"""
+
+    def __init__(self, app, interface, host, port, workers, max_requests=0,
+                 max_requests_jitter=0, graceful_timeout=30, backlog=2048,
+                 timeout=30, max_body_size=None):
+        if interface not in INTERFACES:
+            raise ValueError(f'Неизвестный интерфейс: {interface}')
+        self.app = app
+        self.interface = interface
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.backlog = backlog
+        self.timeout = timeout
+        self.max_body_size = max_body_size
+        self.socket = None
+        self.children = set()
+        self.stopping = False
+
+    def bind(self):
+        """Открывает слушающий сокет; возвращает фактический (host, port)"""
+        family = socket.AF_INET6 if ':' in self.host else socket.AF_INET
+        self.socket = socket.create_server((self.host, self.port), family=family, backlog=self.backlog)
+        # Неблокирующий accept: соединение, которое забрал другой процесс, не вешает остальных
+        self.socket.setblocking(False)
+        return self.socket.getsockname()[:2]
+
+    def run(self):
+        """Запускает рабочие процессы и заменяет завершившихся до остановки"""
+        if self.socket is None:
+            self.bind()
+        # Соединения мастера с базой и кэшем не должны достаться рабочим процессам
+        connections.close_all()
+        close_caches()
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        try:
+            while not self.stopping:
+                while len(self.children) < self.workers and not self.stopping:
+                    self.spawn()
+                time.sleep(REAP_INTERVAL)
+                self.reap()
+        finally:
+            self.shutdown()
+
+    def _stop(self, signum, frame):
+        self.stopping = True
+
+    def _request_limit(self):
+        if not self.max_requests:
+            return 0
+        return self.max_requests + random.randint(0, self.max_requests_jitter)
+
+    def spawn(self):
+        """Запускает рабочий процесс"""
+        limit = self._request_limit()
+        pid = os.fork()
+        if pid:
+            self.children.add(pid)
+            return pid
+        status = 0
+        try:
+            worker_class = AsgiWorker if self.interface == 'asgi' else WsgiWorker
+            worker_class(
+                self.app, self.socket, limit, self.graceful_timeout, self.timeout, self.max_body_size
+            ).run()
+        except BaseException:
+            logger.exception('Рабочий процесс %s завершился с ошибкой', os.getpid())
+            status = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(status)
+
+    def reap(self):
+        """Забирает статусы завершившихся рабочих процессов"""
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                return
+            if not pid:
+                return
+            self.children.discard(pid)
+            code = os.waitstatus_to_exitcode(status)
+            if code:
+                logger.warning('Рабочий процесс %s завершился с кодом %s', pid, code)
+
+    def shutdown(self):
+        """Плавно останавливает рабочие процессы и закрывает сокет"""
+        self.stopping = True
+        self._signal_children(signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.children and time.monotonic() < deadline:
+            time.sleep(REAP_INTERVAL)
+            self.reap()
+        if self.children:
+            logger.warning('Не успели завершиться: %s', ', '.join(map(str, sorted(self.children))))
+            self._signal_children(signal.SIGKILL)
+            for pid in list(self.children):
+                try:
+                    os.waitpid(pid, 0)
+                except ChildProcessError:
+                    pass
+            self.children.clear()
+        if self.socket is not None:
+            self.socket.close()
+
+    def _signal_children(self, signum):
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                self.children.discard(pid)
+
+
+class Worker:
+    """Рабочий процесс: принимает соединения из общего сокета"""
+
+    def __init__(self, app, sock, max_requests, graceful_timeout, timeout=None, max_body_size=None):
+        self.app = app
+        self.socket = sock
+        self.max_requests = max_requests
+        self.graceful_timeout = graceful_timeout
+        self.timeout = timeout
+        self.max_body_size = max_body_size
+        self.handled = 0
+        self.stopping = False
+
+    def exhausted(self):
+        return bool(self.max_requests) and self.handled >= self.max_requests
+
+    def run(self):
+        raise NotImplementedError
+
+
+class RequestHandler(WSGIRequestHandler):
+    """
+    Обработчик runserver с отказом 413 по Content-Length: тело не читается,
+    иначе ServerHandler при закрытии дочитал бы его в память целиком
+    """
+
+    def handle_one_request(self):
+        try:
+            super().handle_one_request()
+        except TimeoutError:
+            # Клиент не прислал запрос за timeout секунд: соединение закрывается
+            self.close_connection = True
+
+    def parse_request(self):
+        if not super().parse_request():
+            return False
+        max_body_size = getattr(self.server, 'max_body_size', None)
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = 0
+        if max_body_size is not None and length > max_body_size:
+            self.send_error(TOO_LARGE)
+            return False
+        return True
+
+
+class WsgiWorker(Worker):
+    """
+    Синхронный рабочий процесс на WSGIServer из django.core.servers.basehttp:
+    тот же разбор запроса и журнал, что у runserver, но без потоков
+    и автоперезагрузки. Таймаут на принятом сокете ограничивает каждое
+    чтение, поэтому молчащий клиент освобождает процесс через timeout секунд.
+    """
+
+    def _stop(self, signum, frame):
+        self.stopping = True
+
+    def run(self):
+        # Прерывание с терминала получает вся группа процессов; останавливает мастер
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, self._stop)
+        host, port = self.socket.getsockname()[:2]
+        server = WSGIServer((host, port), RequestHandler, bind_and_activate=False)
+        server.socket.close()
+        server.socket = self.socket
+        server.server_name = socket.getfqdn(host)
+        server.server_port = port
+        server.setup_environ()
+        server.set_app(self.app)
+        server.max_body_size = self.max_body_size
+        while not self.stopping and not self.exhausted():
+            ready, _, _ = select.select([self.socket], [], [], POLL_INTERVAL)
+            if not ready or self.stopping:
+                continue
+            try:
+                request, client_address = self.socket.accept()
+            except BlockingIOError:
+                continue
+            request.settimeout(self.timeout)
+            try:
+                server.process_request(request, client_address)
+            except Exception:
+                server.handle_error(request, client_address)
+                server.shutdown_request(request)
+            self.handled += 1
+
+
+class AsgiWorker(Worker):
+    """
+    Асинхронный рабочий процесс: HTTP/1.1 поверх asyncio для ASGI-приложения.
+    Соединение обслуживает запросы по очереди (keep-alive, в том числе
+    конвейерные запросы); ответ без Content-Length передается chunked.
+    """
+
+    def run(self):
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        asyncio.run(self._serve())
+
+    async def _serve(self):
+        self.done = asyncio.Event()
+        self.connections = set()
+        self.idle = set()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, self.done.set)
+        server = await asyncio.start_server(self._handle, sock=self.socket, limit=MAX_LINE + 2)
+        await self.done.wait()
+        # Новые соединения больше не принимаем, начатые запросы доводим до ответа,
+        # а соединения, ждущие следующего запроса, закрываем сразу
+        server.close()
+        for task in self.idle:
+            task.cancel()
+        if self.connections:
+            await asyncio.wait(self.connections, timeout=self.graceful_timeout)
+
+    async def _handle(self, reader, writer):
+        task = asyncio.current_task()
+        self.connections.add(task)
+        try:
+            await self.serve_connection(reader, writer)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.connections.discard(task)
+
+    async def serve_connection(self, reader, writer):
+        """Обслуживает запросы соединения, пока клиент или сервер не закроет его"""
+        task = asyncio.current_task()
+        first = True
+        try:
+            keep_alive = True
+            while keep_alive and not self.done.is_set():
+                self.idle.add(task)
+                try:
+                    request = await asyncio.wait_for(read_request(reader, self.max_body_size), self.timeout)
+                except BadRequest as exc:
+                    await _write_error(writer, exc.status)
+                    return
+                except asyncio.TimeoutError:
+                    # Молчащее соединение после ответа просто закрываем
+                    if first:
+                        await _write_error(writer, HTTPStatus.REQUEST_TIMEOUT)
+                    return
+                finally:
+                    self.idle.discard(task)
+                if request is None:
+                    return
+                first = False
+                scope, body = request
+                scope['client'] = writer.get_extra_info('peername')[:2]
+                scope['server'] = writer.get_extra_info('sockname')[:2]
+                self.handled += 1
+                keep_alive = _wants_keep_alive(scope) and not self.exhausted() and not self.done.is_set()
+                keep_alive = await self._call_app(scope, body, writer, keep_alive)
+                if self.exhausted():
+                    self.done.set()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _call_app(self, scope, body, writer, keep_alive):
+        """Передает запрос приложению; возвращает, можно ли читать из соединения следующий"""
+        response = {'status': None, 'length': 0, 'chunked': False, 'complete': False}
+        finished = asyncio.Event()
+        body_sent = False
+        with_body = scope['method'] != 'HEAD'
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            # Тело передано целиком; дальше остается только дождаться конца ответа
+            await finished.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            nonlocal keep_alive
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                headers = list(message.get('headers', []))
+                names = {name.lower() for name, _ in headers}
+                if (b'connection', b'close') in ((name.lower(), value.lower()) for name, value in headers):
+                    keep_alive = False
+                # Без Content-Length конец тела в keep-alive обозначается chunked, иначе - закрытием
+                if b'content-length' not in names and with_body and status >= 200 and status not in (204, 304):
+                    if keep_alive and scope['http_version'] == '1.1':
+                        response['chunked'] = True
+                        headers.append((b'transfer-encoding', b'chunked'))
+                    else:
+                        keep_alive = False
+                response['status'] = status
+                writer.write(_response_head(status, headers, keep_alive, scope['http_version']))
+            elif message['type'] == 'http.response.body':
+                chunk = message.get('body', b'')
+                more_body = message.get('more_body', False)
+                response['length'] += len(chunk)
+                # На HEAD отвечаем только заголовками
+                if with_body:
+                    if response['chunked']:
+                        if chunk:
+                            writer.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+                        if not more_body:
+                            writer.write(b'0\r\n\r\n')
+                    else:
+                        writer.write(chunk)
+                    await writer.drain()
+                if not more_body:
+                    response['complete'] = True
+                    finished.set()
+
+        try:
+            await self.app(scope, receive, send)
+        except ConnectionError:
+            # Клиент ушел, не дождавшись ответа: это не ошибка приложения
+            raise
+        except Exception:
+            logger.exception('Ошибка приложения при обработке %s %s', scope['method'], scope['path'])
+            if response['status'] is None:
+                response['status'] = HTTPStatus.INTERNAL_SERVER_ERROR
+                await _write_error(writer, HTTPStatus.INTERNAL_SERVER_ERROR)
+        finally:
+            finished.set()
+        access_logger.info(
+            '"%s %s HTTP/%s" %s %s', scope['method'], scope['raw_path'].decode('latin-1'),
+            scope['http_version'], response['status'], response['length'],
+            extra={'status_code': response['status']},
+        )
+        # Оборванный ответ или ответ с ошибкой соединение не продолжают
+        return keep_alive and response['complete']
+
+
+def _wants_keep_alive(scope):
+    """HTTP/1.1 держит соединение, пока клиент не попросит close; HTTP/1.0 - только по keep-alive"""
+    tokens = set()
+    for name, value in scope['headers']:
+        if name == b'connection':
+            tokens.update(token.strip().lower() for token in value.split(b','))
+    if scope['http_version'] == '1.0':
+        return b'keep-alive' in tokens
+    return b'close' not in tokens
+
+
+async def read_request(reader, max_body_size=None):
+    """
+    Читает запрос из потока: (ASGI scope без client/server, тело) или None,
+    если клиент закрыл соединение, ничего не прислав.
+    Тело читается целиком по Content-Length или из chunked (тогда в scope
+    Transfer-Encoding заменяется на Content-Length собранного тела); другие
+    Transfer-Encoding отклоняются с 501.
+    Тело больше max_body_size не дочитывается: BadRequest(413).
+    """
+    try:
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode('latin-1').rstrip('\r\n').split(' ')
+        except ValueError:
+            raise BadRequest()
+        if not version.startswith('HTTP/1.'):
+            raise BadRequest(HTTPStatus.HTTP_VERSION_NOT_SUPPORTED)
+
+        headers = await _read_headers(reader)
+
+        length = None
+        chunked = False
+        for name, value in headers:
+            if name == b'transfer-encoding':
+                if value.lower() != b'chunked':
+                    raise BadRequest(HTTPStatus.NOT_IMPLEMENTED)
+                chunked = True
+            elif name == b'content-length':
+                if not value.isdigit() or (length is not None and int(value) != length):
+                    raise BadRequest()
+                length = int(value)
+        if chunked:
+            # Оба заголовка сразу - признак подмены запроса (request smuggling)
+            if length is not None:
+                raise BadRequest()
+            body = await _read_chunked(reader, max_body_size)
+            headers = [(name, value) for name, value in headers if name != b'transfer-encoding']
+            headers.append((b'content-length', str(len(body)).encode()))
+        else:
+            length = length or 0
+            if max_body_size is not None and length > max_body_size:
+                raise BadRequest(TOO_LARGE)
+            body = await reader.readexactly(length) if length else b''
+    except (ValueError, asyncio.LimitOverrunError):
+        # StreamReader.readline сообщает о слишком длинной строке через ValueError
+        raise BadRequest(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+    except asyncio.IncompleteReadError:
+        raise BadRequest()
+
+    path, _, query = target.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0', 'spec_version': '2.3'},
+        'http_version': version[len('HTTP/'):],
+        'method': method.upper(),
+        'scheme': 'http',
+        'path': unquote(path),
+        'raw_path': path.encode('latin-1'),
+        'query_string': query.encode('latin-1'),
+        'root_path': '',
+        'headers': headers,
+    }
+    return scope, body
+
+
+async def _read_headers(reader):
+    """Заголовки (или трейлеры chunked) до пустой строки: [(имя в нижнем регистре, значение)]"""
+    headers = []
+    while True:
+        line = await reader.readline()
+        if not line:
+            # Соединение закрыто посреди заголовков
+            raise BadRequest()
+        if line in (b'\r\n', b'\n'):
+            return headers
+        if len(headers) >= MAX_HEADERS:
+            raise BadRequest(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+        name, separator, value = line.partition(b':')
+        if not separator:
+            raise BadRequest()
+        headers.append((name.strip().lower(), value.strip()))
+
+
+async def _read_chunked(reader, max_body_size):
+    """Тело в chunked: части до нулевой, затем трейлеры (отбрасываются)"""
+    parts = []
+    total = 0
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise BadRequest()
+        size = line.split(b';', 1)[0].strip()
+        if not size or size.strip(b'0123456789abcdefABCDEF'):
+            raise BadRequest()
+        size = int(size, 16)
+        if size == 0:
+            await _read_headers(reader)
+            return b''.join(parts)
+        total += size
+        if max_body_size is not None and total > max_body_size:
+            raise BadRequest(TOO_LARGE)
+        parts.append(await reader.readexactly(size))
+        if await reader.readexactly(2) != b'\r\n':
+            raise BadRequest()
+
+
+def _response_head(status, headers, keep_alive=False, http_version='1.1'):
+    try:
+        reason = HTTPStatus(status).phrase
+    except ValueError:
+        reason = ''
+    lines = [f'HTTP/1.1 {status} {reason}'.encode('latin-1')]
+    for name, value in headers:
+        if name.lower() != b'connection':
+            lines.append(name + b': ' + value)
+    if not keep_alive:
+        lines.append(b'connection: close')
+    elif http_version == '1.0':
+        lines.append(b'connection: keep-alive')
+    return b'\r\n'.join(lines) + b'\r\n\r\n'
+
+
+async def _write_error(writer, status):
+    body = status.phrase.encode()
+    writer.write(_response_head(status, [
+        (b'content-type', b'text/plain; charset=utf-8'),
+        (b'content-length', str(len(body)).encode()),
+    ]) + body)
+    await writer.drain()
@@ -0,0 +1,193 @@
+"""
+Обработчики сигналов приложения racing
+"""
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from . import counters, elo, profiles, rankings, stats
+from .caching import bump_version_on_commit
+from .form_guide import invalidate_form_guides_on_commit
+from .leaderboard import invalidate_leaderboards
+from .models import Competition, Result, Horse, Jockey, Hippodrome, Owner, UserProfile
+
+
+def _invalidate_on_commit(competition_ids):
+    """Сбрасывает кэш после фиксации транзакции, чтобы не закэшировать старые данные"""
+    competition_ids = list(competition_ids)
+    transaction.on_commit(lambda: invalidate_leaderboards(competition_ids))
+
+
+@receiver(post_save, sender=Result)
+@receiver(post_delete, sender=Result)
+def invalidate_result_leaderboard(sender, instance, **kwargs):
+    """Сброс таблицы результатов при изменении результата"""
+    _invalidate_on_commit([instance.competition_id])
+
+
+@receiver(post_save, sender=Competition)
+@receiver(post_delete, sender=Competition)
+def invalidate_competition_leaderboard(sender, instance, **kwargs):
+    """Сброс таблицы результатов при изменении самого состязания"""
+    _invalidate_on_commit([instance.pk])
+
+
+@receiver(post_save, sender=Horse)
+@receiver(post_save, sender=Jockey)
+def invalidate_participant_leaderboards(sender, instance, created, **kwargs):
+    """Сброс таблиц состязаний, где участвовали лошадь или жокей (их имена в HTML)"""
+    if created:
+        return
+    field = 'horse' if sender is Horse else 'jockey'
+    competition_ids = Result.objects.filter(**{field: instance}).values_list(
+        'competition_id', flat=True
+    ).distinct()
+    _invalidate_on_commit(competition_ids)
+
+
+@receiver(post_save, sender=Hippodrome)
+def invalidate_hippodrome_leaderboards(sender, instance, created, **kwargs):
+    """Сброс таблиц состязаний ипподрома (его название в HTML)"""
+    if created:
+        return
+    competition_ids = Competition.objects.filter(hippodrome=instance).values_list('id', flat=True)
+    _invalidate_on_commit(competition_ids)
+
+
+@receiver(pre_save, sender=Result)
+def remember_previous_result(sender, instance, raw=False, **kwargs):
+    """Запоминает прежние значения результата для корректировки статистики"""
+    instance._stats_previous = None
+    if raw or instance.pk is None:
+        return
+    previous = Result.objects.filter(pk=instance.pk).values(
+        'horse_id', 'jockey_id', 'position', 'time_result'
+    ).first()
+    instance._stats_previous = previous
+
+
+@receiver(post_save, sender=Result)
+def update_stats_on_result_save(sender, instance, raw=False, **kwargs):
+    """Инкрементально обновляет статистику карьеры при сохранении результата"""
+    if raw:
+        return
+    previous = getattr(instance, '_stats_previous', None)
+    if previous is not None:
+        stats.remove_result(previous)
+    stats.add_result(stats.snapshot(instance))
+
+
+@receiver(post_save, sender=Result)
+def update_elo_on_result_create(sender, instance, created, raw=False, **kwargs):
+    """
+    Учитывает новый результат в рейтингах Эло (после статистики карьеры,
+    которая создает строки рейтинга). Правки старых результатов исправляет
+    полный пересчет recompute_elo.
+    """
+    if raw or not created:
+        return
+    elo.apply_results(instance.competition_id, [instance.pk])
+
+
+@receiver(post_delete, sender=Result)
+def update_stats_on_result_delete(sender, instance, **kwargs):
+    """Исключает удаленный результат из статистики карьеры"""
+    stats.remove_result(stats.snapshot(instance))
+
+
+def _refresh_rankings_on_commit(horse_ids, jockey_ids):
+    """Пересчитывает рейтинги после фиксации транзакции одним вызовом на запись"""
+    horse_ids, jockey_ids = set(horse_ids), set(jockey_ids)
+    transaction.on_commit(lambda: rankings.refresh_rankings(horse_ids, jockey_ids))
+
+
+@receiver(post_save, sender=Result)
+@receiver(post_delete, sender=Result)
+def refresh_result_rankings(sender, instance, raw=False, **kwargs):
+    """
+    Пересчитывает рейтинги лошади и жокея результата (и прежних, если их сменили)
+    и сбрасывает форму этих лошадей
+    """
+    if raw:
+        return
+    horse_ids = {instance.horse_id}
+    jockey_ids = {instance.jockey_id}
+    previous = getattr(instance, '_stats_previous', None)
+    if previous is not None:
+        horse_ids.add(previous['horse_id'])
+        jockey_ids.add(previous['jockey_id'])
+    _refresh_rankings_on_commit(horse_ids, jockey_ids)
+    invalidate_form_guides_on_commit(horse_ids)
+
+
+@receiver(post_save, sender=Competition)
+def refresh_competition_rankings(sender, instance, created, raw=False, **kwargs):
+    """Дата и ипподром состязания определяют окна рейтинга и форму его участников"""
+    if raw or created:
+        return
+    participants = list(Result.objects.filter(competition=instance).values_list('horse_id', 'jockey_id'))
+    if participants:
+        horse_ids, jockey_ids = zip(*participants)
+        _refresh_rankings_on_commit(horse_ids, jockey_ids)
+        invalidate_form_guides_on_commit(horse_ids)
+
+
+@receiver(post_save, sender=User)
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
+    """
+    Гарантирует профиль у нового пользователя.
+    Профиль создается после фиксации транзакции и только если его не создал
+    сам вызывающий код (регистрация, админка), поэтому роль и контакты не теряются.
+    """
+    if raw or not created:
+        return
+    transaction.on_commit(lambda: profiles.ensure_profile(instance))
+
+
+@receiver(post_save, sender=UserProfile)
+def provision_user_jockey(sender, instance, raw=False, **kwargs):
+    """Создает профиль жокея, когда пользователю назначена роль жокея"""
+    if raw:
+        return
+    profiles.provision_jockey(instance)
+
+
+@receiver(post_save, sender=Horse)
+@receiver(post_save, sender=Jockey)
+@receiver(post_save, sender=Competition)
+@receiver(post_save, sender=Result)
+def count_created(sender, instance, created, raw=False, **kwargs):
+    """Увеличивает счетчик главной страницы при создании записи"""
+    if created and not raw:
+        counters.increment(counters.counter_name(sender))
+
+
+@receiver(post_delete, sender=Horse)
+@receiver(post_delete, sender=Jockey)
+@receiver(post_delete, sender=Competition)
+@receiver(post_delete, sender=Result)
+def count_deleted(sender, instance, **kwargs):
+    """Уменьшает счетчик главной страницы при удалении записи"""
+    counters.increment(counters.counter_name(sender), -1)
+
+
+@receiver(post_save, sender=Competition)
+@receiver(post_delete, sender=Competition)
+@receiver(post_save, sender=Result)
+@receiver(post_delete, sender=Result)
+@receiver(post_save, sender=Horse)
+@receiver(post_delete, sender=Horse)
+@receiver(post_save, sender=Jockey)
+@receiver(post_delete, sender=Jockey)
+@receiver(post_save, sender=Hippodrome)
+@receiver(post_delete, sender=Hippodrome)
+@receiver(post_save, sender=Owner)
+@receiver(post_delete, sender=Owner)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def bump_cache_version(sender, instance, raw=False, **kwargs):
+    """Делает устаревшими закэшированные страницы, зависящие от модели"""
+    if raw:
+        return
+    bump_version_on_commit(sender)
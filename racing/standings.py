@@ -0,0 +1,67 @@
+"""
+Турнирные таблицы лошадей и жокеев за все время и по сезонам.
+
+На PostgreSQL это материализованное представление racing_standing над
+Result и Competition (миграция 0015). Оно обновляется командой
+refresh_standings и после массового импорта через
+REFRESH MATERIALIZED VIEW CONCURRENTLY, поэтому читатели не ждут
+обновления. На SQLite та же таблица перезаполняется из представления
+racing_standing_source в одной транзакции. Чтение - выборка по индексу
+(subject, season, rank), ее стоимость не зависит от размера Result.
+"""
+from django.db import connection, transaction
+
+from .caching import bump_version_on_commit
+from .models import Standing
+
+
+# Сколько строк таблицы показывать на главной странице
+LEADERS_LIMIT = 5
+
+
+def refresh_standings():
+    """Пересчитывает турнирные таблицы по текущим результатам"""
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('REFRESH MATERIALIZED VIEW CONCURRENTLY racing_standing')
+        else:
+            cursor.execute('DELETE FROM racing_standing')
+            cursor.execute('INSERT INTO racing_standing SELECT * FROM racing_standing_source')
+        bump_version_on_commit(Standing)
+
+
+def refresh_standings_on_commit():
+    """Пересчитывает таблицы после фиксации транзакции, не удлиняя ее"""
+    transaction.on_commit(refresh_standings)
+
+
+def _leaders_query(season, limit):
+    return (
+        Standing.objects.filter(season__in=[season, Standing.ALL_TIME_SEASON], rank__lte=limit)
+        .order_by('subject', 'season', 'rank', 'subject_id')
+    )
+
+
+def _split_leaders(rows, season, limit):
+    if not any(row.season == season for row in rows):
+        season = Standing.ALL_TIME_SEASON
+    leaders = {subject: [] for subject, _ in Standing.SUBJECT_CHOICES}
+    for row in rows:
+        if row.season == season and len(leaders[row.subject]) < limit:
+            leaders[row.subject].append(row)
+    return season, leaders
+
+
+def get_leaders(season, limit=LEADERS_LIMIT):
+    """
+    Лидеры сезона среди лошадей и жокеев одним запросом.
+    Если в сезоне еще нет результатов, возвращаются лидеры за все время.
+    Возвращает (сезон, {'horse': [...], 'jockey': [...]}).
+    """
+    return _split_leaders(list(_leaders_query(season, limit)), season, limit)
+
+
+async def aget_leaders(season, limit=LEADERS_LIMIT):
+    """Асинхронный get_leaders"""
+    rows = [row async for row in _leaders_query(season, limit)]
+    return _split_leaders(rows, season, limit)
@@ -0,0 +1,49 @@
+// Автодополнение для <select data-autocomplete-url>: варианты подгружаются
+// с сервера по введенному префиксу, вместо выгрузки всей таблицы в HTML.
+(function () {
+    'use strict';
+
+    var DELAY = 250;
+
+    function load(select, input, query) {
+        var url = select.dataset.autocompleteUrl + '?q=' + encodeURIComponent(query);
+        fetch(url, {credentials: 'same-origin'})
+            .then(function (response) { return response.json(); })
+            .then(function (data) {
+                if (input.value !== query) {
+                    return;
+                }
+                var selected = select.value;
+                Array.prototype.slice.call(select.options).forEach(function (option) {
+                    if (option.value && option.value !== selected) {
+                        option.remove();
+                    }
+                });
+                data.results.forEach(function (item) {
+                    if (String(item.id) === selected) {
+                        return;
+                    }
+                    select.add(new Option(item.text, item.id));
+                });
+            });
+    }
+
+    function attach(select) {
+        var input = document.createElement('input');
+        var timer = null;
+        input.type = 'search';
+        input.className = 'form-control mb-1';
+        input.placeholder = 'Начните вводить название...';
+        input.autocomplete = 'off';
+        select.parentNode.insertBefore(input, select);
+        input.addEventListener('input', function () {
+            clearTimeout(timer);
+            timer = setTimeout(function () { load(select, input, input.value); }, DELAY);
+        });
+        load(select, input, '');
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('select[data-autocomplete-url]').forEach(attach);
+    });
+})();
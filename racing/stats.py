@@ -0,0 +1,154 @@
+"""
+Инкрементальное обновление и полная пересборка статистики карьеры
+"""
+from django.db import transaction
+from django.db.models import Count, Min, Q, F, Case, When, Value, Subquery
+
+from .models import Result, HorseStats, JockeyStats
+
+
+# Места, которые считаются призовыми
+PODIUM_POSITIONS = 3
+
+# Размер пачки при массовой вставке статистики
+REBUILD_BATCH_SIZE = 1000
+
+# (модель статистики, поле связи в Result)
+STATS_TARGETS = (
+    (HorseStats, 'horse'),
+    (JockeyStats, 'jockey'),
+)
+
+
+def snapshot(result):
+    """Значения результата, влияющие на статистику"""
+    return {
+        'horse_id': result.horse_id,
+        'jockey_id': result.jockey_id,
+        'position': result.position,
+        'time_result': result.time_result,
+    }
+
+
+def add_result(values):
+    """Учитывает результат в статистике лошади и жокея"""
+    position = values['position']
+    time_result = values['time_result']
+    for stats_model, field in STATS_TARGETS:
+        owner_id = values[f'{field}_id']
+        stats_model.objects.get_or_create(**{f'{field}_id': owner_id})
+        stats_model.objects.filter(pk=owner_id).update(
+            starts=F('starts') + 1,
+            wins=F('wins') + int(position == 1),
+            podiums=F('podiums') + int(position <= PODIUM_POSITIONS),
+            best_time=Case(
+                When(Q(best_time__isnull=True) | Q(best_time__gt=time_result), then=Value(time_result)),
+                default=F('best_time'),
+            ),
+        )
+
+
+def remove_result(values):
+    """Исключает результат из статистики лошади и жокея"""
+    position = values['position']
+    time_result = values['time_result']
+    for stats_model, field in STATS_TARGETS:
+        owner_id = values[f'{field}_id']
+        stats_model.objects.filter(pk=owner_id).update(
+            starts=F('starts') - 1,
+            wins=F('wins') - int(position == 1),
+            podiums=F('podiums') - int(position <= PODIUM_POSITIONS),
+        )
+        # Лучшее время пересчитываем, только если удален именно лучший результат
+        best = (
+            Result.objects.filter(**{f'{field}_id': owner_id})
+            .values(field)
+            .annotate(best=Min('time_result'))
+            .values('best')
+        )
+        stats_model.objects.filter(pk=owner_id, best_time=time_result).update(
+            best_time=Subquery(best)
+        )
+
+
+def _aggregate(field, owner_ids=None):
+    """Агрегирует статистику по Result для поля связи field"""
+    queryset = Result.objects.all()
+    if owner_ids is not None:
+        queryset = queryset.filter(**{f'{field}_id__in': owner_ids})
+    return (
+        queryset.values(field)
+        .annotate(
+            starts=Count('id'),
+            wins=Count('id', filter=Q(position=1)),
+            podiums=Count('id', filter=Q(position__lte=PODIUM_POSITIONS)),
+            best_time=Min('time_result'),
+        )
+        .order_by()
+    )
+
+
+def _build(stats_model, field, rows):
+    for row in rows:
+        yield stats_model(
+            **{f'{field}_id': row[field]},
+            starts=row['starts'],
+            wins=row['wins'],
+            podiums=row['podiums'],
+            best_time=row['best_time'],
+        )
+
+
+def refresh_stats(horse_ids=(), jockey_ids=()):
+    """
+    Пересчитывает статистику указанных лошадей и жокеев по Result.
+    Используется после массовой вставки, которая не вызывает сигналы:
+    по одной агрегации и одному upsert на таблицу.
+    """
+    for (stats_model, field), owner_ids in zip(STATS_TARGETS, (horse_ids, jockey_ids)):
+        owner_ids = set(owner_ids)
+        if not owner_ids:
+            continue
+        stats_model.objects.bulk_create(
+            list(_build(stats_model, field, _aggregate(field, owner_ids))),
+            update_conflicts=True,
+            unique_fields=[field],
+            update_fields=['starts', 'wins', 'podiums', 'best_time'],
+        )
+
+
+def rebuild_stats():
+    """
+    Пересобирает таблицы статистики одной агрегацией по Result на каждую
+    таблицу. Строки обновляются на месте (upsert), поэтому рейтинг Эло,
+    который хранится в тех же строках, сохраняется; строки участников без
+    результатов удаляются. Возвращает число записанных строк по таблицам.
+    """
+    created = {}
+    with transaction.atomic():
+        for stats_model, field in STATS_TARGETS:
+            stats_model.objects.exclude(**{f'{field}__in': Result.objects.values(field)}).delete()
+            rows = _aggregate(field).iterator(chunk_size=REBUILD_BATCH_SIZE)
+            created[stats_model._meta.model_name] = _bulk_create(
+                stats_model, _build(stats_model, field, rows),
+                update_conflicts=True,
+                unique_fields=[field],
+                update_fields=['starts', 'wins', 'podiums', 'best_time'],
+            )
+    return created
+
+
+def _bulk_create(model, objects, **options):
+    """Вставляет объекты пачками фиксированного размера"""
+    total = 0
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            model.objects.bulk_create(batch, **options)
+            total += len(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch, **options)
+        total += len(batch)
+    return total
@@ -0,0 +1,37 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from racing.models import format_duration
+
+
+register = template.Library()
+
+# Максимальный рейтинг жокея
+MAX_RATING = 10
+
+_FULL_STAR = '<i class="fas fa-star text-warning"></i>'
+_EMPTY_STAR = '<i class="far fa-star text-muted"></i>'
+
+# Готовая разметка звезд для каждого возможного рейтинга
+RATING_STARS = {
+    rating: mark_safe(_FULL_STAR * rating + _EMPTY_STAR * (MAX_RATING - rating))
+    for rating in range(MAX_RATING + 1)
+}
+
+
+@register.simple_tag
+def rating_stars(rating):
+    """Звезды рейтинга от 0 до 10 без цикла в шаблоне"""
+    try:
+        rating = int(rating)
+    except (TypeError, ValueError):
+        rating = 0
+    return RATING_STARS[min(max(rating, 0), MAX_RATING)]
+
+
+@register.filter
+def duration(value):
+    """Длительность в формате MM:SS.mmm или прочерк, если ее нет"""
+    if value is None:
+        return "—"
+    return format_duration(value)
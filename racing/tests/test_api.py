@@ -0,0 +1,131 @@
+"""
+Тесты JSON API только для чтения
+Использует unittest
+"""
+from datetime import date, time, timedelta
+from django.contrib.auth.models import User
+from django.db.models.signals import pre_init
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.core.management import call_command
+from racing.models import (
+    UserProfile, Hippodrome, Owner, Jockey, Horse, Competition, Result
+)
+
+
+# Базовый класс с применением миграций
+try:
+    from racing.tests.test_base import BaseTestCase
+except ImportError:
+    # Если test_base.py не найден, используем встроенный класс
+    class BaseTestCase(TestCase):
+        """Базовый класс для тестов с применением миграций"""
+        @classmethod
+        def setUpClass(cls):
+            """Применяет миграции перед запуском тестов класса"""
+            super().setUpClass()
+            call_command('migrate', verbosity=0, interactive=False)
+
+
+class TestApi(BaseTestCase):
+    """Тесты ресурсов API"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.client = Client()
+        user = User.objects.create_user(username='user', password='test123')
+        UserProfile.objects.create(user=user, role='user')
+        self.client.force_login(user)
+        
+        self.central = Hippodrome.objects.create(name='Центральный', address='Test')
+        self.north = Hippodrome.objects.create(name='Северный', address='Test')
+        owner = Owner.objects.create(name='Owner', address='Test', phone='+79991234567')
+        self.horses = [
+            Horse.objects.create(name=f'Horse {i}', gender='M', age=5, owner=owner) for i in range(3)
+        ]
+        self.jockeys = [
+            Jockey.objects.create(name=f'Jockey {i}', address='Test', age=30, rating=5) for i in range(3)
+        ]
+        self.competitions = []
+        for day, hippodrome in enumerate([self.central, self.north, self.central], start=1):
+            competition = Competition.objects.create(
+                hippodrome=hippodrome,
+                date=date(2024, 5, day),
+                time=time(14, 0),
+                name=f'Кубок {day}'
+            )
+            self.competitions.append(competition)
+            for position, (horse, jockey) in enumerate(zip(self.horses, self.jockeys), start=1):
+                Result.objects.create(
+                    competition=competition,
+                    horse=horse,
+                    jockey=jockey,
+                    position=position,
+                    time_result=timedelta(minutes=2, seconds=position)
+                )
+    
+    def _get(self, resource, **params):
+        return self.client.get(reverse('api_list', args=[resource]), params)
+    
+    def test_sparse_fields(self):
+        """Тест выбора полей"""
+        response = self._get('results', fields='horse,position,time_result', limit=1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [
+            {'horse': 'Horse 2', 'position': 3, 'time_result': '02:03.000'},
+        ])
+    
+    def test_cursor_pagination(self):
+        """Тест обхода всех результатов по курсору"""
+        seen = []
+        params = {'fields': 'id', 'limit': 4}
+        while True:
+            data = self._get('results', **params).json()
+            seen.extend(row['id'] for row in data['results'])
+            if not data['next']:
+                break
+            params['after'] = data['next']
+        self.assertEqual(sorted(seen), sorted(Result.objects.values_list('id', flat=True)))
+        self.assertEqual(len(seen), len(set(seen)))
+    
+    def test_filters(self):
+        """Тест фильтров по ипподрому, датам, лошади и жокею"""
+        data = self._get('competitions', hippodrome=self.central.id, fields='name').json()
+        self.assertEqual([row['name'] for row in data['results']], ['Кубок 3', 'Кубок 1'])
+        
+        data = self._get('results', date_from='2024-05-02', date_to='2024-05-02', fields='competition_id').json()
+        self.assertEqual({row['competition_id'] for row in data['results']}, {self.competitions[1].id})
+        
+        data = self._get('results', horse=self.horses[0].id, jockey=self.jockeys[0].id).json()
+        self.assertEqual(len(data['results']), 3)
+        
+        data = self._get('jockeys', horse=self.horses[1].id, fields='name,starts').json()
+        self.assertEqual(data['results'], [{'name': 'Jockey 1', 'starts': 3}])
+    
+    def test_no_model_instances(self):
+        """Тест что ответ строится без создания объектов моделей"""
+        created = []
+        
+        def count(sender, **kwargs):
+            created.append(sender)
+        
+        pre_init.connect(count)
+        try:
+            for resource in ('competitions', 'results', 'horses', 'jockeys'):
+                self.assertEqual(self._get(resource).status_code, 200)
+        finally:
+            pre_init.disconnect(count)
+        self.assertNotIn(Result, created)
+        self.assertNotIn(Competition, created)
+        self.assertNotIn(Horse, created)
+    
+    def test_errors(self):
+        """Тест ошибок параметров и доступа"""
+        self.assertEqual(self._get('results', fields='secret').status_code, 400)
+        self.assertEqual(self._get('horses', hippodrome=self.central.id).status_code, 400)
+        self.assertEqual(self._get('results', after='!!!').status_code, 400)
+        self.assertEqual(self._get('results', limit=10000).status_code, 400)
+        self.assertEqual(self._get('owners').status_code, 404)
+        
+        self.client.logout()
+        self.assertEqual(self._get('results').status_code, 401)
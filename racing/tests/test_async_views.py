@@ -0,0 +1,130 @@
+"""
+Тесты асинхронных страниц просмотра под ASGI
+Использует unittest
+"""
+from datetime import date, time, timedelta
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.core.management import call_command
+from racing import views
+from racing.middleware import UserProfileMiddleware
+from racing.models import UserProfile, Hippodrome, Owner, Jockey, Horse, Competition, Result
+
+
+# Базовый класс с применением миграций
+try:
+    from racing.tests.test_base import BaseTestCase
+except ImportError:
+    # Если test_base.py не найден, используем встроенный класс
+    class BaseTestCase(TestCase):
+        """Базовый класс для тестов с применением миграций"""
+        @classmethod
+        def setUpClass(cls):
+            """Применяет миграции перед запуском тестов класса"""
+            super().setUpClass()
+            call_command('migrate', verbosity=0, interactive=False)
+
+
+class TestAsyncViews(BaseTestCase):
+    """Тесты страниц через ASGI-обработчик и асинхронную цепочку middleware"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.user = User.objects.create_user(username='reader', password='test123')
+        UserProfile.objects.create(user=self.user, role='user')
+        hippodrome = Hippodrome.objects.create(name='Центральный', address='Test')
+        owner = Owner.objects.create(name='Owner', address='Test', phone='+79991234567')
+        self.horse = Horse.objects.create(name='Буран', gender='M', age=5, owner=owner)
+        self.jockey = Jockey.objects.create(name='Петров', address='Test', age=30, rating=5)
+        self.competition = Competition.objects.create(
+            hippodrome=hippodrome, date=date(2024, 5, 1), time=time(14, 0), name='Кубок'
+        )
+        Result.objects.create(
+            competition=self.competition, horse=self.horse, jockey=self.jockey,
+            position=1, time_result=timedelta(minutes=2)
+        )
+    
+    def test_views_are_coroutines(self):
+        """Тест что декораторы сохраняют асинхронность страниц"""
+        for view in (
+            views.index, views.competition_detail, views.horse_competitions, views.jockey_competitions,
+            views.competition_list, views.jockey_list, views.horse_list, views.hippodrome_list,
+        ):
+            self.assertTrue(iscoroutinefunction(view), view.__name__)
+    
+    def test_middleware_async_capable(self):
+        """Тест что middleware профиля работает в асинхронной цепочке"""
+        async def get_response(request):
+            return None
+        
+        self.assertTrue(iscoroutinefunction(UserProfileMiddleware(get_response)))
+        self.assertFalse(iscoroutinefunction(UserProfileMiddleware(lambda request: None)))
+    
+    async def test_index(self):
+        """Тест главной страницы с одновременными запросами"""
+        response = await self.async_client.get(reverse('index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Кубок')
+        self.assertEqual(response.context['total_horses'], 1)
+    
+    async def test_detail_pages(self):
+        """Тест страниц состязания, лошади и жокея"""
+        response = await self.async_client.get(reverse('competition_detail', args=[self.competition.id]))
+        self.assertContains(response, 'Буран')
+        response = await self.async_client.get(reverse('horse_competitions', args=[self.horse.id]))
+        self.assertContains(response, 'Петров')
+        self.assertEqual(len(response.context['form_guide']['runs']), 1)
+        response = await self.async_client.get(reverse('jockey_competitions', args=[self.jockey.id]))
+        self.assertContains(response, 'Буран')
+    
+    async def test_not_found(self):
+        """Тест 404 для несуществующих объектов"""
+        for name in ('competition_detail', 'horse_competitions', 'jockey_competitions'):
+            response = await self.async_client.get(reverse(name, args=[999999]))
+            self.assertEqual(response.status_code, 404, name)
+    
+    async def test_conditional_get(self):
+        """Тест ответа 304 по ETag в асинхронном пути"""
+        url = reverse('jockey_competitions', args=[self.jockey.id])
+        response = await self.async_client.get(url)
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+        
+        response = await self.async_client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+    
+    async def test_list_requires_login(self):
+        """Тест перенаправления анонимного пользователя со списков"""
+        response = await self.async_client.get(reverse('competition_list'))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('login'), response['Location'])
+    
+    def test_lists_authenticated(self):
+        """Тест списков для авторизованного пользователя"""
+        from asgiref.sync import async_to_sync
+        
+        self.async_client.force_login(self.user)
+        for name, text in (
+            ('competition_list', 'Кубок'),
+            ('jockey_list', 'Петров'),
+            ('horse_list', 'Буран'),
+            ('hippodrome_list', 'Центральный'),
+        ):
+            response = async_to_sync(self.async_client.get)(reverse(name))
+            self.assertContains(response, text, msg_prefix=name)
+    
+    def test_cached_page_without_queries(self):
+        """Тест что повторная страница отдается из кэша без запроса списка"""
+        from asgiref.sync import async_to_sync
+        from django.core.cache import cache
+        
+        cache.clear()
+        self.async_client.force_login(self.user)
+        url = reverse('hippodrome_list')
+        async_to_sync(self.async_client.get)(url)
+        # Остаются сессия, пользователь с профилем и валидатор страницы (304)
+        with self.assertNumQueries(4):
+            response = async_to_sync(self.async_client.get)(url)
+        self.assertContains(response, 'Центральный')
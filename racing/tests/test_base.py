@@ -2,6 +2,7 @@
 Базовый класс для всех тестов с преднастройкой базы данных
 """
 from django.test import TestCase
+from django.core.cache import cache
 from django.core.management import call_command
 
 
@@ -22,6 +23,11 @@ class BaseTestCase(TestCase):
         # Это гарантирует, что тесты работают с правильной структурой таблиц
         call_command('migrate', verbosity=0, interactive=False)
     
+    def _pre_setup(self):
+        """Очищает кэш перед каждым тестом: откат транзакции не вызывает сигналы инвалидации"""
+        super()._pre_setup()
+        cache.clear()
+    
     @classmethod
     def tearDownClass(cls):
         """Очистка после тестов класса"""
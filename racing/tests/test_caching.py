@@ -0,0 +1,148 @@
+"""
+Тесты кэша страниц с версиями моделей
+Использует unittest
+"""
+from django.contrib.auth.models import User
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.core.management import call_command
+from racing.models import UserProfile, Hippodrome
+
+
+# Базовый класс с применением миграций
+try:
+    from racing.tests.test_base import BaseTestCase
+except ImportError:
+    # Если test_base.py не найден, используем встроенный класс
+    class BaseTestCase(TestCase):
+        """Базовый класс для тестов с применением миграций"""
+        @classmethod
+        def setUpClass(cls):
+            """Применяет миграции перед запуском тестов класса"""
+            super().setUpClass()
+            call_command('migrate', verbosity=0, interactive=False)
+
+
+class TestViewCache(BaseTestCase):
+    """Тесты кэширования страниц по роли и версиям моделей"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.hippodrome = Hippodrome.objects.create(name='Центральный', address='Test')
+        self.url = reverse('hippodrome_list')
+    
+    def _client(self, username, role, first_name=''):
+        user = User.objects.create_user(username=username, password='test123', first_name=first_name)
+        UserProfile.objects.create(user=user, role=role)
+        client = Client()
+        client.force_login(user)
+        return client
+    
+    def test_cache_hit_renders_current_user(self):
+        """Тест что имя пользователя в навигации не берется из кэша"""
+        first = self._client('first', 'user', first_name='Анна')
+        second = self._client('second', 'user', first_name='Борис')
+        
+        self.assertContains(first.get(self.url), 'Анна')
+        response = second.get(self.url)
+        self.assertTemplateNotUsed(response, 'racing/hippodrome_list.html')  # ответ из кэша
+        self.assertContains(response, 'Борис')
+        self.assertNotContains(response, 'Анна')
+        self.assertContains(response, 'Центральный')
+    
+    def test_cache_keyed_by_role(self):
+        """Тест что администратор и пользователь получают разные страницы"""
+        user = self._client('user', 'user')
+        admin = self._client('admin', 'admin')
+        edit_url = reverse('edit_hippodrome', args=[self.hippodrome.id])
+        
+        self.assertNotContains(user.get(self.url), edit_url)
+        self.assertContains(admin.get(self.url), edit_url)
+        self.assertNotContains(user.get(self.url), edit_url)
+    
+    def test_version_bump_invalidates(self):
+        """Тест что изменение модели делает страницу устаревшей"""
+        client = self._client('user', 'user')
+        client.get(self.url)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Hippodrome.objects.create(name='Северный', address='Test')
+        response = client.get(self.url)
+        self.assertTemplateUsed(response, 'racing/hippodrome_list.html')
+        self.assertContains(response, 'Северный')
+    
+    def test_messages_bypass_cache(self):
+        """Тест что страница с сообщением не кэшируется и не берется из кэша"""
+        client = self._client('admin', 'admin')
+        client.get(self.url)
+        
+        response = client.post(reverse('add_hippodrome'), {
+            'name': 'Южный',
+            'address': 'Test',
+            'is_active': True,
+        }, follow=True)
+        self.assertEqual(len(list(response.context['messages'])), 1)
+        
+        response = client.get(self.url)
+        self.assertNotContains(response, 'alert-success')
+
+
+class TestCardFragments(BaseTestCase):
+    """Тесты кэша карточек списков и тега звезд рейтинга"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        from racing.models import Jockey
+        self.jockeys = [
+            Jockey.objects.create(name=f'Жокей {i}', address='Test', age=30, rating=i)
+            for i in range(1, 4)
+        ]
+    
+    def test_rating_stars(self):
+        """Тест готовой разметки звезд, включая значения вне диапазона"""
+        from racing.templatetags.racing_tags import rating_stars
+        
+        markup = rating_stars(3)
+        self.assertEqual(markup.count('fas fa-star'), 3)
+        self.assertEqual(markup.count('far fa-star'), 7)
+        self.assertEqual(rating_stars(15).count('fas fa-star'), 10)
+        self.assertEqual(rating_stars(None).count('far fa-star'), 10)
+    
+    def test_cards_rendered_once(self):
+        """Тест что повторная отрисовка берет карточки из кэша"""
+        from unittest import mock
+        from racing import caching
+        
+        first = caching.render_cached_cards(self.jockeys, 'jockey')
+        self.assertEqual(first.count('card h-100'), 3)
+        self.assertIn('Жокей 2', first)
+        
+        with mock.patch.object(caching, 'render_to_string') as render:
+            second = caching.render_cached_cards(self.jockeys, 'jockey')
+        render.assert_not_called()
+        self.assertEqual(first, second)
+    
+    def test_async_cards_share_fragments(self):
+        """Тест асинхронной отрисовки карточек: те же фрагменты без синхронного кэша"""
+        from unittest import mock
+        from asgiref.sync import async_to_sync
+        from racing import caching
+        
+        first = caching.render_cached_cards(self.jockeys, 'jockey')
+        with mock.patch.object(caching, 'render_to_string') as render, \
+                mock.patch.object(caching.cache, 'get_many') as get_many:
+            second = async_to_sync(caching.arender_cached_cards)(self.jockeys, 'jockey')
+        render.assert_not_called()
+        get_many.assert_not_called()
+        self.assertEqual(first, second)
+    
+    def test_cards_invalidated_by_version(self):
+        """Тест перерисовки карточек после изменения модели"""
+        from racing import caching
+        
+        caching.render_cached_cards(self.jockeys, 'jockey')
+        jockey = self.jockeys[0]
+        jockey.name = 'Переименован'
+        with self.captureOnCommitCallbacks(execute=True):
+            jockey.save()
+        self.assertIn('Переименован', caching.render_cached_cards(self.jockeys, 'jockey'))
@@ -81,3 +81,57 @@ class TestDecorators(BaseTestCase):
         
         self.assertEqual(user.userprofile.role, 'user')
         self.assertTrue(user.userprofile.is_user())
+
+
+class TestUserProfileMiddleware(BaseTestCase):
+    """Тесты определения профиля один раз за запрос"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.client = Client()
+        self.user = User.objects.create_user(username='jockey', password='test123')
+        self.jockey = Jockey.objects.create(name='Test Jockey', address='Test', age=30, rating=5)
+        UserProfile.objects.create(user=self.user, role='jockey', jockey=self.jockey)
+    
+    def test_backend_loads_profile_and_jockey(self):
+        """Тест загрузки пользователя вместе с профилем и жокеем"""
+        from racing.backends import ProfileModelBackend
+        
+        with self.assertNumQueries(1):
+            user = ProfileModelBackend().get_user(self.user.pk)
+            self.assertEqual(user.userprofile.role, 'jockey')
+            self.assertEqual(user.userprofile.jockey, self.jockey)
+    
+    def test_get_user_profile_cached_on_request(self):
+        """Тест что профиль вычисляется один раз"""
+        from django.contrib.auth.models import AnonymousUser
+        from django.test import RequestFactory
+        from racing.middleware import get_user_profile
+        
+        request = RequestFactory().get('/')
+        request.user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_user_profile(request).role, 'jockey')
+            self.assertIs(get_user_profile(request), request.user_profile)
+        
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_user_profile(request))
+    
+    def test_profile_page_single_user_query(self):
+        """Тест что профиль и жокей не запрашиваются повторно при рендеринге"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from django.urls import reverse
+        
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('profile'))
+        self.assertEqual(response.status_code, 200)
+        profile_queries = [
+            query['sql'] for query in queries.captured_queries
+            if 'racing_userprofile' in query['sql']
+        ]
+        self.assertEqual(len(profile_queries), 1)
+        self.assertIn('auth_user', profile_queries[0])
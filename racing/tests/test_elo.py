@@ -0,0 +1,155 @@
+"""
+Тесты рейтингов Эло лошадей и жокеев
+Использует unittest
+"""
+import unittest
+from datetime import date, time, timedelta
+from io import StringIO
+from django.test import TestCase
+from django.core.management import call_command
+from racing import elo
+from racing.models import Hippodrome, Owner, Jockey, Horse, Competition, Result, HorseStats, JockeyStats
+
+
+# Базовый класс с применением миграций
+try:
+    from racing.tests.test_base import BaseTestCase
+except ImportError:
+    # Если test_base.py не найден, используем встроенный класс
+    class BaseTestCase(TestCase):
+        """Базовый класс для тестов с применением миграций"""
+        @classmethod
+        def setUpClass(cls):
+            """Применяет миграции перед запуском тестов класса"""
+            super().setUpClass()
+            call_command('migrate', verbosity=0, interactive=False)
+
+
+class TestRaceDeltas(unittest.TestCase):
+    """Тесты попарного обновления рейтингов одного состязания"""
+    
+    def test_equal_ratings(self):
+        """Тест поля из равных по рейтингу участников"""
+        deltas = list(elo.race_deltas([1500.0] * 3, [1, 2, 3]))
+        self.assertAlmostEqual(deltas[0], elo.ELO_K)
+        self.assertAlmostEqual(deltas[1], 0)
+        self.assertAlmostEqual(deltas[2], -elo.ELO_K)
+    
+    def test_zero_sum_and_upset(self):
+        """Тест что сумма изменений нулевая, а победа слабого ценится выше"""
+        deltas = list(elo.race_deltas([1400.0, 1600.0], [1, 2]))
+        self.assertAlmostEqual(sum(deltas), 0)
+        self.assertGreater(deltas[0], elo.ELO_K / 2)
+    
+    def test_only_new_pairs(self):
+        """Тест что пары старых результатов не учитываются повторно"""
+        deltas = list(elo.race_deltas([1500.0] * 3, [1, 2, 3], new=[False, False, True]))
+        self.assertAlmostEqual(deltas[0], elo.ELO_K / 2)
+        self.assertAlmostEqual(deltas[1], elo.ELO_K / 2)
+        self.assertAlmostEqual(deltas[2], -elo.ELO_K)
+    
+    @unittest.skipIf(elo.np is None, 'NumPy не установлен')
+    def test_numpy_matches_python(self):
+        """Тест совпадения матричного и построчного расчета"""
+        ratings = [1480.0, 1530.0, 1500.0, 1610.0]
+        positions = [2, 1, 4, 3]
+        new = [False, True, False, True]
+        for args in ((ratings, positions, None), (ratings, positions, new)):
+            for fast, slow in zip(elo._deltas_numpy(*args), elo._deltas_python(*args)):
+                self.assertAlmostEqual(fast, slow)
+
+
+class TestEloRatings(BaseTestCase):
+    """Тесты инкрементального обновления и полного пересчета"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.hippodrome = Hippodrome.objects.create(name='Центральный', address='Test')
+        owner = Owner.objects.create(name='Owner', address='Test', phone='+79991234567')
+        self.horses = [
+            Horse.objects.create(name=f'Horse {i}', gender='M', age=5, owner=owner) for i in range(3)
+        ]
+        self.jockeys = [
+            Jockey.objects.create(name=f'Jockey {i}', address='Test', age=30, rating=5) for i in range(3)
+        ]
+    
+    def _race(self, day, order):
+        competition = Competition.objects.create(hippodrome=self.hippodrome, date=day, time=time(14, 0))
+        for position, index in enumerate(order, start=1):
+            Result.objects.create(
+                competition=competition,
+                horse=self.horses[index],
+                jockey=self.jockeys[index],
+                position=position,
+                time_result=timedelta(minutes=2, seconds=position)
+            )
+        return competition
+    
+    def _horse_elo(self, index):
+        return HorseStats.objects.get(horse=self.horses[index]).elo
+    
+    def test_incremental_update(self):
+        """Тест что каждый новый результат сравнивается с уже записанными"""
+        self._race(date(2024, 5, 1), [0, 1])
+        self.assertAlmostEqual(self._horse_elo(0), elo.ELO_INITIAL + elo.ELO_K / 2)
+        self.assertAlmostEqual(self._horse_elo(1), elo.ELO_INITIAL - elo.ELO_K / 2)
+        self.assertAlmostEqual(JockeyStats.objects.get(jockey=self.jockeys[0]).elo, self._horse_elo(0))
+    
+    def test_recompute(self):
+        """Тест полного пересчета в хронологическом порядке"""
+        self._race(date(2024, 6, 1), [2, 1, 0])
+        self._race(date(2024, 5, 1), [0, 1, 2])
+        
+        updated = elo.recompute_ratings()
+        self.assertEqual(updated, {'horsestats': 3, 'jockeystats': 3})
+        # Первое по дате состязание - при равных рейтингах, второе - с учетом первого
+        first = elo.race_deltas([elo.ELO_INITIAL] * 3, [1, 2, 3])
+        ratings = [elo.ELO_INITIAL + delta for delta in first]
+        second = elo.race_deltas(ratings[::-1], [1, 2, 3])
+        expected = [rating + delta for rating, delta in zip(ratings, list(second)[::-1])]
+        for index, rating in enumerate(expected):
+            self.assertAlmostEqual(self._horse_elo(index), rating)
+        self.assertAlmostEqual(sum(self._horse_elo(i) for i in range(3)), 3 * elo.ELO_INITIAL)
+    
+    def test_recompute_resets_removed(self):
+        """Тест что после удаления результатов рейтинг возвращается к начальному"""
+        competition = self._race(date(2024, 5, 1), [0, 1])
+        competition.delete()
+        elo.recompute_ratings()
+        self.assertAlmostEqual(self._horse_elo(0), elo.ELO_INITIAL)
+    
+    def test_stats_rebuild_keeps_ratings(self):
+        """Тест что пересборка статистики карьеры не сбрасывает рейтинг"""
+        from racing.stats import rebuild_stats
+        self._race(date(2024, 5, 1), [0, 1])
+        ratings = dict(HorseStats.objects.values_list('horse_id', 'elo'))
+        HorseStats.objects.filter(horse=self.horses[0]).update(starts=0)
+        
+        rebuild_stats()
+        self.assertEqual(dict(HorseStats.objects.values_list('horse_id', 'elo')), ratings)
+        self.assertEqual(HorseStats.objects.get(horse=self.horses[0]).starts, 1)
+        self.assertNotEqual(ratings[self.horses[0].id], elo.ELO_INITIAL)
+    
+    def test_import_applies_whole_race(self):
+        """Тест что импорт протокола считает все пары поля сразу"""
+        from racing.importing import import_results
+        
+        competition = Competition.objects.create(
+            hippodrome=self.hippodrome, date=date.today() - timedelta(days=1), time=time(14, 0)
+        )
+        rows = [
+            {'position': i + 1, 'horse': self.horses[i].id, 'jockey': self.jockeys[i].name,
+             'time_result': f'02:0{i}.000'}
+            for i in range(3)
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            import_results(competition, rows)
+        self.assertAlmostEqual(self._horse_elo(0), elo.ELO_INITIAL + elo.ELO_K)
+        self.assertAlmostEqual(self._horse_elo(1), elo.ELO_INITIAL)
+    
+    def test_command(self):
+        """Тест команды полного пересчета"""
+        self._race(date(2024, 5, 1), [0, 1])
+        out = StringIO()
+        call_command('recompute_elo', stdout=out)
+        self.assertIn('horsestats: 2', out.getvalue())
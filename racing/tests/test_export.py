@@ -0,0 +1,119 @@
+"""
+Тесты потоковой выгрузки результатов
+Использует unittest
+"""
+import csv
+import json
+from datetime import date, time, timedelta
+from io import StringIO
+from django.contrib.auth.models import User
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.core.management import call_command
+from racing.models import (
+    UserProfile, Hippodrome, Owner, Jockey, Horse, Competition, Result
+)
+
+
+# Базовый класс с применением миграций
+try:
+    from racing.tests.test_base import BaseTestCase
+except ImportError:
+    # Если test_base.py не найден, используем встроенный класс
+    class BaseTestCase(TestCase):
+        """Базовый класс для тестов с применением миграций"""
+        @classmethod
+        def setUpClass(cls):
+            """Применяет миграции перед запуском тестов класса"""
+            super().setUpClass()
+            call_command('migrate', verbosity=0, interactive=False)
+
+
+class TestResultExport(BaseTestCase):
+    """Тесты для выгрузки результатов"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.client = Client()
+        user = User.objects.create_user(username='user', password='test123')
+        UserProfile.objects.create(user=user, role='user')
+        self.client.force_login(user)
+        
+        self.moscow = Hippodrome.objects.create(name='Москва', address='Test')
+        self.kazan = Hippodrome.objects.create(name='Казань', address='Test')
+        owner = Owner.objects.create(name='Owner', address='Test', phone='+79991234567')
+        horse = Horse.objects.create(name='Буцефал', gender='M', age=5, owner=owner)
+        jockey = Jockey.objects.create(name='Jockey', address='Test', age=30, rating=5)
+        for hippodrome, day in ((self.moscow, 1), (self.kazan, 10)):
+            competition = Competition.objects.create(
+                hippodrome=hippodrome,
+                date=date(2024, 1, day),
+                time=time(14, 0),
+                name=f'Кубок {day}'
+            )
+            Result.objects.create(
+                competition=competition,
+                horse=horse,
+                jockey=jockey,
+                position=1,
+                time_result=timedelta(minutes=2, seconds=30, milliseconds=500)
+            )
+    
+    def _content(self, response):
+        return b''.join(response.streaming_content).decode('utf-8')
+    
+    def test_export_csv(self):
+        """Тест выгрузки в CSV"""
+        response = self.client.get(reverse('export_results'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        rows = list(csv.DictReader(StringIO(self._content(response))))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['hippodrome'], 'Москва')
+        self.assertEqual(rows[0]['horse'], 'Буцефал')
+        self.assertEqual(rows[0]['time_result'], '02:30.500')
+    
+    def test_export_ndjson_with_filters(self):
+        """Тест выгрузки в NDJSON с фильтрами по ипподрому и датам"""
+        response = self.client.get(reverse('export_results'), {
+            'format': 'ndjson',
+            'hippodrome': self.kazan.id,
+            'date_from': '2024-01-05',
+            'date_to': '2024-01-10',
+        })
+        self.assertEqual(response.status_code, 200)
+        lines = self._content(response).splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['competition'], 'Кубок 10')
+    
+    def test_export_async_under_asgi(self):
+        """Тест что под ASGI выгрузка отдается асинхронным итератором, без буферизации"""
+        from asgiref.sync import async_to_sync
+        
+        self.async_client.force_login(User.objects.get(username='user'))
+        
+        async def fetch():
+            response = await self.async_client.get(reverse('export_results'), {'format': 'ndjson'})
+            return response, b''.join([chunk async for chunk in response.streaming_content])
+        
+        response, content = async_to_sync(fetch)()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        lines = content.decode('utf-8').splitlines()
+        self.assertEqual([json.loads(line)['competition'] for line in lines], ['Кубок 1', 'Кубок 10'])
+    
+    def test_export_invalid_params(self):
+        """Тест некорректных параметров выгрузки"""
+        response = self.client.get(reverse('export_results'), {
+            'date_from': '2024-02-01',
+            'date_to': '2024-01-01',
+        })
+        self.assertEqual(response.status_code, 400)
+    
+    def test_export_command(self):
+        """Тест команды выгрузки"""
+        out = StringIO()
+        call_command('export_results', '--format', 'ndjson', '--date-to', '2024-01-05', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['hippodrome'], 'Москва')
@@ -0,0 +1,113 @@
+"""
+Тесты формы лошади
+Использует unittest
+"""
+from datetime import time, timedelta
+from django.contrib.auth.models import User
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+from django.core.management import call_command
+from racing.models import UserProfile, Hippodrome, Owner, Jockey, Horse, Competition, Result
+from racing.form_guide import FORM_GUIDE_RUNS, ROLLING_RUNS, build_form_guide, get_form_guide
+
+
+# Базовый класс с применением миграций
+try:
+    from racing.tests.test_base import BaseTestCase
+except ImportError:
+    # Если test_base.py не найден, используем встроенный класс
+    class BaseTestCase(TestCase):
+        """Базовый класс для тестов с применением миграций"""
+        @classmethod
+        def setUpClass(cls):
+            """Применяет миграции перед запуском тестов класса"""
+            super().setUpClass()
+            call_command('migrate', verbosity=0, interactive=False)
+
+
+class TestFormGuide(BaseTestCase):
+    """Тесты расчета и кэширования формы лошади"""
+    
+    STARTS = 12
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.central = Hippodrome.objects.create(name='Центральный', address='Test')
+        self.north = Hippodrome.objects.create(name='Северный', address='Test')
+        owner = Owner.objects.create(name='Owner', address='Test', phone='+79991234567')
+        self.horse = Horse.objects.create(name='Horse', gender='M', age=5, owner=owner)
+        self.jockey = Jockey.objects.create(name='Jockey', address='Test', age=30, rating=5)
+        # Старты раз в 10 дней: четные на Центральном, нечетные на Северном;
+        # место i % 4 + 1, время 2 минуты + i секунд
+        self.first_day = timezone.localdate() - timedelta(days=10 * self.STARTS)
+        for i in range(self.STARTS):
+            self._start(i)
+    
+    def _start(self, i):
+        competition = Competition.objects.create(
+            hippodrome=self.central if i % 2 == 0 else self.north,
+            date=self.first_day + timedelta(days=10 * i),
+            time=time(14, 0),
+        )
+        return Result.objects.create(
+            competition=competition,
+            horse=self.horse,
+            jockey=self.jockey,
+            position=i % 4 + 1,
+            time_result=timedelta(minutes=2, seconds=i),
+        )
+    
+    def test_single_query(self):
+        """Тест что форма считается одним запросом"""
+        with self.assertNumQueries(1):
+            guide = build_form_guide(self.horse.id)
+        self.assertEqual(len(guide['runs']), FORM_GUIDE_RUNS)
+        self.assertEqual(len(guide['courses']), 2)
+    
+    def test_rolling_stats(self):
+        """Тест скользящих показателей последнего старта"""
+        guide = build_form_guide(self.horse.id)
+        last = guide['runs'][0]
+        indexes = range(self.STARTS - ROLLING_RUNS, self.STARTS)
+        self.assertEqual(last['position'], (self.STARTS - 1) % 4 + 1)
+        self.assertEqual(last['rolling_best_time'], timedelta(minutes=2, seconds=indexes[0]))
+        self.assertEqual(last['rolling_time'], timedelta(minutes=2, seconds=sum(indexes) / ROLLING_RUNS))
+        self.assertAlmostEqual(last['rolling_position'], sum(i % 4 + 1 for i in indexes) / ROLLING_RUNS)
+        self.assertEqual(last['days_since_previous'], 10)
+        self.assertEqual(
+            [run['position'] for run in guide['runs']],
+            [i % 4 + 1 for i in reversed(range(self.STARTS - FORM_GUIDE_RUNS, self.STARTS))]
+        )
+    
+    def test_course_record(self):
+        """Тест статистики по ипподромам"""
+        courses = {course['hippodrome_id']: course for course in build_form_guide(self.horse.id)['courses']}
+        central = courses[self.central.id]
+        self.assertEqual(central['starts'], self.STARTS // 2)
+        self.assertEqual(central['wins'], 3)
+        self.assertEqual(central['podiums'], 6)
+        self.assertEqual(central['best_time'], timedelta(minutes=2))
+        self.assertEqual(courses[self.north.id]['wins'], 0)
+    
+    def test_cache_and_invalidation(self):
+        """Тест кэша формы и его сброса при записи результата"""
+        guide = get_form_guide(self.horse.id)
+        self.assertEqual(guide['days_since_last_run'], 10)
+        with self.assertNumQueries(0):
+            get_form_guide(self.horse.id)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self._start(self.STARTS)
+        self.assertEqual(get_form_guide(self.horse.id)['days_since_last_run'], 0)
+    
+    def test_horse_page(self):
+        """Тест блока формы на странице лошади"""
+        client = Client()
+        user = User.objects.create_user(username='user', password='test123')
+        UserProfile.objects.create(user=user, role='user')
+        client.force_login(user)
+        
+        response = client.get(reverse('horse_competitions', args=[self.horse.id]))
+        self.assertContains(response, 'Дней с последнего старта')
+        self.assertContains(response, 'Северный')
@@ -8,6 +8,8 @@ from django.contrib.auth.models import User
 from django.test import TestCase
 from django.utils import timezone
 from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from racing.forms import (
     HippodromeForm, OwnerForm, JockeyForm, HorseForm,
     CompetitionForm, ResultForm, UserRegistrationForm
@@ -393,6 +395,65 @@ class TestResultForm(BaseTestCase):
         self.assertIn('__all__', form.errors)
 
 
+class TestResultFormQueries(BaseTestCase):
+    """Тесты числа запросов при проверке ResultForm"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        hippodrome = Hippodrome.objects.create(name='Test', address='Test')
+        self.competition = Competition.objects.create(
+            hippodrome=hippodrome,
+            date=date.today() - timedelta(days=1),
+            time=time(14, 0)
+        )
+        self.owner = Owner.objects.create(name='Owner', address='Test', phone='+79991234567')
+        self.jockey = Jockey.objects.create(name='Jockey', address='Test', age=30, rating=5)
+    
+    def _fill(self, count):
+        """Добавляет count результатов с возрастающим временем"""
+        start = Result.objects.filter(competition=self.competition).count()
+        for position in range(start + 1, start + count + 1):
+            horse = Horse.objects.create(name=f'Horse {position}', gender='M', age=5, owner=self.owner)
+            Result.objects.create(
+                competition=self.competition,
+                horse=horse,
+                jockey=self.jockey,
+                position=position * 2,
+                time_result=timedelta(minutes=2, seconds=position)
+            )
+    
+    def _clean_queries(self, position, time_result):
+        horse = Horse.objects.create(name=f'New {position}', gender='M', age=5, owner=self.owner)
+        form = ResultForm(data={
+            'competition': self.competition.id,
+            'horse': horse.id,
+            'jockey': self.jockey.id,
+            'position': position,
+            'time_result': time_result,
+        })
+        with CaptureQueriesContext(connection) as queries:
+            form.is_valid()
+        return form, len(queries.captured_queries)
+    
+    def test_query_count_does_not_grow(self):
+        """Тест что число запросов не зависит от числа результатов в состязании"""
+        self._fill(2)
+        small_form, small = self._clean_queries(3, '02:01.500')
+        self.assertTrue(small_form.is_valid(), small_form.errors)
+        
+        self._fill(40)
+        large_form, large = self._clean_queries(5, '02:02.500')
+        self.assertTrue(large_form.is_valid(), large_form.errors)
+        self.assertEqual(small, large)
+    
+    def test_neighbor_time_checked_in_memory(self):
+        """Тест проверки времени относительно соседа с худшим местом"""
+        self._fill(3)
+        form, _ = self._clean_queries(3, '02:05.000')  # Медленнее места 4
+        self.assertFalse(form.is_valid())
+        self.assertIn('__all__', form.errors)
+
+
 class TestUserRegistrationForm(BaseTestCase):
     """Тесты для формы регистрации пользователя"""
     
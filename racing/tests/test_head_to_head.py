@@ -0,0 +1,144 @@
+"""
+Тесты личных встреч лошадей и жокеев
+Использует unittest
+"""
+from datetime import date, time, timedelta
+from django.contrib.auth.models import User
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.core.management import call_command
+from racing.models import UserProfile, Hippodrome, Owner, Jockey, Horse, Competition, Result
+from racing.head_to_head import build_head_to_head, get_head_to_head
+
+
+# Базовый класс с применением миграций
+try:
+    from racing.tests.test_base import BaseTestCase
+except ImportError:
+    # Если test_base.py не найден, используем встроенный класс
+    class BaseTestCase(TestCase):
+        """Базовый класс для тестов с применением миграций"""
+        @classmethod
+        def setUpClass(cls):
+            """Применяет миграции перед запуском тестов класса"""
+            super().setUpClass()
+            call_command('migrate', verbosity=0, interactive=False)
+
+
+class TestHeadToHead(BaseTestCase):
+    """Тесты расчета и кэширования личных встреч"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.hippodrome = Hippodrome.objects.create(name='Центральный', address='Test')
+        owner = Owner.objects.create(name='Owner', address='Test', phone='+79991234567')
+        self.horses = [
+            Horse.objects.create(name=f'Horse {i}', gender='M', age=5, owner=owner) for i in range(3)
+        ]
+        self.jockeys = [
+            Jockey.objects.create(name=f'Jockey {i}', address='Test', age=30, rating=5) for i in range(3)
+        ]
+        # Horse 0 и Horse 1 встречались дважды; Horse 2 бежал без Horse 1
+        self._race(date(2024, 5, 1), [0, 1], [timedelta(minutes=2), timedelta(minutes=2, seconds=2)])
+        self._race(date(2024, 6, 1), [1, 0], [timedelta(minutes=2, seconds=1), timedelta(minutes=2, seconds=2)])
+        self._race(date(2024, 7, 1), [2, 0], [timedelta(minutes=2), timedelta(minutes=2, seconds=3)])
+    
+    def _race(self, day, order, times):
+        competition = Competition.objects.create(hippodrome=self.hippodrome, date=day, time=time(14, 0))
+        for position, (index, time_result) in enumerate(zip(order, times), start=1):
+            Result.objects.create(
+                competition=competition,
+                horse=self.horses[index],
+                jockey=self.jockeys[index],
+                position=position,
+                time_result=time_result
+            )
+        return competition
+    
+    def test_shared_races(self):
+        """Тест общих состязаний и разрывов одним запросом"""
+        with self.assertNumQueries(1):
+            races = build_head_to_head('horse', self.horses[0].id, self.horses[1].id)
+        self.assertEqual([race['date'] for race in races], [date(2024, 6, 1), date(2024, 5, 1)])
+        self.assertEqual((races[1]['first_position'], races[1]['second_position']), (1, 2))
+        
+        comparison = get_head_to_head('horse', self.horses[0].id, self.horses[1].id)
+        self.assertEqual(comparison['meetings'], 2)
+        self.assertEqual((comparison['first_ahead'], comparison['second_ahead']), (1, 1))
+        self.assertEqual(comparison['races'][1]['gap'], timedelta(seconds=2))
+        self.assertEqual(comparison['average_gap'], timedelta(seconds=0.5))
+    
+    def test_pair_order(self):
+        """Тест что обратная пара зеркальна и берется из того же кэша"""
+        get_head_to_head('horse', self.horses[0].id, self.horses[1].id)
+        with self.assertNumQueries(0):
+            comparison = get_head_to_head('horse', self.horses[1].id, self.horses[0].id)
+        self.assertEqual(comparison['races'][1]['first_position'], 2)
+        self.assertEqual(comparison['average_gap'], timedelta(seconds=-0.5))
+    
+    def test_jockeys_and_no_meetings(self):
+        """Тест личных встреч жокеев и пары без общих состязаний"""
+        self.assertEqual(get_head_to_head('jockey', self.jockeys[2].id, self.jockeys[0].id)['first_ahead'], 1)
+        comparison = get_head_to_head('horse', self.horses[1].id, self.horses[2].id)
+        self.assertEqual(comparison['meetings'], 0)
+        self.assertIsNone(comparison['average_gap'])
+    
+    def test_invalidated_by_results(self):
+        """Тест что новый результат сбрасывает кэш пары"""
+        get_head_to_head('horse', self.horses[1].id, self.horses[2].id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self._race(date(2024, 8, 1), [1, 2], [timedelta(minutes=2), timedelta(minutes=2, seconds=1)])
+        self.assertEqual(get_head_to_head('horse', self.horses[1].id, self.horses[2].id)['meetings'], 1)
+
+
+class TestHeadToHeadViews(BaseTestCase):
+    """Тесты страницы и API личных встреч"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.client = Client()
+        user = User.objects.create_user(username='user', password='test123')
+        UserProfile.objects.create(user=user, role='user')
+        self.client.force_login(user)
+        hippodrome = Hippodrome.objects.create(name='Центральный', address='Test')
+        owner = Owner.objects.create(name='Owner', address='Test', phone='+79991234567')
+        self.first = Horse.objects.create(name='Zephyr', gender='M', age=5, owner=owner)
+        self.second = Horse.objects.create(name='Boreas', gender='M', age=5, owner=owner)
+        jockey = Jockey.objects.create(name='Jockey', address='Test', age=30, rating=5)
+        other = Jockey.objects.create(name='Other', address='Test', age=30, rating=5)
+        competition = Competition.objects.create(hippodrome=hippodrome, date=date(2024, 5, 1), time=time(14, 0))
+        Result.objects.create(competition=competition, horse=self.first, jockey=jockey, position=1,
+                              time_result=timedelta(minutes=2))
+        Result.objects.create(competition=competition, horse=self.second, jockey=other, position=2,
+                              time_result=timedelta(minutes=2, seconds=1, milliseconds=500))
+    
+    def test_page(self):
+        """Тест страницы сравнения"""
+        url = reverse('head_to_head', args=['horse'])
+        response = self.client.get(url, {'first': self.first.id, 'second': self.second.id})
+        self.assertContains(response, 'Общих состязаний:</strong> 1')
+        self.assertContains(response, '1.500')
+        
+        response = self.client.get(url, {'first': self.first.id})
+        self.assertNotContains(response, 'Общих состязаний')
+        self.assertNotContains(response, 'text-danger')
+    
+    def test_same_participant(self):
+        """Тест выбора одного и того же участника"""
+        url = reverse('head_to_head', args=['horse'])
+        response = self.client.get(url, {'first': self.first.id, 'second': self.first.id})
+        self.assertContains(response, 'Выберите двух разных участников.')
+    
+    def test_api(self):
+        """Тест JSON API личных встреч"""
+        url = reverse('api_head_to_head', args=['horse'])
+        data = self.client.get(url, {'first': self.second.id, 'second': self.first.id}).json()
+        self.assertEqual(data['first'], {'id': self.second.id, 'name': 'Boreas'})
+        self.assertEqual((data['first_ahead'], data['second_ahead']), (0, 1))
+        self.assertEqual(data['races'][0]['gap'], -1.5)
+        self.assertEqual(data['races'][0]['first_time'], '02:01.500')
+        
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(reverse('api_head_to_head', args=['owner'])).status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.get(url).status_code, 401)
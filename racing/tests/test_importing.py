@@ -0,0 +1,150 @@
+"""
+Тесты пакетного импорта протокола состязания
+Использует unittest
+"""
+import json
+from datetime import date, time, timedelta
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.core.management import call_command
+from racing.importing import ResultImportError, import_results, parse_rows
+from racing.models import (
+    UserProfile, Hippodrome, Owner, Jockey, Horse, Competition, Result, HorseStats
+)
+
+
+# Базовый класс с применением миграций
+try:
+    from racing.tests.test_base import BaseTestCase
+except ImportError:
+    # Если test_base.py не найден, используем встроенный класс
+    class BaseTestCase(TestCase):
+        """Базовый класс для тестов с применением миграций"""
+        @classmethod
+        def setUpClass(cls):
+            """Применяет миграции перед запуском тестов класса"""
+            super().setUpClass()
+            call_command('migrate', verbosity=0, interactive=False)
+
+
+class TestResultImport(BaseTestCase):
+    """Тесты для импорта протокола"""
+    
+    FIELD_SIZE = 20
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        hippodrome = Hippodrome.objects.create(name='Test', address='Test')
+        self.competition = Competition.objects.create(
+            hippodrome=hippodrome,
+            date=date.today() - timedelta(days=1),
+            time=time(14, 0)
+        )
+        owner = Owner.objects.create(name='Owner', address='Test', phone='+79991234567')
+        self.horses = [
+            Horse.objects.create(name=f'Horse {i}', gender='M', age=5, owner=owner)
+            for i in range(self.FIELD_SIZE)
+        ]
+        self.jockeys = [
+            Jockey.objects.create(name=f'Jockey {i}', address='Test', age=30, rating=5)
+            for i in range(self.FIELD_SIZE)
+        ]
+    
+    def _rows(self):
+        return [
+            {
+                'position': i + 1,
+                'horse': self.horses[i].id,
+                'jockey': self.jockeys[i].name,
+                'time_result': f'02:{10 + i:02d}.000',
+            }
+            for i in range(self.FIELD_SIZE)
+        ]
+    
+    def test_import_full_field(self):
+        """Тест импорта протокола на 20 участников постоянным числом запросов"""
+        with CaptureQueriesContext(connection) as queries:
+            created = import_results(self.competition, self._rows())
+        self.assertEqual(len(created), self.FIELD_SIZE)
+        self.assertEqual(Result.objects.filter(competition=self.competition).count(), self.FIELD_SIZE)
+        self.assertLess(len(queries.captured_queries), 15)
+        self.assertEqual(HorseStats.objects.get(horse=self.horses[0]).wins, 1)
+    
+    def test_import_updates_counter(self):
+        """Тест что массовая вставка обновляет счетчик результатов без сверки"""
+        from racing.counters import get_counts
+        Result.objects.create(
+            competition=Competition.objects.create(
+                hippodrome=self.competition.hippodrome, date=self.competition.date, time=time(9, 0)
+            ),
+            horse=self.horses[0], jockey=self.jockeys[0], position=1,
+            time_result=timedelta(minutes=2)
+        )
+        self.assertEqual(get_counts()['results'], 1)
+        import_results(self.competition, self._rows())
+        self.assertEqual(get_counts()['results'], self.FIELD_SIZE + 1)
+    
+    def test_import_rejects_whole_batch(self):
+        """Тест что при ошибке не записывается ни одна строка"""
+        rows = self._rows()
+        rows[5]['time_result'] = '01:00.000'  # Быстрее, чем у места 5
+        rows[7]['horse'] = self.horses[0].id  # Повтор лошади
+        with self.assertRaises(ResultImportError) as ctx:
+            import_results(self.competition, rows)
+        self.assertEqual(len(ctx.exception.errors), 2)
+        self.assertFalse(Result.objects.filter(competition=self.competition).exists())
+    
+    def test_import_checks_existing_results(self):
+        """Тест проверки против уже внесенных результатов"""
+        Result.objects.create(
+            competition=self.competition,
+            horse=self.horses[0],
+            jockey=self.jockeys[0],
+            position=1,
+            time_result=timedelta(minutes=2, seconds=10)
+        )
+        rows = self._rows()[1:]
+        rows[0]['position'] = 1
+        with self.assertRaises(ResultImportError):
+            import_results(self.competition, rows)
+    
+    def test_parse_csv_and_json(self):
+        """Тест разбора CSV и JSON"""
+        csv_rows = parse_rows(b'position,horse,jockey,time_result\n1,Horse 0,Jockey 0,02:10.000\n', 'p.csv')
+        json_rows = parse_rows(json.dumps({'results': self._rows()[:1]}), 'p.json')
+        self.assertEqual(csv_rows[0]['horse'], 'Horse 0')
+        self.assertEqual(json_rows[0]['position'], 1)
+        with self.assertRaises(ResultImportError):
+            parse_rows(b'position,horse\n1,Horse 0\n', 'p.csv')
+    
+    def test_parse_rejects_non_scalar_values(self):
+        """Тест что списки и объекты в полях JSON дают ошибку строки, а не 500"""
+        rows = self._rows()[:2]
+        rows[0]['horse'] = [1]
+        rows[1]['jockey'] = {'id': 1}
+        with self.assertRaises(ResultImportError) as context:
+            parse_rows(json.dumps(rows), 'p.json')
+        self.assertEqual(len(context.exception.errors), 2)
+        self.assertIn('Строка 1', context.exception.errors[0])
+        self.assertIn('Строка 2', context.exception.errors[1])
+    
+    def test_import_view(self):
+        """Тест загрузки протокола через страницу импорта"""
+        user = User.objects.create_user(username='admin', password='test123')
+        UserProfile.objects.create(user=user, role='admin')
+        client = Client()
+        client.force_login(user)
+        
+        upload = SimpleUploadedFile(
+            'protocol.json', json.dumps(self._rows()).encode(), content_type='application/json'
+        )
+        response = client.post(reverse('import_results'), {
+            'competition': self.competition.id,
+            'file': upload,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Result.objects.filter(competition=self.competition).count(), self.FIELD_SIZE)
@@ -131,6 +131,50 @@ class TestUserProfile(BaseTestCase):
         self.assertEqual(profile.get_jockey_age(), 35)
 
 
+class TestUserProfileProvisioning(BaseTestCase):
+    """Тесты создания профилей сигналами и командой заполнения пропусков"""
+    
+    def test_profile_created_on_commit(self):
+        """Тест создания профиля для нового пользователя"""
+        with self.captureOnCommitCallbacks(execute=True):
+            user = User.objects.create_user(username='newuser', password='test123')
+        self.assertEqual(UserProfile.objects.get(user=user).role, 'user')
+    
+    def test_existing_profile_kept(self):
+        """Тест что профиль, созданный вызывающим кодом, не перезаписывается"""
+        with self.captureOnCommitCallbacks(execute=True):
+            user = User.objects.create_user(username='admin', password='test123')
+            UserProfile.objects.create(user=user, role='admin')
+        self.assertEqual(UserProfile.objects.get(user=user).role, 'admin')
+    
+    def test_jockey_provisioned_for_jockey_role(self):
+        """Тест создания профиля жокея при назначении роли жокея"""
+        user = User.objects.create_user(
+            username='rider', password='test123', first_name='Иван', last_name='Петров'
+        )
+        profile = UserProfile.objects.create(user=user, role='jockey')
+        self.assertEqual(profile.jockey.name, 'Иван Петров')
+        self.assertEqual(UserProfile.objects.get(pk=profile.pk).jockey_id, profile.jockey.id)
+    
+    def test_backfill_command(self):
+        """Тест команды заполнения недостающих профилей"""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        for i in range(5):
+            User.objects.create_user(username=f'user{i}', password='test123')
+        # Роль жокея назначена в обход сигналов, профиль жокея не создан
+        rider = User.objects.create_user(username='rider', password='test123')
+        UserProfile.objects.create(user=rider, role='user')
+        UserProfile.objects.filter(user=rider).update(role='jockey')
+        
+        out = StringIO()
+        call_command('backfill_user_profiles', batch_size=2, stdout=out)
+        self.assertFalse(User.objects.filter(userprofile__isnull=True).exists())
+        self.assertIsNotNone(UserProfile.objects.get(user=rider).jockey)
+        self.assertIn('Создано профилей: 5, профилей жокеев: 1', out.getvalue())
+
+
 class TestHippodrome(BaseTestCase):
     """Тесты для модели Hippodrome"""
     
@@ -332,6 +376,48 @@ class TestResult(BaseTestCase):
         self.assertIn('Быстрый', str(result))
         self.assertIn('1 место', str(result))
     
+    def test_result_competition_start(self):
+        """Тест копирования времени начала состязания в результат"""
+        result = Result.objects.create(
+            competition=self.competition,
+            horse=self.horse,
+            jockey=self.jockey,
+            position=1,
+            time_result=timedelta(minutes=2, seconds=30)
+        )
+        self.assertEqual(result.competition_start, self.competition.get_start())
+        
+        # Перенос состязания обновляет копию в результатах
+        self.competition.date = date(2024, 2, 1)
+        self.competition.time = time(16, 30)
+        self.competition.save()
+        result.refresh_from_db()
+        self.assertEqual(result.competition_start.date(), date(2024, 2, 1))
+        self.assertEqual(result.competition_start.time(), time(16, 30))
+    
+    def test_result_save_keeps_competition_start(self):
+        """Тест что повторное сохранение не читает состязание без смены состязания"""
+        from unittest import mock
+        Result.objects.create(
+            competition=self.competition,
+            horse=self.horse,
+            jockey=self.jockey,
+            position=1,
+            time_result=timedelta(minutes=2, seconds=30)
+        )
+        result = Result.objects.get()
+        with mock.patch.object(Competition, 'get_start') as get_start:
+            result.position = 2
+            result.save()
+        get_start.assert_not_called()
+        
+        other = Competition.objects.create(
+            hippodrome=self.competition.hippodrome, date=date(2024, 3, 1), time=time(12, 0)
+        )
+        result.competition = other
+        result.save()
+        self.assertEqual(Result.objects.get().competition_start, other.get_start())
+    
     def test_result_unique_together(self):
         """Тест уникальности комбинации competition и position"""
         Result.objects.create(
@@ -401,3 +487,60 @@ class TestResult(BaseTestCase):
         )
         formatted = result.get_formatted_time()
         self.assertEqual(formatted, "00:45.250")
+
+
+class TestSiteCounters(BaseTestCase):
+    """Тесты счетчиков главной страницы"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.hippodrome = Hippodrome.objects.create(name='Test', address='Test')
+    
+    def _create_competition(self):
+        return Competition.objects.create(
+            hippodrome=self.hippodrome,
+            date=date.today(),
+            time=time(14, 0)
+        )
+    
+    def test_counters_follow_create_and_delete(self):
+        """Тест обновления счетчиков сигналами, включая каскадное удаление"""
+        from racing.counters import get_counts
+        
+        first = self._create_competition()
+        self._create_competition()
+        self.assertEqual(get_counts()['competitions'], 2)
+        
+        first.delete()
+        self.assertEqual(get_counts()['competitions'], 1)
+        
+        # Состязания удаляются каскадно вместе с ипподромом
+        self.hippodrome.delete()
+        self.assertEqual(get_counts()['competitions'], 0)
+    
+    def test_reconcile_command(self):
+        """Тест исправления расхождений командой сверки"""
+        from io import StringIO
+        from django.core.management import call_command
+        from racing.counters import get_counts
+        from racing.models import SiteCounter
+        
+        self._create_competition()
+        SiteCounter.objects.filter(pk='competitions').update(value=10)
+        
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.assertIn('competitions: 10 -> 1', out.getvalue())
+        self.assertEqual(get_counts()['competitions'], 1)
+    
+    def test_missing_counter_initialized(self):
+        """Тест инициализации удаленного счетчика при следующем изменении"""
+        from racing.counters import get_counts
+        from racing.models import SiteCounter
+        
+        self._create_competition()
+        SiteCounter.objects.all().delete()
+        self.assertEqual(get_counts()['competitions'], 1)
+        
+        self._create_competition()
+        self.assertEqual(SiteCounter.objects.get(pk='competitions').value, 2)
@@ -0,0 +1,115 @@
+"""
+Unit тесты для курсорной пагинации приложения racing
+Использует unittest
+"""
+from datetime import date, time, timedelta
+from django.db import connection
+from django.test import TestCase
+from django.core.management import call_command
+from racing.models import Hippodrome, Competition
+from racing.pagination import KeysetPaginator, InvalidCursor
+
+
+# Базовый класс с применением миграций
+try:
+    from racing.tests.test_base import BaseTestCase
+except ImportError:
+    # Если test_base.py не найден, используем встроенный класс
+    class BaseTestCase(TestCase):
+        """Базовый класс для тестов с применением миграций"""
+        @classmethod
+        def setUpClass(cls):
+            """Применяет миграции перед запуском тестов класса"""
+            super().setUpClass()
+            call_command('migrate', verbosity=0, interactive=False)
+
+
+class TestKeysetPaginator(BaseTestCase):
+    """Тесты для KeysetPaginator"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        hippodrome = Hippodrome.objects.create(name='Test', address='Test')
+        # Несколько состязаний в один день и время, чтобы проверить разрешение по id
+        for day in range(1, 6):
+            for _ in range(2):
+                Competition.objects.create(
+                    hippodrome=hippodrome,
+                    date=date(2024, 1, day),
+                    time=time(14, 0)
+                )
+        self.expected = list(
+            Competition.objects.order_by('-date', '-time', '-id').values_list('id', flat=True)
+        )
+        self.paginator = KeysetPaginator(
+            Competition.objects.all(),
+            ordering=('-date', '-time', '-id'),
+            page_size=3
+        )
+    
+    def test_forward_pagination_covers_all_rows(self):
+        """Тест прохода по всем страницам вперед без пропусков и повторов"""
+        seen = []
+        page = self.paginator.page()
+        self.assertFalse(page.has_previous)
+        while True:
+            seen.extend(obj.id for obj in page)
+            if not page.has_next:
+                break
+            page = self.paginator.page(after=page.next_cursor)
+        self.assertEqual(seen, self.expected)
+    
+    def test_backward_pagination(self):
+        """Тест возврата на предыдущую страницу"""
+        first = self.paginator.page()
+        second = self.paginator.page(after=first.next_cursor)
+        back = self.paginator.page(before=second.previous_cursor)
+        self.assertEqual([obj.id for obj in back], [obj.id for obj in first])
+        self.assertFalse(back.has_previous)
+        self.assertTrue(back.has_next)
+    
+    def test_invalid_cursor(self):
+        """Тест некорректного курсора"""
+        with self.assertRaises(InvalidCursor):
+            self.paginator.page(after='not-a-cursor')
+
+
+class TestKeysetQueryPlan(BaseTestCase):
+    """Проверка, что страница списка состязаний читается диапазоном индекса"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Загрузка синтетического набора состязаний"""
+        hippodrome = Hippodrome.objects.create(name='Test', address='Test')
+        Competition.objects.bulk_create([
+            Competition(
+                hippodrome=hippodrome,
+                date=date(2015, 1, 1) + timedelta(days=i // 3),
+                time=time(10 + i % 3, 0)
+            )
+            for i in range(3000)
+        ])
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+    
+    def test_deep_page_plan(self):
+        """Тест что страница после курсора не собирает и не сортирует все старые строки"""
+        paginator = KeysetPaginator(
+            Competition.objects.select_related('hippodrome'),
+            ordering=('-date', '-time', '-id'),
+            page_size=24
+        )
+        cursor = paginator.page().next_cursor
+        for queryset in (
+            paginator._page_queryset(after=cursor, before=None),
+            paginator._page_queryset(after=None, before=cursor),
+        ):
+            plan = queryset.explain()
+            if connection.vendor == 'postgresql':
+                self.assertNotIn('Sort', plan)
+                self.assertNotIn('BitmapOr', plan)
+            else:
+                self.assertNotIn('USE TEMP B-TREE', plan)
+                self.assertNotIn('MULTI-INDEX OR', plan)
+                self.assertIn('competition_keyset_idx', plan)
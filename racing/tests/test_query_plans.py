@@ -0,0 +1,146 @@
+"""
+Тесты планов запросов к Result на большом синтетическом наборе данных
+Использует unittest
+"""
+import json
+from datetime import date, time, timedelta
+from django.db import connection
+from django.test import TestCase
+from django.core.management import call_command
+from racing.models import Hippodrome, Owner, Jockey, Horse, Competition, Result
+
+
+# Базовый класс с применением миграций
+try:
+    from racing.tests.test_base import BaseTestCase
+except ImportError:
+    # Если test_base.py не найден, используем встроенный класс
+    class BaseTestCase(TestCase):
+        """Базовый класс для тестов с применением миграций"""
+        @classmethod
+        def setUpClass(cls):
+            """Применяет миграции перед запуском тестов класса"""
+            super().setUpClass()
+            call_command('migrate', verbosity=0, interactive=False)
+
+
+RESULT_TABLE = Result._meta.db_table
+
+
+def plan_problems(queryset):
+    """
+    Возвращает список проблем плана запроса:
+    'scan' - последовательное чтение таблицы результатов,
+    'sort' - отдельная сортировка вместо чтения в порядке индекса.
+    """
+    problems = set()
+    if connection.vendor == 'postgresql':
+        nodes = json.loads(queryset.explain(format='json'))
+        stack = [nodes[0]['Plan']]
+        while stack:
+            node = stack.pop()
+            if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') == RESULT_TABLE:
+                problems.add('scan')
+            if node['Node Type'] in ('Sort', 'Incremental Sort'):
+                problems.add('sort')
+            stack.extend(node.get('Plans', []))
+    else:
+        for line in queryset.explain().splitlines():
+            detail = line.split(' ', 3)[-1]
+            if detail.startswith(f'SCAN {RESULT_TABLE}'):
+                problems.add('scan')
+            if 'USE TEMP B-TREE' in detail:
+                problems.add('sort')
+    return problems
+
+
+class TestResultQueryPlans(BaseTestCase):
+    """Проверка, что запросы к Result обслуживаются индексами"""
+    
+    COMPETITIONS = 500
+    HORSES = 200
+    JOCKEYS = 50
+    FIELD_SIZE = 10
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Загрузка синтетического набора данных"""
+        hippodrome = Hippodrome.objects.create(name='Test', address='Test')
+        owner = Owner.objects.create(name='Owner', address='Test', phone='+79991234567')
+        competitions = Competition.objects.bulk_create([
+            Competition(
+                hippodrome=hippodrome,
+                date=date(2015, 1, 1) + timedelta(days=i),
+                time=time(14, 0)
+            )
+            for i in range(cls.COMPETITIONS)
+        ])
+        horses = Horse.objects.bulk_create([
+            Horse(name=f'Horse {i}', gender='M', age=5, owner=owner)
+            for i in range(cls.HORSES)
+        ])
+        jockeys = Jockey.objects.bulk_create([
+            Jockey(name=f'Jockey {i}', address='Test', age=30, rating=5)
+            for i in range(cls.JOCKEYS)
+        ])
+        Result.objects.bulk_create([
+            Result(
+                competition=competition,
+                horse=horses[(index * 7 + position) % cls.HORSES],
+                jockey=jockeys[(index + position) % cls.JOCKEYS],
+                position=position + 1,
+                time_result=timedelta(minutes=2, seconds=position),
+                competition_start=competition.get_start()
+            )
+            for index, competition in enumerate(competitions)
+            for position in range(cls.FIELD_SIZE)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cls.competition = competitions[cls.COMPETITIONS // 2]
+        cls.horse = horses[3]
+        cls.jockey = jockeys[3]
+    
+    def assertIndexOnly(self, queryset):
+        """Проверяет отсутствие последовательного чтения и сортировки"""
+        problems = plan_problems(queryset)
+        self.assertFalse(problems, f'{problems}: {queryset.explain()}')
+    
+    def test_jockey_history_plan(self):
+        """История жокея читается по индексу (jockey, competition_start) без сортировки"""
+        queryset = (
+            Result.objects.filter(jockey=self.jockey)
+            .select_related('competition', 'horse')
+            .order_by('-competition_start', '-id')
+        )
+        self.assertIndexOnly(queryset)
+    
+    def test_horse_history_plan(self):
+        """История лошади читается по индексу (horse, competition_start) без сортировки"""
+        queryset = (
+            Result.objects.filter(horse=self.horse)
+            .select_related('competition', 'jockey')
+            .order_by('-competition_start', '-id')
+        )
+        self.assertIndexOnly(queryset)
+    
+    def test_duplicate_horse_probe_plan(self):
+        """Проверка участия лошади в состязании"""
+        self.assertIndexOnly(
+            Result.objects.filter(competition=self.competition, horse=self.horse)
+        )
+    
+    def test_duplicate_position_probe_plan(self):
+        """Проверка занятости места"""
+        self.assertIndexOnly(
+            Result.objects.filter(competition=self.competition, position=3)
+        )
+    
+    def test_neighbor_probe_plans(self):
+        """Поиск соседей по месту"""
+        self.assertIndexOnly(
+            Result.objects.filter(competition=self.competition, position__lt=5).order_by('-position')[:1]
+        )
+        self.assertIndexOnly(
+            Result.objects.filter(competition=self.competition, position__gt=5).order_by('position')[:1]
+        )
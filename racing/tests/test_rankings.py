@@ -0,0 +1,188 @@
+"""
+Тесты рейтингов лошадей и жокеев за окна времени
+Использует unittest
+"""
+from datetime import date, time, timedelta
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.core.management import call_command
+from racing.models import (
+    UserProfile, Hippodrome, Owner, Jockey, Horse, Competition, Result, HorseRanking, JockeyRanking
+)
+from racing.rankings import rebuild_rankings
+
+
+# Базовый класс с применением миграций
+try:
+    from racing.tests.test_base import BaseTestCase
+except ImportError:
+    # Если test_base.py не найден, используем встроенный класс
+    class BaseTestCase(TestCase):
+        """Базовый класс для тестов с применением миграций"""
+        @classmethod
+        def setUpClass(cls):
+            """Применяет миграции перед запуском тестов класса"""
+            super().setUpClass()
+            call_command('migrate', verbosity=0, interactive=False)
+
+
+class TestRankings(BaseTestCase):
+    """Тесты пересчета рейтингов"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.central = Hippodrome.objects.create(name='Центральный', address='Test')
+        self.north = Hippodrome.objects.create(name='Северный', address='Test')
+        owner = Owner.objects.create(name='Owner', address='Test', phone='+79991234567')
+        self.horses = [
+            Horse.objects.create(name=f'Horse {i}', gender='M', age=5, owner=owner) for i in range(3)
+        ]
+        self.jockeys = [
+            Jockey.objects.create(name=f'Jockey {i}', address='Test', age=30, rating=5) for i in range(3)
+        ]
+        recent = timezone.localdate() - timedelta(days=10)
+        # Два старых старта на Центральном: побеждает Horse 0; свежий на Северном: Horse 1
+        self._race(self.central, date(2023, 5, 1), [0, 1, 2])
+        self._race(self.central, date(2023, 6, 1), [0, 2, 1])
+        self._race(self.north, recent, [1, 0, 2])
+    
+    def _race(self, hippodrome, day, order):
+        competition = Competition.objects.create(
+            hippodrome=hippodrome, date=day, time=time(14, 0), name=f'Кубок {day}'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            for position, index in enumerate(order, start=1):
+                Result.objects.create(
+                    competition=competition,
+                    horse=self.horses[index],
+                    jockey=self.jockeys[index],
+                    position=position,
+                    time_result=timedelta(minutes=2, seconds=position)
+                )
+        return competition
+    
+    def _row(self, window, horse):
+        return HorseRanking.objects.get(window=window, horse=horse)
+    
+    def test_windows(self):
+        """Тест показателей и мест в разных окнах"""
+        leader = self._row('all', self.horses[0])
+        self.assertEqual((leader.rank, leader.starts, leader.wins, leader.podiums), (1, 3, 2, 3))
+        self.assertAlmostEqual(leader.win_rate, 200 / 3)
+        self.assertAlmostEqual(leader.average_position, 4 / 3)
+        
+        self.assertEqual(self._row('recent', self.horses[1]).rank, 1)
+        self.assertEqual(self._row('recent', self.horses[0]).rank, 2)
+        self.assertEqual(self._row('season:2023', self.horses[0]).starts, 2)
+        self.assertEqual(self._row(f'hippodrome:{self.north.id}', self.horses[1]).rank, 1)
+        self.assertFalse(HorseRanking.objects.filter(window=f'hippodrome:{self.north.id}', starts=2).exists())
+        self.assertEqual(JockeyRanking.objects.get(window='all', jockey=self.jockeys[0]).rank, 1)
+    
+    def test_incremental_matches_rebuild(self):
+        """Тест что инкрементальный пересчет совпадает с полной пересборкой"""
+        result = Result.objects.get(horse=self.horses[2], position=3, competition__date=date(2023, 5, 1))
+        with self.captureOnCommitCallbacks(execute=True):
+            result.delete()
+        self._race(self.north, date(2024, 1, 1), [2, 1])
+        
+        fields = ('window', 'horse_id', 'starts', 'wins', 'podiums', 'rank')
+        incremental = sorted(HorseRanking.objects.values_list(*fields))
+        rebuild_rankings()
+        self.assertEqual(incremental, sorted(HorseRanking.objects.values_list(*fields)))
+        self.assertEqual(self._row('season:2024', self.horses[2]).rank, 1)
+    
+    def test_incremental_matches_rebuild_with_ties(self):
+        """Тест мест при переранжировании диапазона: серия стартов с равными показателями"""
+        import random
+        owner = self.horses[0].owner
+        for i in range(3, 8):
+            self.horses.append(Horse.objects.create(name=f'Horse {i}', gender='M', age=5, owner=owner))
+            self.jockeys.append(Jockey.objects.create(name=f'Jockey {i}', address='Test', age=30, rating=5))
+        generator = random.Random(7)
+        fields = ('window', 'horse_id', 'starts', 'wins', 'podiums', 'rank')
+        for day in range(1, 7):
+            order = generator.sample(range(len(self.horses)), generator.randint(2, 5))
+            self._race(self.central, date(2024, 3, day), order)
+            if day % 3 == 0:
+                with self.captureOnCommitCallbacks(execute=True):
+                    Result.objects.filter(competition__date=date(2024, 3, day - 1)).first().delete()
+            incremental = sorted(HorseRanking.objects.values_list(*fields))
+            rebuild_rankings()
+            self.assertEqual(incremental, sorted(HorseRanking.objects.values_list(*fields)), day)
+    
+    def test_refresh_keeps_ranks_outside_range(self):
+        """Тест что строки выше затронутого диапазона не переранжируются"""
+        HorseRanking.objects.filter(window='all', horse=self.horses[0]).update(rank=99)
+        competition = Competition.objects.create(hippodrome=self.central, date=date(2023, 7, 1), time=time(14, 0))
+        with self.captureOnCommitCallbacks(execute=True):
+            Result.objects.create(
+                competition=competition, horse=self.horses[2], jockey=self.jockeys[2],
+                position=4, time_result=timedelta(minutes=3)
+            )
+        self.assertEqual(self._row('all', self.horses[0]).rank, 99)
+        self.assertEqual(self._row('all', self.horses[2]).rank, 3)
+    
+    def test_competition_move_changes_windows(self):
+        """Тест что перенос состязания переносит результаты между окнами"""
+        competition = Competition.objects.get(date=date(2023, 6, 1))
+        competition.date = date(2022, 6, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            competition.save()
+        self.assertEqual(self._row('season:2023', self.horses[0]).starts, 1)
+        self.assertEqual(self._row('season:2022', self.horses[0]).starts, 1)
+    
+    def test_import_refreshes_rankings(self):
+        """Тест пересчета рейтингов после импорта протокола"""
+        from racing.importing import import_results
+        
+        competition = Competition.objects.create(
+            hippodrome=self.north, date=timezone.localdate() - timedelta(days=1), time=time(14, 0)
+        )
+        rows = [
+            {'position': 1, 'horse': self.horses[2].id, 'jockey': self.jockeys[2].name, 'time_result': '02:00.000'},
+            {'position': 2, 'horse': self.horses[1].id, 'jockey': self.jockeys[1].name, 'time_result': '02:01.000'},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            import_results(competition, rows)
+        self.assertEqual(self._row('recent', self.horses[2]).wins, 1)
+        self.assertEqual(self._row(f'hippodrome:{self.north.id}', self.horses[1]).starts, 2)
+    
+    def test_rebuild_single_kind(self):
+        """Тест пересборки одного вида окон"""
+        HorseRanking.objects.filter(window='recent').delete()
+        created = rebuild_rankings(['recent'])
+        self.assertEqual(created['horseranking'], 3)
+        self.assertEqual(self._row('recent', self.horses[1]).rank, 1)
+        self.assertTrue(HorseRanking.objects.filter(window='all').exists())
+
+
+class TestRankingView(BaseTestCase):
+    """Тесты страницы рейтинга"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.client = Client()
+        user = User.objects.create_user(username='user', password='test123')
+        UserProfile.objects.create(user=user, role='user')
+        self.client.force_login(user)
+        self.jockey = Jockey.objects.create(name='Лидер', address='Test', age=30, rating=5)
+        JockeyRanking.objects.create(jockey=self.jockey, window='season:2024', starts=4, wins=2, rank=1)
+    
+    def test_page_reads_rankings_only(self):
+        """Тест что страница не агрегирует таблицу результатов"""
+        url = reverse('ranking_list', args=['jockey'])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'window': 'season:2024'})
+        self.assertContains(response, 'Лидер')
+        self.assertContains(response, 'Сезон 2024')
+        self.assertFalse([query for query in queries if 'racing_result' in query['sql']])
+    
+    def test_unknown_window(self):
+        """Тест неизвестного окна и раздела"""
+        url = reverse('ranking_list', args=['jockey'])
+        self.assertEqual(self.client.get(url, {'window': 'season:1900'}).status_code, 404)
+        self.assertEqual(self.client.get(reverse('ranking_list', args=['owner'])).status_code, 404)
@@ -0,0 +1,125 @@
+"""
+Тесты поиска по лошадям, жокеям, владельцам и состязаниям
+Использует unittest
+"""
+from datetime import date, time
+from django.contrib.auth.models import User
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.core.management import call_command
+from racing.models import UserProfile, Hippodrome, Owner, Jockey, Horse, Competition
+from racing.search import search
+
+
+# Базовый класс с применением миграций
+try:
+    from racing.tests.test_base import BaseTestCase
+except ImportError:
+    # Если test_base.py не найден, используем встроенный класс
+    class BaseTestCase(TestCase):
+        """Базовый класс для тестов с применением миграций"""
+        @classmethod
+        def setUpClass(cls):
+            """Применяет миграции перед запуском тестов класса"""
+            super().setUpClass()
+            call_command('migrate', verbosity=0, interactive=False)
+
+
+class TestSearch(BaseTestCase):
+    """Тесты индекса поиска и его синхронизации с таблицами"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.owner = Owner.objects.create(name='Громов Петр', address='Test', phone='+79991234567')
+        self.horse = Horse.objects.create(name='Гром', gender='M', age=5, owner=self.owner)
+        self.other = Horse.objects.create(name='Громовержец', gender='M', age=4, owner=self.owner)
+        self.jockey = Jockey.objects.create(name='Иван Громов', address='Test', age=30, rating=5)
+        hippodrome = Hippodrome.objects.create(name='Центральный', address='Test')
+        self.competition = Competition.objects.create(
+            hippodrome=hippodrome, date=date(2024, 5, 1), time=time(14, 0), name='Кубок грома'
+        )
+    
+    def _found(self, query):
+        return [(result['kind'], result['id']) for result in search(query)]
+    
+    def test_all_kinds_found(self):
+        """Тест что поиск находит объекты всех видов"""
+        found = self._found('гром')
+        self.assertIn(('horse', self.horse.id), found)
+        self.assertIn(('horse', self.other.id), found)
+        self.assertIn(('jockey', self.jockey.id), found)
+        self.assertIn(('owner', self.owner.id), found)
+        self.assertIn(('competition', self.competition.id), found)
+    
+    def test_ranking(self):
+        """Тест что более полное совпадение стоит выше"""
+        found = self._found('Громовержец')
+        self.assertEqual(found[0], ('horse', self.other.id))
+    
+    def test_typo_tolerated(self):
+        """Тест поиска с опечаткой"""
+        self.assertIn(('horse', self.other.id), self._found('Громавержец'))
+    
+    def test_short_query_prefix(self):
+        """Тест запроса короче триграммы"""
+        horse = Horse.objects.create(name='Zephyr', gender='M', age=5, owner=self.owner)
+        found = self._found('ze')
+        self.assertEqual(found, [('horse', horse.id)])
+    
+    def test_index_follows_writes(self):
+        """Тест синхронизации индекса при изменении и удалении"""
+        self.horse.name = 'Буран'
+        self.horse.save()
+        self.assertIn(('horse', self.horse.id), self._found('Буран'))
+        self.assertNotIn(('horse', self.horse.id), self._found('Гром'))
+        
+        horse_id = self.horse.id
+        self.horse.delete()
+        self.assertNotIn(('horse', horse_id), self._found('Буран'))
+    
+    def test_trigram_indexes(self):
+        """Тест SQL триграммных индексов для PostgreSQL и замены на других СУБД"""
+        from django.db import connection
+        from django.db.backends.postgresql.base import DatabaseWrapper
+        
+        index = next(index for index in Horse._meta.indexes if index.name == 'racing_horse_name_trgm')
+        postgres = DatabaseWrapper({'NAME': 'racing', 'ENGINE': 'django.db.backends.postgresql'})
+        editor = postgres.schema_editor(collect_sql=True, atomic=False)
+        self.assertIn('USING gin ("name" gin_trgm_ops)', str(index.create_sql(Horse, editor)))
+        
+        editor = connection.schema_editor(collect_sql=True, atomic=False)
+        self.assertNotIn('gin', str(index.create_sql(Horse, editor)).lower())
+    
+    def test_empty_query(self):
+        """Тест пустого запроса"""
+        self.assertEqual(search('   '), [])
+
+
+class TestSearchView(BaseTestCase):
+    """Тесты страницы поиска"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.client = Client()
+        user = User.objects.create_user(username='user', password='test123')
+        UserProfile.objects.create(user=user, role='user')
+        self.client.force_login(user)
+        owner = Owner.objects.create(name='Owner', address='Test', phone='+79991234567')
+        self.horse = Horse.objects.create(name='Zephyr', gender='M', age=5, owner=owner)
+    
+    def test_results_link_to_pages(self):
+        """Тест ссылок на страницы найденных объектов"""
+        response = self.client.get(reverse('search'), {'q': 'zephyr'})
+        self.assertContains(response, reverse('horse_competitions', args=[self.horse.id]))
+        self.assertContains(response, 'Лошадь')
+    
+    def test_nothing_found(self):
+        """Тест пустой выдачи"""
+        response = self.client.get(reverse('search'), {'q': 'Неизвестно'})
+        self.assertContains(response, 'Ничего не найдено')
+    
+    def test_requires_login(self):
+        """Тест что анонимный пользователь перенаправляется на вход"""
+        self.client.logout()
+        response = self.client.get(reverse('search'), {'q': 'zephyr'})
+        self.assertEqual(response.status_code, 302)
@@ -0,0 +1,267 @@
+"""
+Тесты предфоркового сервера приложения и команды serve
+Использует unittest
+"""
+import asyncio
+import http.client
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import unittest
+from django.core.management import call_command, CommandError
+from racing.server import PreforkServer, BadRequest, read_request
+from racing.management.commands.serve import parse_addrport
+
+
+def wsgi_app(environ, start_response):
+    """Отвечает pid рабочего процесса; ?sleep=N - ответ с задержкой"""
+    if environ.get('QUERY_STRING', '').startswith('sleep='):
+        time.sleep(float(environ['QUERY_STRING'].split('=')[1]))
+    body = str(os.getpid()).encode()
+    start_response('200 OK', [('Content-Type', 'text/plain'), ('Content-Length', str(len(body)))])
+    return [body]
+
+
+async def asgi_app(scope, receive, send):
+    """Отвечает pid рабочего процесса и телом запроса"""
+    message = await receive()
+    body = f'{os.getpid()}:{scope["path"]}:'.encode() + message['body']
+    await send({'type': 'http.response.start', 'status': 200, 'headers': [(b'content-type', b'text/plain')]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def _request(port, path='/', method='GET', body=None):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    try:
+        connection.request(method, path, body=body)
+        response = connection.getresponse()
+        return response.status, response.read().decode()
+    finally:
+        connection.close()
+
+
+class TestReadRequest(unittest.TestCase):
+    """Тесты разбора HTTP-запроса в ASGI-процессе"""
+    
+    def _read(self, raw, max_body_size=None):
+        async def read():
+            reader = asyncio.StreamReader()
+            reader.feed_data(raw)
+            reader.feed_eof()
+            return await read_request(reader, max_body_size)
+        return asyncio.run(read())
+    
+    def test_scope(self):
+        """Тест пути, строки запроса, заголовков и тела"""
+        scope, body = self._read(
+            b'POST /search/%D0%B0?q=1 HTTP/1.1\r\nHost: x\r\nContent-Length: 4\r\n\r\nabcd'
+        )
+        self.assertEqual(scope['method'], 'POST')
+        self.assertEqual(scope['path'], '/search/а')
+        self.assertEqual(scope['query_string'], b'q=1')
+        self.assertIn((b'host', b'x'), scope['headers'])
+        self.assertEqual(body, b'abcd')
+    
+    def test_closed_connection(self):
+        """Тест соединения, закрытого без запроса"""
+        self.assertIsNone(self._read(b''))
+    
+    def test_bad_requests(self):
+        """Тест отказа в некорректных запросах"""
+        for raw, status in (
+            (b'GARBAGE\r\n\r\n', 400),
+            (b'GET / HTTP/2\r\n\r\n', 505),
+            (b'GET / HTTP/1.1\r\nContent-Length: x\r\n\r\n', 400),
+            (b'POST / HTTP/1.1\r\nTransfer-Encoding: gzip\r\n\r\n', 501),
+            (b'POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\nContent-Length: 3\r\n\r\n3\r\nabc\r\n0\r\n\r\n', 400),
+            (b'POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\nzz\r\n', 400),
+            (b'POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n3\r\nabcd\r\n', 400),
+            (b'POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n3\r\nabc\r\n', 400),
+            (b'GET / HTTP/1.1\r\nContent-Length: 10\r\n\r\nabc', 400),
+            (b'GET / HTTP/1.1\r\nHost: x\r\n', 400),
+        ):
+            with self.assertRaises(BadRequest) as context:
+                self._read(raw)
+            self.assertEqual(context.exception.status, status, raw)
+    
+    def test_body_too_large(self):
+        """Тест отказа в теле больше допустимого до его чтения"""
+        raw = b'POST / HTTP/1.1\r\nContent-Length: 4\r\n\r\n'
+        with self.assertRaises(BadRequest) as context:
+            self._read(raw, max_body_size=3)
+        self.assertEqual(context.exception.status, 413)
+        self.assertEqual(self._read(raw + b'abcd', max_body_size=4)[1], b'abcd')
+    
+    def test_chunked_body(self):
+        """Тест сборки chunked-тела: приложение видит Content-Length вместо Transfer-Encoding"""
+        raw = (
+            b'POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n'
+            b'3;ext=1\r\nabc\r\nA\r\n0123456789\r\n0\r\nX-Trailer: 1\r\n\r\n'
+        )
+        scope, body = self._read(raw)
+        self.assertEqual(body, b'abc0123456789')
+        self.assertIn((b'content-length', b'13'), scope['headers'])
+        self.assertNotIn(b'transfer-encoding', dict(scope['headers']))
+        with self.assertRaises(BadRequest) as context:
+            self._read(raw, max_body_size=12)
+        self.assertEqual(context.exception.status, 413)
+
+
+class TestPreforkServer(unittest.TestCase):
+    """Тесты пула рабочих процессов"""
+    
+    def setUp(self):
+        """Журнал запросов рабочих процессов в выводе тестов не нужен"""
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+    
+    def _start(self, app, interface, **kwargs):
+        server = PreforkServer(app, interface, '127.0.0.1', 0, graceful_timeout=5, **kwargs)
+        _, port = server.bind()
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                server.run()
+                status = 0
+            finally:
+                os._exit(status)
+        server.socket.close()
+        self.addCleanup(self._kill, pid)
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                _request(port)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+        return pid, port
+    
+    def _kill(self, pid):
+        try:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        except (ProcessLookupError, ChildProcessError):
+            pass
+    
+    def _stop(self, pid):
+        os.kill(pid, signal.SIGTERM)
+        _, status = os.waitpid(pid, 0)
+        return os.waitstatus_to_exitcode(status)
+    
+    def test_workers_recycled(self):
+        """Тест что рабочие процессы заменяются после max_requests запросов"""
+        master, port = self._start(wsgi_app, 'wsgi', workers=2, max_requests=2)
+        pids = {_request(port)[1] for _ in range(8)}
+        self.assertGreater(len(pids), 2)
+        self.assertNotIn(str(master), pids)
+        self.assertEqual(self._stop(master), 0)
+    
+    def test_asgi_worker(self):
+        """Тест ASGI-процесса: путь и тело запроса доходят до приложения"""
+        master, port = self._start(asgi_app, 'asgi', workers=1)
+        status, body = _request(port, '/echo/', method='POST', body=b'payload')
+        self.assertEqual(status, 200)
+        self.assertTrue(body.endswith(':/echo/:payload'))
+        self.assertEqual(self._stop(master), 0)
+    
+    def test_asgi_keep_alive(self):
+        """Тест нескольких запросов, в том числе с chunked-телом, в одном соединении"""
+        master, port = self._start(asgi_app, 'asgi', workers=1)
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        try:
+            bodies = []
+            for path, body in (('/first/', b'one'), ('/second/', iter([b'tw', b'o']))):
+                connection.request('POST', path, body=body, encode_chunked=not isinstance(body, bytes))
+                response = connection.getresponse()
+                self.assertEqual(response.status, 200)
+                self.assertIsNone(response.getheader('Connection'))
+                bodies.append(response.read().decode())
+        finally:
+            connection.close()
+        self.assertTrue(bodies[0].endswith(':/first/:one'))
+        self.assertTrue(bodies[1].endswith(':/second/:two'))
+        # Оба запроса обслужил один процесс через одно соединение
+        self.assertEqual(bodies[0].split(':')[0], bodies[1].split(':')[0])
+        self.assertEqual(self._stop(master), 0)
+    
+    def test_asgi_pipelined_requests(self):
+        """Тест двух конвейерных запросов: ответы по порядку, затем закрытие по Connection: close"""
+        master, port = self._start(asgi_app, 'asgi', workers=1)
+        with socket.create_connection(('127.0.0.1', port), timeout=10) as client:
+            client.sendall(
+                b'POST /first/ HTTP/1.1\r\nHost: x\r\nContent-Length: 3\r\n\r\none'
+                b'POST /second/ HTTP/1.1\r\nHost: x\r\nConnection: close\r\n'
+                b'Transfer-Encoding: chunked\r\n\r\n3\r\ntwo\r\n0\r\n\r\n'
+            )
+            # Сервер закрывает соединение после ответа на запрос с Connection: close
+            data = b''.join(iter(lambda: client.recv(65536), b''))
+        first, second = [response.partition(b'\r\n\r\n') for response in data.split(b'HTTP/1.1 ')[1:]]
+        self.assertTrue(first[0].startswith(b'200 '))
+        self.assertTrue(second[0].startswith(b'200 '))
+        self.assertNotIn(b'connection: close', first[0])
+        self.assertIn(b'connection: close', second[0])
+        # Первый ответ без Content-Length передан chunked, второй завершается закрытием
+        self.assertTrue(first[2].endswith(b':/first/:one\r\n0\r\n\r\n'))
+        self.assertTrue(second[2].endswith(b':/second/:two'))
+        self.assertEqual(self._stop(master), 0)
+    
+    def test_idle_connection_times_out(self):
+        """Тест что молчащее соединение не занимает единственный процесс дольше таймаута"""
+        for interface, app in (('wsgi', wsgi_app), ('asgi', asgi_app)):
+            with self.subTest(interface=interface):
+                master, port = self._start(app, interface, workers=1, timeout=0.5)
+                with socket.create_connection(('127.0.0.1', port)) as idle:
+                    idle.sendall(b'GET / HTTP/1.1\r\n')
+                    started = time.monotonic()
+                    self.assertEqual(_request(port)[0], 200)
+                    self.assertLess(time.monotonic() - started, 5)
+                    # Сервер сам закрывает соединение (ASGI - с ответом 408)
+                    idle.settimeout(5)
+                    self.assertIn(idle.recv(1024)[:12], (b'', b'HTTP/1.1 408'))
+                self.assertEqual(self._stop(master), 0)
+    
+    def test_body_too_large(self):
+        """Тест ответа 413 на тело больше max_body_size"""
+        for interface, app in (('wsgi', wsgi_app), ('asgi', asgi_app)):
+            with self.subTest(interface=interface):
+                master, port = self._start(app, interface, workers=1, max_body_size=4)
+                self.assertEqual(_request(port, method='POST', body=b'payload')[0], 413)
+                self.assertEqual(_request(port, method='POST', body=b'pay')[0], 200)
+                self.assertEqual(self._stop(master), 0)
+    
+    def test_graceful_shutdown(self):
+        """Тест что начатый запрос завершается после SIGTERM"""
+        master, port = self._start(wsgi_app, 'wsgi', workers=1)
+        responses = []
+        client = threading.Thread(target=lambda: responses.append(_request(port, '/?sleep=0.5')))
+        client.start()
+        time.sleep(0.2)
+        self.assertEqual(self._stop(master), 0)
+        client.join()
+        self.assertEqual(responses[0][0], 200)
+        with self.assertRaises(OSError):
+            _request(port)
+
+
+class TestServeCommand(unittest.TestCase):
+    """Тесты разбора параметров команды serve"""
+    
+    def test_parse_addrport(self):
+        """Тест форматов адреса"""
+        self.assertEqual(parse_addrport('0.0.0.0:8000'), ('0.0.0.0', 8000))
+        self.assertEqual(parse_addrport('8080'), ('127.0.0.1', 8080))
+        self.assertEqual(parse_addrport('[::1]:8000'), ('::1', 8000))
+        for value in ('localhost', '0.0.0.0:http', '1.2.3.4:70000'):
+            with self.assertRaises(CommandError):
+                parse_addrport(value)
+    
+    def test_invalid_workers(self):
+        """Тест отказа без рабочих процессов"""
+        with self.assertRaises(CommandError):
+            call_command('serve', '127.0.0.1:0', workers=0)
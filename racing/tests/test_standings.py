@@ -0,0 +1,117 @@
+"""
+Тесты турнирных таблиц за все время и по сезонам
+Использует unittest
+"""
+from datetime import date, time, timedelta
+from django.test import TestCase
+from django.urls import reverse
+from django.core.management import call_command
+from racing.models import Hippodrome, Owner, Jockey, Horse, Competition, Result, Standing
+from racing.standings import get_leaders, refresh_standings
+
+
+# Базовый класс с применением миграций
+try:
+    from racing.tests.test_base import BaseTestCase
+except ImportError:
+    # Если test_base.py не найден, используем встроенный класс
+    class BaseTestCase(TestCase):
+        """Базовый класс для тестов с применением миграций"""
+        @classmethod
+        def setUpClass(cls):
+            """Применяет миграции перед запуском тестов класса"""
+            super().setUpClass()
+            call_command('migrate', verbosity=0, interactive=False)
+
+
+class TestStandings(BaseTestCase):
+    """Тесты обновления и чтения турнирных таблиц"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.hippodrome = Hippodrome.objects.create(name='Центральный', address='Test')
+        owner = Owner.objects.create(name='Owner', address='Test', phone='+79991234567')
+        self.horses = [
+            Horse.objects.create(name=f'Horse {i}', gender='M', age=5, owner=owner) for i in range(2)
+        ]
+        self.jockeys = [
+            Jockey.objects.create(name=f'Jockey {i}', address='Test', age=30, rating=5) for i in range(2)
+        ]
+        self._race(date(2023, 5, 1), [0, 1])
+        self._race(date(2024, 5, 1), [1, 0])
+        self._race(date(2024, 6, 1), [1, 0])
+    
+    def _race(self, day, order):
+        competition = Competition.objects.create(hippodrome=self.hippodrome, date=day, time=time(14, 0))
+        for position, index in enumerate(order, start=1):
+            Result.objects.create(
+                competition=competition,
+                horse=self.horses[index],
+                jockey=self.jockeys[index],
+                position=position,
+                time_result=timedelta(minutes=2, seconds=position)
+            )
+    
+    def _row(self, subject, subject_id, season):
+        return Standing.objects.get(subject=subject, subject_id=subject_id, season=season)
+    
+    def test_refresh(self):
+        """Тест пересчета таблиц за все время и по сезонам"""
+        refresh_standings()
+        leader = self._row('horse', self.horses[1].id, Standing.ALL_TIME_SEASON)
+        self.assertEqual((leader.rank, leader.starts, leader.wins, leader.podiums), (1, 3, 2, 3))
+        self.assertEqual(leader.best_time, timedelta(minutes=2, seconds=1))
+        self.assertEqual(leader.name, 'Horse 1')
+        self.assertEqual(self._row('horse', self.horses[0].id, 2023).rank, 1)
+        self.assertEqual(self._row('jockey', self.jockeys[1].id, 2024).wins, 2)
+        self.assertFalse(Standing.objects.filter(season=2025).exists())
+    
+    def test_refresh_replaces_rows(self):
+        """Тест что повторное обновление отражает удаленные результаты"""
+        refresh_standings()
+        Result.objects.filter(competition__date=date(2023, 5, 1)).delete()
+        refresh_standings()
+        self.assertFalse(Standing.objects.filter(season=2023).exists())
+        self.assertEqual(self._row('horse', self.horses[0].id, Standing.ALL_TIME_SEASON).starts, 2)
+    
+    def test_leaders(self):
+        """Тест лидеров сезона и перехода к таблице за все время"""
+        refresh_standings()
+        season, leaders = get_leaders(2024, limit=1)
+        self.assertEqual(season, 2024)
+        self.assertEqual([row.subject_id for row in leaders['jockey']], [self.jockeys[1].id])
+        
+        season, leaders = get_leaders(2030)
+        self.assertEqual(season, Standing.ALL_TIME_SEASON)
+        self.assertEqual(len(leaders['horse']), 2)
+    
+    def test_import_refreshes(self):
+        """Тест обновления таблиц после импорта протокола"""
+        from racing.importing import import_results
+        
+        competition = Competition.objects.create(
+            hippodrome=self.hippodrome, date=date.today() - timedelta(days=1), time=time(14, 0)
+        )
+        rows = [
+            {'position': 1, 'horse': self.horses[0].id, 'jockey': self.jockeys[0].name, 'time_result': '02:00.000'},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            import_results(competition, rows)
+        self.assertEqual(self._row('horse', self.horses[0].id, competition.date.year).wins, 1)
+    
+    def test_index_shows_leaders(self):
+        """Тест блока лидеров на главной странице"""
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh_standings()
+        response = self.client.get(reverse('index'))
+        self.assertContains(response, 'Лидеры за все время')
+        self.assertContains(response, reverse('horse_competitions', args=[self.horses[1].id]))
+    
+    def test_command(self):
+        """Тест команды обновления"""
+        from io import StringIO
+        
+        out = StringIO()
+        call_command('refresh_standings', stdout=out)
+        # по две строки на лошадей и жокеев: все время, 2023 и 2024
+        self.assertIn(': 12', out.getvalue())
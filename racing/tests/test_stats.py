@@ -0,0 +1,118 @@
+"""
+Unit тесты для статистики карьеры лошадей и жокеев
+Использует unittest
+"""
+from datetime import date, time, timedelta
+from io import StringIO
+from django.test import TestCase
+from django.core.management import call_command
+from racing.models import (
+    Hippodrome, Owner, Jockey, Horse, Competition, Result, HorseStats, JockeyStats
+)
+
+
+# Базовый класс с применением миграций
+try:
+    from racing.tests.test_base import BaseTestCase
+except ImportError:
+    # Если test_base.py не найден, используем встроенный класс
+    class BaseTestCase(TestCase):
+        """Базовый класс для тестов с применением миграций"""
+        @classmethod
+        def setUpClass(cls):
+            """Применяет миграции перед запуском тестов класса"""
+            super().setUpClass()
+            call_command('migrate', verbosity=0, interactive=False)
+
+
+class TestCareerStats(BaseTestCase):
+    """Тесты для инкрементального обновления статистики"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        hippodrome = Hippodrome.objects.create(name='Test', address='Test')
+        self.competitions = [
+            Competition.objects.create(
+                hippodrome=hippodrome,
+                date=date(2024, 1, day),
+                time=time(14, 0)
+            )
+            for day in (1, 2, 3)
+        ]
+        owner = Owner.objects.create(name='Owner', address='Test', phone='+79991234567')
+        self.horse = Horse.objects.create(name='Horse', gender='M', age=5, owner=owner)
+        self.other_horse = Horse.objects.create(name='Other', gender='F', age=4, owner=owner)
+        self.jockey = Jockey.objects.create(name='Jockey', address='Test', age=30, rating=5)
+    
+    def _result(self, competition, position, seconds, horse=None):
+        return Result.objects.create(
+            competition=competition,
+            horse=horse or self.horse,
+            jockey=self.jockey,
+            position=position,
+            time_result=timedelta(minutes=2, seconds=seconds)
+        )
+    
+    def _stats(self):
+        return (
+            HorseStats.objects.get(horse=self.horse),
+            JockeyStats.objects.get(jockey=self.jockey),
+        )
+    
+    def test_stats_on_create(self):
+        """Тест учета новых результатов"""
+        self._result(self.competitions[0], 1, 30)
+        self._result(self.competitions[1], 3, 20)
+        self._result(self.competitions[2], 5, 40)
+        
+        horse_stats, jockey_stats = self._stats()
+        self.assertEqual(horse_stats.starts, 3)
+        self.assertEqual(horse_stats.wins, 1)
+        self.assertEqual(horse_stats.podiums, 2)
+        self.assertEqual(horse_stats.best_time, timedelta(minutes=2, seconds=20))
+        self.assertEqual(jockey_stats.starts, 3)
+    
+    def test_stats_on_update(self):
+        """Тест корректировки статистики при изменении результата"""
+        result = self._result(self.competitions[0], 1, 30)
+        result.position = 4
+        result.time_result = timedelta(minutes=2, seconds=50)
+        result.save()
+        
+        horse_stats, _ = self._stats()
+        self.assertEqual(horse_stats.starts, 1)
+        self.assertEqual(horse_stats.wins, 0)
+        self.assertEqual(horse_stats.podiums, 0)
+        self.assertEqual(horse_stats.best_time, timedelta(minutes=2, seconds=50))
+    
+    def test_stats_on_delete(self):
+        """Тест исключения удаленного лучшего результата"""
+        best = self._result(self.competitions[0], 1, 10)
+        self._result(self.competitions[1], 2, 30)
+        best.delete()
+        
+        horse_stats, jockey_stats = self._stats()
+        self.assertEqual(horse_stats.starts, 1)
+        self.assertEqual(horse_stats.wins, 0)
+        self.assertEqual(horse_stats.best_time, timedelta(minutes=2, seconds=30))
+        self.assertEqual(jockey_stats.podiums, 1)
+    
+    def test_rebuild_matches_incremental(self):
+        """Тест что полная пересборка дает ту же статистику"""
+        self._result(self.competitions[0], 1, 30)
+        self._result(self.competitions[1], 2, 25)
+        self._result(self.competitions[1], 1, 20, horse=self.other_horse)
+        expected = {
+            obj.pk: (obj.starts, obj.wins, obj.podiums, obj.best_time)
+            for obj in HorseStats.objects.all()
+        }
+        
+        HorseStats.objects.all().delete()
+        call_command('rebuild_career_stats', stdout=StringIO())
+        
+        rebuilt = {
+            obj.pk: (obj.starts, obj.wins, obj.podiums, obj.best_time)
+            for obj in HorseStats.objects.all()
+        }
+        self.assertEqual(rebuilt, expected)
+        self.assertEqual(JockeyStats.objects.get(jockey=self.jockey).starts, 3)
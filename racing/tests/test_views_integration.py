@@ -7,6 +7,7 @@ from datetime import date, time, timedelta
 from django.contrib.auth.models import User
 from django.test import TestCase, Client
 from django.urls import reverse
+from django.utils import timezone
 from django.core.management import call_command
 from racing.models import (
     UserProfile, Hippodrome, Owner, Jockey, Horse, Competition, Result
@@ -48,6 +49,24 @@ class TestIndexView(BaseTestCase):
         
         response = self.client.get(reverse('index'))
         self.assertEqual(response.status_code, 200)
+    
+    def test_index_counters_without_count_queries(self):
+        """Тест что счетчики берутся из таблицы счетчиков, а не COUNT(*)"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        owner = Owner.objects.create(name='Owner', address='Test', phone='+79991234567')
+        Horse.objects.create(name='Horse', gender='M', age=5, owner=owner)
+        Jockey.objects.create(name='Jockey', address='Test', age=30, rating=5)
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('index'))
+        self.assertEqual(response.context['total_horses'], 1)
+        self.assertEqual(response.context['total_jockeys'], 1)
+        self.assertEqual(response.context['total_competitions'], 0)
+        # состязания, счетчики, лидеры из турнирной таблицы
+        self.assertEqual(len(queries.captured_queries), 3)
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
 
 
 class TestCompetitionViews(BaseTestCase):
@@ -489,12 +508,415 @@ class TestAuthenticationViews(BaseTestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.context['user_profile'].user, user)
     
-    def test_profile_view_creates_profile(self):
-        """Тест создания профиля при просмотре"""
+    def test_profile_view_without_profile_is_read_only(self):
+        """Тест что просмотр профиля не создает записей в базе"""
         user = User.objects.create_user(username='user', password='test123')
-        # Профиль не создан
+        # Профиль не создан (сигнал срабатывает только после фиксации транзакции)
         self.client.force_login(user)
         
         response = self.client.get(reverse('profile'))
         self.assertEqual(response.status_code, 200)
-        self.assertTrue(UserProfile.objects.filter(user=user).exists())
+        self.assertEqual(response.context['user_profile'].role, 'user')
+        self.assertFalse(UserProfile.objects.filter(user=user).exists())
+    
+    def test_get_requests_do_not_write(self):
+        """Тест что страницы для пользователя без профиля не пишут в базу"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        user = User.objects.create_user(username='user', password='test123')
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(reverse('horse_list')).status_code, 200)
+            self.assertEqual(self.client.get(reverse('profile')).status_code, 200)
+        writes = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+        self.assertEqual(writes, [])
+
+
+class TestCompetitionListPagination(BaseTestCase):
+    """Интеграционные тесты для постраничного списка состязаний"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.client = Client()
+        user = User.objects.create_user(username='user', password='test123')
+        UserProfile.objects.create(user=user, role='user')
+        self.client.force_login(user)
+        self.hippodrome = Hippodrome.objects.create(name='Test', address='Test')
+    
+    def _create_competitions(self, count):
+        for day in range(count):
+            Competition.objects.create(
+                hippodrome=self.hippodrome,
+                date=date(2020, 1, 1) + timedelta(days=day),
+                time=time(14, 0)
+            )
+    
+    def test_competition_list_page_size(self):
+        """Тест ограничения размера страницы и ссылки на следующую"""
+        from racing.views import COMPETITIONS_PER_PAGE
+        self._create_competitions(COMPETITIONS_PER_PAGE + 5)
+        
+        response = self.client.get(reverse('competition_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['competitions']), COMPETITIONS_PER_PAGE)
+        page = response.context['page']
+        self.assertTrue(page.has_next)
+        
+        response = self.client.get(reverse('competition_list'), {'after': page.next_cursor})
+        self.assertEqual(len(response.context['competitions']), 5)
+        self.assertTrue(response.context['page'].has_previous)
+    
+    def test_competition_list_query_count_constant(self):
+        """Тест что число запросов не зависит от числа карточек"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        self._create_competitions(2)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse('competition_list'))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create_competitions(40)
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(reverse('competition_list'))
+        
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+    
+    def test_competition_list_invalid_cursor(self):
+        """Тест некорректного курсора"""
+        response = self.client.get(reverse('competition_list'), {'after': '!!!'})
+        self.assertEqual(response.status_code, 404)
+
+
+class TestJockeyListRoster(BaseTestCase):
+    """Интеграционные тесты для списка жокеев одним запросом"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.client = Client()
+        user = User.objects.create_user(username='user', password='test123')
+        UserProfile.objects.create(user=user, role='user')
+        self.client.force_login(user)
+    
+    def _create_user_jockey(self, username, name):
+        user = User.objects.create_user(username=username, password='test123')
+        jockey = Jockey.objects.create(name=name, address='Test', age=30, rating=5)
+        UserProfile.objects.create(user=user, role='jockey', jockey=jockey)
+        return jockey
+    
+    def test_jockey_list_flags_user_jockeys(self):
+        """Тест отметки жокеев, связанных с пользователями"""
+        Jockey.objects.create(name='Обычный', address='Test', age=30, rating=5)
+        self._create_user_jockey('jockey', 'Пользователь-жокей')
+        
+        response = self.client.get(reverse('jockey_list'))
+        self.assertEqual(response.status_code, 200)
+        flags = {j.name: j.is_user_jockey for j in response.context['all_jockeys']}
+        self.assertEqual(flags, {'Обычный': False, 'Пользователь-жокей': True})
+    
+    def test_jockey_list_query_count_constant(self):
+        """Тест что число запросов не зависит от размера списка"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        self._create_user_jockey('jockey0', 'Жокей 0')
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse('jockey_list'))
+        
+        for i in range(1, 20):
+            self._create_user_jockey(f'jockey{i}', f'Жокей {i}')
+            Jockey.objects.create(name=f'Обычный {i}', address='Test', age=30, rating=5)
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(reverse('jockey_list'))
+        
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+
+class TestCompetitionLeaderboardCache(BaseTestCase):
+    """Интеграционные тесты для кэша таблицы результатов"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.client = Client()
+        hippodrome = Hippodrome.objects.create(name='Test', address='Test')
+        self.competition = Competition.objects.create(
+            hippodrome=hippodrome,
+            date=date.today() - timedelta(days=1),
+            time=time(14, 0)
+        )
+        owner = Owner.objects.create(name='Owner', address='Test', phone='+79991234567')
+        self.horse = Horse.objects.create(name='Буцефал', gender='M', age=5, owner=owner)
+        self.jockey = Jockey.objects.create(name='Jockey', address='Test', age=30, rating=5)
+        self.url = reverse('competition_detail', args=[self.competition.id])
+    
+    def test_cache_hit_single_query(self):
+        """Тест что повторный просмотр выполняет только запрос валидатора (ETag)"""
+        first = self.client.get(self.url)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, first.content)
+    
+    def test_cache_invalidated_on_result_save(self):
+        """Тест перестроения таблицы после добавления результата"""
+        response = self.client.get(self.url)
+        self.assertNotContains(response, 'Буцефал')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            result = Result.objects.create(
+                competition=self.competition,
+                horse=self.horse,
+                jockey=self.jockey,
+                position=1,
+                time_result=timedelta(minutes=2, seconds=30)
+            )
+        self.assertContains(self.client.get(self.url), 'Буцефал')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            result.delete()
+        self.assertNotContains(self.client.get(self.url), 'Буцефал')
+    
+    def test_missing_competition(self):
+        """Тест несуществующего состязания"""
+        response = self.client.get(reverse('competition_detail', args=[self.competition.id + 100]))
+        self.assertEqual(response.status_code, 404)
+
+
+class TestAutocomplete(BaseTestCase):
+    """Интеграционные тесты для автодополнения в формах"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.client = Client()
+        admin = User.objects.create_user(username='admin', password='test123')
+        UserProfile.objects.create(user=admin, role='admin')
+        self.client.force_login(admin)
+        self.owner = Owner.objects.create(name='Owner', address='Test', phone='+79991234567')
+        hippodrome = Hippodrome.objects.create(name='Test', address='Test')
+        self.competition = Competition.objects.create(
+            hippodrome=hippodrome,
+            date=date.today() - timedelta(days=1),
+            time=time(14, 0)
+        )
+    
+    def _create_horses(self, prefix, count):
+        for i in range(count):
+            Horse.objects.create(name=f'{prefix} {i:02d}', gender='M', age=5, owner=self.owner)
+    
+    def test_prefix_search(self):
+        """Тест поиска по префиксу без учета регистра"""
+        self._create_horses('Zephyr', 2)
+        self._create_horses('Apollo', 2)
+        
+        response = self.client.get(reverse('autocomplete', args=['horse']), {'q': 'zep'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([item['text'] for item in data['results']], ['Zephyr 00', 'Zephyr 01'])
+        self.assertIsNone(data['next'])
+    
+    def test_pagination(self):
+        """Тест постраничной выдачи вариантов"""
+        from racing.autocomplete import AUTOCOMPLETE_PAGE_SIZE
+        self._create_horses('Horse', AUTOCOMPLETE_PAGE_SIZE + 3)
+        url = reverse('autocomplete', args=['horse'])
+        
+        data = self.client.get(url, {'q': 'horse'}).json()
+        self.assertEqual(len(data['results']), AUTOCOMPLETE_PAGE_SIZE)
+        self.assertIsNotNone(data['next'])
+        
+        data = self.client.get(url, {'q': 'horse', 'after': data['next']}).json()
+        self.assertEqual(len(data['results']), 3)
+        self.assertIsNone(data['next'])
+    
+    def test_competition_source(self):
+        """Тест подписи состязания с ипподромом"""
+        response = self.client.get(reverse('autocomplete', args=['competition']))
+        data = response.json()
+        self.assertEqual([item['id'] for item in data['results']], [self.competition.id])
+        self.assertIn('Test', data['results'][0]['text'])
+    
+    def test_competition_search_by_label(self):
+        """Тест поиска состязания по началу подписи, в том числе безымянного"""
+        named = Competition.objects.create(
+            hippodrome=self.competition.hippodrome, date=self.competition.date,
+            time=time(16, 0), name='Derby',
+        )
+        url = reverse('autocomplete', args=['competition'])
+        
+        data = self.client.get(url, {'q': 'der'}).json()
+        self.assertEqual([item['id'] for item in data['results']], [named.id])
+        data = self.client.get(url, {'q': 'Состяз'}).json()
+        self.assertEqual([item['id'] for item in data['results']], [self.competition.id])
+        self.assertTrue(data['results'][0]['text'].startswith('Состязание'))
+    
+    def test_import_form_does_not_load_competitions(self):
+        """Тест что форма импорта не выгружает состязания целиком"""
+        response = self.client.get(reverse('import_results'))
+        self.assertContains(response, reverse('autocomplete', args=['competition']))
+        self.assertContains(response, 'racing/autocomplete.js')
+        self.assertNotContains(response, str(self.competition))
+    
+    def test_unknown_source_and_cursor(self):
+        """Тест неизвестного источника и некорректного курсора"""
+        response = self.client.get(reverse('autocomplete', args=['user']))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('autocomplete', args=['horse']), {'after': '!!!'})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_requires_login(self):
+        """Тест что автодополнение требует авторизации"""
+        self.client.logout()
+        response = self.client.get(reverse('autocomplete', args=['horse']))
+        self.assertEqual(response.status_code, 302)
+    
+    def test_add_result_form_does_not_load_tables(self):
+        """Тест что форма результата не выгружает лошадей и жокеев целиком"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        self._create_horses('Horse', 2)
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.get(reverse('add_result'))
+        self.assertNotContains(response, 'Horse 00')
+        self.assertContains(response, 'data-autocomplete-url')
+        
+        self._create_horses('More', 30)
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(reverse('add_result'))
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+
+class TestConditionalGet(BaseTestCase):
+    """Интеграционные тесты для ответов 304 Not Modified"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.client = Client()
+        hippodrome = Hippodrome.objects.create(name='Test', address='Test')
+        self.competition = Competition.objects.create(
+            hippodrome=hippodrome,
+            date=date.today() - timedelta(days=1),
+            time=time(14, 0)
+        )
+        owner = Owner.objects.create(name='Owner', address='Test', phone='+79991234567')
+        self.horse = Horse.objects.create(name='Буцефал', gender='M', age=5, owner=owner)
+        self.jockey = Jockey.objects.create(name='Jockey', address='Test', age=30, rating=5)
+        self.url = reverse('competition_detail', args=[self.competition.id])
+    
+    def test_not_modified_without_rendering(self):
+        """Тест ответа 304 при совпадающем ETag"""
+        response = self.client.get(self.url)
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+        
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response.templates, [])
+    
+    def test_etag_changes_with_results(self):
+        """Тест смены валидатора после добавления и удаления результата"""
+        etag = self.client.get(self.url)['ETag']
+        result = Result.objects.create(
+            competition=self.competition,
+            horse=self.horse,
+            jockey=self.jockey,
+            position=1,
+            time_result=timedelta(minutes=2)
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        
+        etag = response['ETag']
+        result.delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+    
+    def _login(self):
+        user = User.objects.create_user(username='viewer', password='test123')
+        UserProfile.objects.create(user=user, role='user')
+        self.client.force_login(user)
+    
+    def test_list_etag_changes_after_deleting_older_result(self):
+        """Тест смены валидатора списков после удаления не последнего результата"""
+        self._login()
+        with self.captureOnCommitCallbacks(execute=True):
+            older = Result.objects.create(
+                competition=self.competition, horse=self.horse, jockey=self.jockey,
+                position=1, time_result=timedelta(minutes=2)
+            )
+            other = Horse.objects.create(name='Other', gender='F', age=4, owner=self.horse.owner)
+            Result.objects.create(
+                competition=self.competition, horse=other, jockey=self.jockey,
+                position=2, time_result=timedelta(minutes=3)
+            )
+        urls = [reverse('horse_list'), reverse('jockey_list')]
+        etags = [self.client.get(url)['ETag'] for url in urls]
+        for url, etag in zip(urls, etags):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            older.delete()
+        for url, etag in zip(urls, etags):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+    
+    def test_list_etag_changes_after_rating_recompute(self):
+        """Тест смены валидатора списков после пересчета рейтингов Эло"""
+        from racing.elo import recompute_ratings
+        self._login()
+        url = reverse('horse_list')
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            recompute_ratings()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+    
+    def test_rating_change_changes_history_etag(self):
+        """Тест смены валидатора страниц лошади и жокея после пересчета рейтинга"""
+        from racing.models import HorseStats, JockeyStats
+        Result.objects.create(
+            competition=self.competition, horse=self.horse, jockey=self.jockey,
+            position=1, time_result=timedelta(minutes=2)
+        )
+        for url, stats in (
+            (reverse('horse_competitions', args=[self.horse.id]), HorseStats.objects.filter(horse=self.horse)),
+            (reverse('jockey_competitions', args=[self.jockey.id]), JockeyStats.objects.filter(jockey=self.jockey)),
+        ):
+            etag = self.client.get(url)['ETag']
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            stats.update(elo=1600.0)
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200, url)
+    
+    def test_participant_rename_changes_history_etag(self):
+        """Тест смены валидатора истории лошади после переименования жокея"""
+        Result.objects.create(
+            competition=self.competition,
+            horse=self.horse,
+            jockey=self.jockey,
+            position=1,
+            time_result=timedelta(minutes=2)
+        )
+        url = reverse('horse_competitions', args=[self.horse.id])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        
+        Jockey.objects.filter(pk=self.jockey.pk).update(name='Новое имя', updated_at=timezone.now() + timedelta(seconds=1))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+    
+    def test_etag_depends_on_user(self):
+        """Тест что ETag другого пользователя не дает 304"""
+        first = User.objects.create_user(username='first', password='test123')
+        UserProfile.objects.create(user=first, role='user')
+        second = User.objects.create_user(username='second', password='test123')
+        UserProfile.objects.create(user=second, role='user')
+        url = reverse('hippodrome_list')
+        
+        self.client.force_login(first)
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        
+        self.client.force_login(second)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
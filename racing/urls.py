@@ -13,8 +13,16 @@ urlpatterns = [
     path('horses/add/', views.add_horse, name='add_horse'),
     path('horses/<int:horse_id>/competitions/', views.horse_competitions, name='horse_competitions'),
     path('results/add/', views.add_result, name='add_result'),
+    path('results/import/', views.import_results, name='import_results'),
+    path('results/export/', views.export_results, name='export_results'),
     path('owners/add/', views.add_owner, name='add_owner'),
     path('hippodromes/', views.hippodrome_list, name='hippodrome_list'),
+    path('autocomplete/<str:source>/', views.autocomplete, name='autocomplete'),
+    path('rankings/<str:subject>/', views.ranking_list, name='ranking_list'),
+    path('head-to-head/<str:subject>/', views.head_to_head, name='head_to_head'),
+    path('api/head-to-head/<str:subject>/', views.api_head_to_head, name='api_head_to_head'),
+    path('search/', views.search, name='search'),
+    path('api/<str:resource>/', views.api_list, name='api_list'),
     path('hippodromes/add/', views.add_hippodrome, name='add_hippodrome'),
     path('hippodromes/<int:hippodrome_id>/edit/', views.edit_hippodrome, name='edit_hippodrome'),
     path('register/', views.register, name='register'),
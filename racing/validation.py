@@ -0,0 +1,142 @@
+"""
+Правила проверки результатов состязания в памяти.
+
+Все результаты состязания загружаются одним запросом, после чего проверки
+уникальности лошади и места, порядка времени относительно соседей и
+допустимого окна дат выполняются без обращений к базе данных.
+"""
+import re
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_duration
+
+from .models import Jockey, Result
+
+
+# Время в формате [HH:]MM:SS[.mmm]
+TIME_RESULT_RE = re.compile(
+    r'^(?:(?P<h>\d{1,2}):)?(?P<m>\d{1,2}):(?P<s>\d{1,2})(?:[\.,](?P<ms>\d{1,6}))?$'
+)
+
+# Результаты можно вносить не более чем за год вперед и не старше 10 лет
+MAX_FUTURE = timedelta(days=365)
+MAX_PAST = timedelta(days=3650)
+
+
+def parse_time_result(value):
+    """Преобразует введенное время к timedelta; None, если формат не распознан"""
+    if isinstance(value, timedelta):
+        return value
+    if isinstance(value, str):
+        std = parse_duration(value)
+        if std is not None:
+            return std
+        m = TIME_RESULT_RE.match(value.strip())
+        if not m:
+            return None
+        frac = (m.group('ms') or '0')[:6]
+        return timedelta(
+            hours=int(m.group('h') or 0),
+            minutes=int(m.group('m')),
+            seconds=int(m.group('s')),
+            microseconds=int(frac.ljust(6, '0')),
+        )
+    return None
+
+
+def eligible_jockeys():
+    """
+    Жокеи, которых можно указывать в результатах: не связанные с пользователями
+    или связанные с пользователями в роли жокея
+    """
+    return Jockey.objects.filter(
+        Q(userprofile__isnull=True) |
+        Q(userprofile__isnull=False, userprofile__role='jockey')
+    )
+
+
+def validate_competition_window(competition, now=None):
+    """Проверяет, что в состязание еще/уже можно вносить результаты"""
+    now = now or timezone.now().replace(tzinfo=None)
+    competition_datetime = datetime.combine(competition.date, competition.time)
+    if competition_datetime > now + MAX_FUTURE:
+        raise ValidationError(
+            'Нельзя добавлять результаты для соревнований, запланированных более чем на год вперед.'
+        )
+    if competition_datetime < now - MAX_PAST:
+        raise ValidationError(
+            'Нельзя добавлять результаты для соревнований, которые прошли более 10 лет назад.'
+        )
+
+
+class CompetitionResults:
+    """
+    Снимок результатов одного состязания для проверок в памяти.
+
+    Хранит кортежи (position, horse_id, time_result, pk), отсортированные по месту.
+    """
+
+    def __init__(self, competition, rows=()):
+        self.competition = competition
+        self._rows = sorted(rows, key=lambda row: row[0])
+        self._positions = [row[0] for row in self._rows]
+
+    @classmethod
+    def load(cls, competition):
+        """Загружает результаты состязания одним запросом"""
+        rows = Result.objects.filter(competition=competition).values_list(
+            'position', 'horse_id', 'time_result', 'pk'
+        )
+        return cls(competition, rows)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def add(self, position, horse_id, time_result, pk=None):
+        """Добавляет проверенный результат в снимок"""
+        index = bisect_left(self._positions, position)
+        self._positions.insert(index, position)
+        self._rows.insert(index, (position, horse_id, time_result, pk))
+
+    def validate(self, horse, position, time_result, exclude_pk=None):
+        """
+        Проверяет результат по правилам ResultForm.clean.
+        Возвращает время, приведенное к timedelta (или исходное значение,
+        если проверка времени не потребовалась). Бросает ValidationError.
+        """
+        others = [row for row in self._rows if exclude_pk is None or row[3] != exclude_pk]
+
+        if horse is not None and any(row[1] == horse.pk for row in others):
+            raise ValidationError(f'Лошадь "{horse.name}" уже участвует в этом соревновании.')
+
+        if position and any(row[0] == position for row in others):
+            raise ValidationError(f'Место {position} уже занято в этом соревновании.')
+
+        if not position or time_result is None or not others:
+            return time_result
+
+        parsed_time = parse_time_result(time_result)
+        if parsed_time is None:
+            raise ValidationError('Некорректный формат времени. Используйте MM:SS.mmm')
+
+        # Ближайшие соседи сверху и снизу по месту
+        index = bisect_left(self._positions, position)
+        lower = self._rows[index - 1] if index > 0 else None
+        upper_index = index
+        while upper_index < len(self._rows) and self._rows[upper_index][0] <= position:
+            upper_index += 1
+        upper = self._rows[upper_index] if upper_index < len(self._rows) else None
+
+        if lower and parsed_time < lower[2]:
+            raise ValidationError(
+                f'Время для места {position} не может быть меньше времени для места {lower[0]}.'
+            )
+        if upper and parsed_time > upper[2]:
+            raise ValidationError(
+                f'Время для места {position} не может быть больше времени для места {upper[0]}.'
+            )
+        return parsed_time
@@ -1,53 +1,94 @@
+import asyncio
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from django.http import Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
-from .models import Hippodrome, Owner, Jockey, Horse, Competition, Result, UserProfile
-from .forms import HippodromeForm, OwnerForm, JockeyForm, HorseForm, CompetitionForm, ResultForm, UserRegistrationForm
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Case, When, Value, BooleanField
+from django.utils import timezone
+from django.utils.http import urlencode
+from .models import Hippodrome, Owner, Jockey, Horse, Competition, Result, UserProfile, HorseRanking, JockeyRanking, Standing, format_duration
+from .forms import HippodromeForm, OwnerForm, JockeyForm, HorseForm, CompetitionForm, ResultForm, UserRegistrationForm, ResultExportForm, ResultImportForm, ApiQueryForm, HeadToHeadForm
 from .decorators import admin_required, jockey_or_admin_required, user_required
+from .middleware import get_user_profile
+from .caching import arender_cached_cards, cache_view
+from .conditional import (
+    conditional_page, competition_state, horse_state, jockey_state,
+    competition_list_state, horse_list_state, jockey_list_state, hippodrome_list_state,
+)
+from .counters import aget_counts
+from .standings import aget_leaders
+from .form_guide import aget_form_guide
+from .head_to_head import HEAD_TO_HEAD_SUBJECTS, get_head_to_head
+from .pagination import KeysetPaginator, InvalidCursor
+from .leaderboard import aget_leaderboard
+from .autocomplete import SOURCES as AUTOCOMPLETE_SOURCES
+from .export import EXPORT_FORMATS, aiter_export, export_queryset, iter_export
+from .api import RESOURCES as API_RESOURCES, ApiError
+from .search import search as search_objects, result_url
+from .rankings import RANKING_SUBJECTS, ranking_windows
+from .importing import ResultImportError, parse_rows, import_results as import_result_rows
 
 
-def create_jockey_profile_for_user(user_profile):
-    """Создает профиль жокея для пользователя-жокея"""
-    if user_profile.is_jockey() and not user_profile.jockey:
-        # Создаем профиль жокея с базовой информацией
-        jockey = Jockey.objects.create(
-            name=f"{user_profile.user.first_name} {user_profile.user.last_name}".strip() or user_profile.user.username,
-            address=user_profile.address or "Не указан",
-            age=25,  # Возраст по умолчанию
-            rating=5  # Рейтинг по умолчанию
-        )
-        user_profile.jockey = jockey
-        user_profile.save()
-        return jockey
-    return None
+# Количество карточек состязаний на одной странице списка
+COMPETITIONS_PER_PAGE = 24
+
+# Количество карточек жокеев на одной странице списка
+JOCKEYS_PER_PAGE = 30
+
+# Количество строк на одной странице рейтинга
+RANKINGS_PER_PAGE = 50
+
 
+# Страницы просмотра асинхронные: под ASGI ожидание базы и кэша не занимает
+# поток, а данные читаются целиком до отрисовки шаблона
+
+async def _alist(queryset):
+    """Строки запроса списком через асинхронный ORM"""
+    return [obj async for obj in queryset]
+
+
+async def _aget_object_or_404(queryset, **kwargs):
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404(f'{queryset.model._meta.verbose_name}: запись не найдена')
 
-def index(request):
+
+@cache_view(Competition, Horse, Jockey, Standing)
+async def index(request):
     """Главная страница"""
-    recent_competitions = Competition.objects.all()[:5]
-    total_horses = Horse.objects.count()
-    total_jockeys = Jockey.objects.count()
-    total_competitions = Competition.objects.count()
+    # Независимые запросы выполняются одновременно;
+    # счетчики поддерживаются сигналами и читаются одним запросом
+    recent_competitions, counts, (leaders_season, leaders) = await asyncio.gather(
+        _alist(Competition.objects.all()[:5]),
+        aget_counts(),
+        aget_leaders(timezone.localdate().year),
+    )
     
     context = {
         'recent_competitions': recent_competitions,
-        'total_horses': total_horses,
-        'total_jockeys': total_jockeys,
-        'total_competitions': total_competitions,
+        'total_horses': counts['horses'],
+        'total_jockeys': counts['jockeys'],
+        'total_competitions': counts['competitions'],
+        'leaders_season': leaders_season,
+        'leaders': leaders,
     }
     return render(request, 'racing/index.html', context)
 
 
-def competition_detail(request, competition_id):
+@conditional_page(competition_state)
+@cache_view(Competition, Hippodrome, Result, Horse, Jockey)
+async def competition_detail(request, competition_id):
     """Детали состязания с результатами"""
-    competition = get_object_or_404(Competition, id=competition_id)
-    results = Result.objects.filter(competition=competition).order_by('position')
+    # Таблица результатов берется из кэша и перестраивается только после записи Result
+    competition, leaderboard = await aget_leaderboard(competition_id)
     
     context = {
         'competition': competition,
-        'results': results,
+        'leaderboard': leaderboard,
     }
     return render(request, 'racing/competition_detail.html', context)
 
@@ -112,10 +153,205 @@ def add_result(request):
     return render(request, 'racing/add_result.html', {'form': form})
 
 
-def jockey_competitions(request, jockey_id):
+@user_required
+def autocomplete(request, source):
+    """JSON с вариантами для полей с автодополнением"""
+    if source not in AUTOCOMPLETE_SOURCES:
+        raise Http404('Неизвестный источник')
+    try:
+        results, next_cursor = AUTOCOMPLETE_SOURCES[source].page(
+            prefix=request.GET.get('q', ''),
+            after=request.GET.get('after'),
+        )
+    except InvalidCursor:
+        return HttpResponseBadRequest('Некорректный курсор')
+    return JsonResponse({'results': results, 'next': next_cursor})
+
+
+@user_required
+@cache_view(HorseRanking, JockeyRanking, Horse, Jockey, Hippodrome)
+def ranking_list(request, subject):
+    """Рейтинг жокеев или лошадей за выбранное окно времени"""
+    if subject not in RANKING_SUBJECTS:
+        raise Http404('Неизвестный рейтинг')
+    model = RANKING_SUBJECTS[subject]
+    windows = ranking_windows(model)
+    window = request.GET.get('window', 'all')
+    if window not in dict(windows):
+        raise Http404('Неизвестное окно рейтинга')
+    
+    paginator = KeysetPaginator(
+        model.objects.filter(window=window).select_related(subject),
+        ordering=('rank', 'id'),
+        page_size=RANKINGS_PER_PAGE,
+    )
+    try:
+        page = paginator.page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+        )
+    except InvalidCursor:
+        raise Http404('Некорректный курсор страницы')
+    
+    context = {
+        'subject': subject,
+        'window': window,
+        'windows': windows,
+        'rows': page.object_list,
+        'page': page,
+        'query': urlencode({'window': window}),
+    }
+    return render(request, 'racing/ranking_list.html', context)
+
+
+def _head_to_head_form(request, subject):
+    if subject not in HEAD_TO_HEAD_SUBJECTS:
+        raise Http404('Неизвестный раздел')
+    # Ссылка «Сравнить» со страницы участника передает только первого
+    if 'second' not in request.GET:
+        return HeadToHeadForm(subject, initial={'first': request.GET.get('first')})
+    return HeadToHeadForm(subject, request.GET)
+
+
+@user_required
+def head_to_head(request, subject):
+    """Личные встречи двух лошадей или двух жокеев"""
+    form = _head_to_head_form(request, subject)
+    comparison = None
+    if form.is_bound and form.is_valid():
+        comparison = get_head_to_head(subject, form.cleaned_data['first'].pk, form.cleaned_data['second'].pk)
+    
+    context = {
+        'subject': subject,
+        'form': form,
+        'comparison': comparison,
+    }
+    return render(request, 'racing/head_to_head.html', context)
+
+
+def api_head_to_head(request, subject):
+    """JSON с личными встречами пары участников"""
+    form = _head_to_head_form(request, subject)
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+    if not form.is_bound or not form.is_valid():
+        return JsonResponse({'error': form.errors or 'Укажите first и second'}, status=400)
+    first = form.cleaned_data['first']
+    second = form.cleaned_data['second']
+    comparison = get_head_to_head(subject, first.pk, second.pk)
+    average_gap = comparison['average_gap']
+    return JsonResponse({
+        'first': {'id': first.pk, 'name': first.name},
+        'second': {'id': second.pk, 'name': second.name},
+        'meetings': comparison['meetings'],
+        'first_ahead': comparison['first_ahead'],
+        'second_ahead': comparison['second_ahead'],
+        'average_gap': average_gap.total_seconds() if average_gap is not None else None,
+        'races': [
+            {
+                'competition_id': race['competition_id'],
+                'competition': race['competition'],
+                'date': race['date'],
+                'hippodrome': race['hippodrome'],
+                'first_position': race['first_position'],
+                'second_position': race['second_position'],
+                'first_time': format_duration(race['first_time']),
+                'second_time': format_duration(race['second_time']),
+                'gap': race['gap'].total_seconds(),
+            }
+            for race in comparison['races']
+        ],
+    })
+
+
+@user_required
+def search(request):
+    """Поиск по лошадям, жокеям, владельцам и состязаниям"""
+    query = request.GET.get('q', '').strip()
+    results = search_objects(query)
+    for result in results:
+        result['url'] = result_url(result)
+    return render(request, 'racing/search.html', {'query': query, 'results': results})
+
+
+def api_list(request, resource):
+    """JSON API только для чтения: страница ресурса из проекции values()"""
+    if resource not in API_RESOURCES:
+        raise Http404('Неизвестный ресурс')
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+    form = ApiQueryForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'error': form.errors}, status=400)
+    requested = [name.strip() for name in request.GET.get('fields', '').split(',') if name.strip()]
+    try:
+        results, next_cursor = API_RESOURCES[resource].page(
+            form.filters(),
+            requested_fields=requested,
+            after=form.cleaned_data['after'] or None,
+            limit=form.cleaned_data['limit'],
+        )
+    except (ApiError, InvalidCursor) as exc:
+        return JsonResponse({'error': str(exc) or 'Некорректный курсор'}, status=400)
+    return JsonResponse({'results': results, 'next': next_cursor})
+
+
+@jockey_or_admin_required
+def import_results(request):
+    """Импорт итогового протокола состязания одним пакетом"""
+    import_errors = []
+    if request.method == 'POST':
+        form = ResultImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            competition = form.cleaned_data['competition']
+            upload = form.cleaned_data['file']
+            try:
+                rows = parse_rows(upload.read(), upload.name)
+                created = import_result_rows(competition, rows)
+            except ResultImportError as exc:
+                import_errors = exc.errors
+            else:
+                messages.success(request, f'Импортировано результатов: {len(created)}')
+                return redirect('competition_detail', competition_id=competition.id)
+    else:
+        form = ResultImportForm(initial={'competition': request.GET.get('competition')})
+    
+    return render(request, 'racing/import_results.html', {'form': form, 'import_errors': import_errors})
+
+
+@user_required
+def export_results(request):
+    """Потоковая выгрузка результатов в CSV или NDJSON"""
+    form = ResultExportForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text())
+    
+    export_format = form.cleaned_data['format']
+    queryset = export_queryset(
+        date_from=form.cleaned_data['date_from'],
+        date_to=form.cleaned_data['date_to'],
+        hippodrome=form.cleaned_data['hippodrome'],
+    )
+    # Под ASGI синхронный итератор был бы собран в память целиком до отправки
+    chunks = aiter_export if isinstance(request, ASGIRequest) else iter_export
+    response = StreamingHttpResponse(
+        chunks(queryset, export_format),
+        content_type=EXPORT_FORMATS[export_format],
+    )
+    response['Content-Disposition'] = f'attachment; filename="results.{export_format}"'
+    return response
+
+
+@conditional_page(jockey_state)
+@cache_view(Jockey, Result, Competition, Hippodrome, Horse)
+async def jockey_competitions(request, jockey_id):
     """Список состязаний жокея"""
-    jockey = get_object_or_404(Jockey, id=jockey_id)
-    results = Result.objects.filter(jockey=jockey).order_by('-competition__date', '-competition__time')
+    jockey = await _aget_object_or_404(Jockey.objects.select_related('stats'), id=jockey_id)
+    results = await _alist(
+        Result.objects.filter(jockey=jockey)
+        .select_related('competition', 'horse')
+        .order_by('-competition_start', '-id')
+    )
     
     context = {
         'jockey': jockey,
@@ -124,67 +360,90 @@ def jockey_competitions(request, jockey_id):
     return render(request, 'racing/jockey_competitions.html', context)
 
 
-def horse_competitions(request, horse_id):
-    """Список состязаний лошади"""
-    horse = get_object_or_404(Horse, id=horse_id)
-    results = Result.objects.filter(horse=horse).order_by('-competition__date', '-competition__time')
+@conditional_page(horse_state)
+@cache_view(Horse, Result, Competition, Hippodrome, Jockey, per_day=True)
+async def horse_competitions(request, horse_id):
+    """Список состязаний лошади и ее форма"""
+    horse = await _aget_object_or_404(Horse.objects.select_related('owner', 'stats'), id=horse_id)
+    results, form_guide = await asyncio.gather(
+        _alist(
+            Result.objects.filter(horse=horse)
+            .select_related('competition', 'jockey')
+            .order_by('-competition_start', '-id')
+        ),
+        aget_form_guide(horse.id),
+    )
     
     context = {
         'horse': horse,
         'results': results,
+        'form_guide': form_guide,
     }
     return render(request, 'racing/horse_competitions.html', context)
 
 
 @user_required
-def competition_list(request):
-    """Список всех состязаний"""
-    competitions = Competition.objects.all()
-    context = {'competitions': competitions}
+@conditional_page(competition_list_state)
+@cache_view(Competition, Hippodrome)
+async def competition_list(request):
+    """Список состязаний с курсорной пагинацией"""
+    paginator = KeysetPaginator(
+        Competition.objects.select_related('hippodrome'),
+        ordering=('-date', '-time', '-id'),
+        page_size=COMPETITIONS_PER_PAGE,
+    )
+    try:
+        page = await paginator.apage(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+        )
+    except InvalidCursor:
+        raise Http404('Некорректный курсор страницы')
+    
+    context = {
+        'competitions': page.object_list,
+        'cards': await arender_cached_cards(page.object_list, 'competition'),
+        'page': page,
+    }
     return render(request, 'racing/competition_list.html', context)
 
 
 @user_required
-def jockey_list(request):
-    """Список всех жокеев"""
-    # Получаем пользователей-жокеев (только с существующими жокеями)
-    user_jockeys = UserProfile.objects.filter(role='jockey', jockey__isnull=False)
-    
-    # Получаем ID жокеев, которые уже связаны с пользователями
-    user_jockey_ids = [up.jockey.id for up in user_jockeys]
-    
-    # Получаем обычных жокеев (исключая тех, что связаны с пользователями)
-    regular_jockeys = Jockey.objects.exclude(id__in=user_jockey_ids)
-    
-    # Создаем список всех жокеев для отображения
-    all_jockeys = []
-    
-    # Добавляем обычных жокеев
-    for jockey in regular_jockeys:
-        all_jockeys.append({
-            'jockey': jockey,
-            'is_user_jockey': False,
-            'user_profile': None
-        })
-    
-    # Добавляем пользователей-жокеев (только если жокей существует)
-    for user_profile in user_jockeys:
-        if user_profile.jockey:  # Проверяем, что жокей не был удален
-            all_jockeys.append({
-                'jockey': user_profile.jockey,
-                'is_user_jockey': True,
-                'user_profile': user_profile
-            })
+@conditional_page(jockey_list_state)
+async def jockey_list(request):
+    """Список всех жокеев с курсорной пагинацией"""
+    # Пользователей-жокеев отмечаем через обратную связь userprofile в том же запросе
+    jockeys = Jockey.objects.select_related('stats').annotate(
+        is_user_jockey=Case(
+            When(userprofile__role='jockey', then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        )
+    )
+    paginator = KeysetPaginator(jockeys, ordering=('name', 'id'), page_size=JOCKEYS_PER_PAGE)
+    try:
+        page = await paginator.apage(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+        )
+    except InvalidCursor:
+        raise Http404('Некорректный курсор страницы')
     
-    context = {'all_jockeys': all_jockeys}
+    context = {
+        'all_jockeys': page.object_list,
+        'cards': await arender_cached_cards(page.object_list, 'jockey'),
+        'page': page,
+    }
     return render(request, 'racing/jockey_list.html', context)
 
 
 @user_required
-def horse_list(request):
+@conditional_page(horse_list_state)
+@cache_view(Horse, Owner, Result)
+async def horse_list(request):
     """Список всех лошадей"""
-    horses = Horse.objects.all()
-    context = {'horses': horses}
+    horses = await _alist(Horse.objects.select_related('owner', 'stats'))
+    context = {'horses': horses, 'cards': await arender_cached_cards(horses, 'horse')}
     return render(request, 'racing/horse_list.html', context)
 
 
@@ -203,9 +462,11 @@ def add_owner(request):
 
 
 @user_required
-def hippodrome_list(request):
+@conditional_page(hippodrome_list_state)
+@cache_view(Hippodrome)
+async def hippodrome_list(request):
     """Список всех ипподромов"""
-    hippodromes = Hippodrome.objects.all()
+    hippodromes = await _alist(Hippodrome.objects.all())
     context = {'hippodromes': hippodromes}
     return render(request, 'racing/hippodrome_list.html', context)
 
@@ -248,7 +509,7 @@ def register(request):
         form = UserRegistrationForm(request.POST)
         if form.is_valid():
             user = form.save()
-            login(request, user)
+            login(request, user, backend='racing.backends.ProfileModelBackend')
             messages.success(request, 'Регистрация прошла успешно!')
             return redirect('index')
     else:
@@ -285,15 +546,10 @@ def user_logout(request):
 @login_required
 def profile(request):
     """Профиль пользователя"""
-    try:
-        user_profile = request.user.userprofile
-    except UserProfile.DoesNotExist:
-        # Создаем профиль пользователя с ролью по умолчанию
-        user_profile = UserProfile.objects.create(
-            user=request.user,
-            role='user'
-        )
-        # Не показываем уведомление при просмотре профиля
+    user_profile = get_user_profile(request)
+    if user_profile is None:
+        # Профиль еще не создан: показываем роль по умолчанию без записи в базу
+        user_profile = UserProfile(user=request.user, role='user')
     
     context = {'user_profile': user_profile}
     return render(request, 'racing/profile.html', context)
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 from pathlib import Path
 import os
 import sys
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -39,9 +40,17 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'racing',
 ]
 
+# Пользователь из сессии загружается вместе с профилем и жокеем одним запросом.
+# ModelBackend оставлен для сессий, созданных до его появления.
+AUTHENTICATION_BACKENDS = [
+    'racing.backends.ProfileModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
@@ -52,6 +61,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'racing.middleware.UserProfileMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -76,6 +86,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'racing_club.wsgi.application'
+ASGI_APPLICATION = 'racing_club.asgi.application'
 
 
 # Database
@@ -154,3 +165,40 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Session Configuration
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# RACING_CACHE_BACKEND: locmem (по умолчанию), file или memcached (нужен pymemcache)
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'racing'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / 'cache')),
+    'memcached': ('django.core.cache.backends.memcached.PyMemcacheCache', '127.0.0.1:11211'),
+}
+RACING_CACHE_BACKEND = 'locmem' if RUNNING_TESTS else os.environ.get('RACING_CACHE_BACKEND', 'locmem')
+if RACING_CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(
+        f'RACING_CACHE_BACKEND должен быть одним из: {", ".join(CACHE_BACKENDS)}'
+    )
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[RACING_CACHE_BACKEND][0],
+        'LOCATION': os.environ.get('RACING_CACHE_LOCATION', CACHE_BACKENDS[RACING_CACHE_BACKEND][1]),
+        'KEY_PREFIX': 'racing_club',
+    }
+}
+
+# Время жизни закэшированных страниц в секундах (инвалидация - по версиям моделей)
+RACING_VIEW_CACHE_TIMEOUT = int(os.environ.get('RACING_VIEW_CACHE_TIMEOUT', 60 * 60))
+
+
+# Сервер приложения (manage.py serve): число рабочих процессов, перезапуск
+# процесса после стольких запросов (0 - не перезапускать), время на плавную остановку,
+# таймаут чтения запроса в секундах и наибольший размер тела запроса в байтах
+RACING_SERVE_WORKERS = int(os.environ.get('RACING_SERVE_WORKERS', os.cpu_count() or 1))
+RACING_SERVE_MAX_REQUESTS = int(os.environ.get('RACING_SERVE_MAX_REQUESTS', 1000))
+RACING_SERVE_MAX_REQUESTS_JITTER = int(os.environ.get('RACING_SERVE_MAX_REQUESTS_JITTER', 100))
+RACING_SERVE_GRACEFUL_TIMEOUT = int(os.environ.get('RACING_SERVE_GRACEFUL_TIMEOUT', 30))
+RACING_SERVE_TIMEOUT = int(os.environ.get('RACING_SERVE_TIMEOUT', 30))
+RACING_SERVE_MAX_BODY_SIZE = int(os.environ.get('RACING_SERVE_MAX_BODY_SIZE', 10 * 1024 * 1024))